@@ -0,0 +1,309 @@
+"""
+食品分析流水线：OCR识别 → 营养成分表解析 → 评分分析
+
+/analyze、/analyze-text 和异步任务接口（/jobs）共用这里的各个阶段。阶段内都是阻塞调用
+（百度OCR、DeepSeek的HTTP请求），应在线程中运行。每个阶段的并发数由各自的信号量限制，
+无论请求来自同步接口还是任务队列，同时调用同一外部服务的数量都不会超过配置值。
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple, Union
+from dotenv import load_dotenv
+
+from models.baidu_ocr import BaiduOCR
+from models.deepseek_analyzer import DeepSeekAnalyzer
+from models.food_analyzer import FoodAnalyzer
+from models.incremental_analyzer import IncrementalTextAnalyzer
+from models.nutri_score import NutriScore
+from utils.ingredient_parser import extract_ingredients
+from utils.nutrition_parser import NutritionFacts, parse_nutrition_facts
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 各阶段同时进行的调用数：OCR（百度OCR）和分析（DeepSeek或本地评分）
+OCR_STAGE_CONCURRENCY = int(os.getenv("OCR_STAGE_CONCURRENCY") or 4)
+ANALYSIS_STAGE_CONCURRENCY = int(os.getenv("ANALYSIS_STAGE_CONCURRENCY") or 4)
+
+STAGE_LIMITS = {
+    "ocr": threading.BoundedSemaphore(OCR_STAGE_CONCURRENCY),
+    "analysis": threading.BoundedSemaphore(ANALYSIS_STAGE_CONCURRENCY),
+}
+
+# 阶段开始时的回调，参数为阶段名（ocr / analysis）
+StageCallback = Optional[Callable[[str], None]]
+
+# 中间结果的回调，参数为事件名（ocr / local_score）和事件数据，供WebSocket接口逐阶段推送
+ProgressCallback = Optional[Callable[[str, Dict], None]]
+
+OCR_FAILED_TEXT = "OCR识别失败，请使用手动输入"
+
+# 本地规则引擎（共享内存映射的配料知识库）
+food_analyzer = FoodAnalyzer()
+
+# 手动输入的增量分析（按会话保存上一次的完整分析结果）
+incremental_analyzer = IncrementalTextAnalyzer(food_analyzer, DeepSeekAnalyzer)
+
+# 响应中score的评分引擎：llm（默认，DeepSeek）或 nutri_score（营养成分表可读时本地评分，不调用大模型）
+SCORING_ENGINE = (os.getenv("SCORING_ENGINE") or "llm").lower()
+nutri_score_engine = NutriScore()
+
+NUTRIENT_LABELS_ZH = {
+    "energy_kj": ("能量", "kJ"),
+    "sugar_g": ("糖", "g"),
+    "saturated_fat_g": ("饱和脂肪", "g"),
+    "sodium_mg": ("钠", "mg"),
+    "fiber_g": ("膳食纤维", "g"),
+    "protein_g": ("蛋白质", "g"),
+}
+
+GRADE_RECOMMENDATIONS_ZH = {
+    "A": "营养成分表现优秀，可作为同类产品中的优选",
+    "B": "营养成分较好，适合日常食用",
+    "C": "可适量食用，建议与同类产品比较后选择",
+    "D": "建议偶尔少量食用",
+    "E": "建议选择糖、饱和脂肪和钠含量更低的替代产品",
+}
+
+@contextmanager
+def stage(name: str, on_stage: StageCallback = None):
+    """
+    在阶段的并发限制内运行，取得名额后通知on_stage
+
+    Args:
+        name: 阶段名（ocr / analysis）
+        on_stage: 阶段开始时的回调
+    """
+    with STAGE_LIMITS[name]:
+        if on_stage:
+            on_stage(name)
+        yield
+
+def default_analysis_result(food_name: str = "") -> dict:
+    """分析服务不可用时返回的默认结果"""
+    return {
+        "food_name": food_name if food_name else "未识别食品",
+        "ingredients": [],
+        "score": 50,
+        "health_points": ["分析服务暂时不可用"],
+        "recommendations": ["建议查看食品标签，选择天然成分较多的产品"],
+        "detailed_analysis": {
+            "positive_aspects": [],
+            "negative_aspects": [],
+            "nutritional_highlights": []
+        }
+    }
+
+def nutri_score_result(text: str, nutrition: NutritionFacts, food_name: str = "") -> dict:
+    """
+    用本地Nutri-Score引擎按营养成分表评分，结果格式与DeepSeek分析相同（无需调用大模型）
+
+    Args:
+        text: 规范化后的标签文本
+        nutrition: 可评分的营养成分表（见NutriScore.can_score）
+        food_name: 用户提供的食品名称
+
+    Returns:
+        dict: 分析结果，附带nutri_score评分明细
+    """
+    ingredients = extract_ingredients(text)
+    local = nutri_score_engine.analyze(ingredients, nutrition)
+    details = local["nutri_score"]
+    basis = nutrition.basis
+
+    positive_aspects, negative_aspects = [], []
+    for name, points in details["components"].items():
+        value = getattr(nutrition, name, None)
+        if not points or value is None or (name == "protein_g" and not details["protein_counted"]):
+            continue
+        label, unit = NUTRIENT_LABELS_ZH[name]
+        if name in ("fiber_g", "protein_g"):
+            positive_aspects.append(f"{label} {value:g}{unit}/{basis}（加{points}分）")
+        else:
+            negative_aspects.append(f"{label} {value:g}{unit}/{basis}（扣{points}分）")
+
+    return {
+        "food_name": food_name or "未识别食品",
+        "ingredients": ingredients,
+        "score": local["score"],
+        "health_points": [f"Nutri-Score等级{details['grade']}（{details['points']}分）"] + negative_aspects + positive_aspects,
+        "recommendations": [GRADE_RECOMMENDATIONS_ZH[details["grade"]]],
+        "detailed_analysis": {
+            "positive_aspects": positive_aspects,
+            "negative_aspects": negative_aspects,
+            "nutritional_highlights": [f"按营养成分表计算的Nutri-Score等级为{details['grade']}"]
+        },
+        "nutri_score": details
+    }
+
+def local_score(text: str, nutrition: Optional[NutritionFacts] = None) -> Dict:
+    """
+    本地规则引擎的初步评分（配料知识库和营养成分表规则，毫秒级，不调用大模型）
+
+    Args:
+        text: 规范化后的标签文本
+        nutrition: 解析出的营养成分表
+
+    Returns:
+        dict: 评分、配料数量、健康要点和建议
+    """
+    ingredients = extract_ingredients(text)
+    result = food_analyzer.analyze(ingredients, nutrition)
+    return {
+        "score": result["score"],
+        "ingredients": ingredients,
+        "health_points": result.get("health_points", []),
+        "recommendations": result.get("recommendations", [])
+    }
+
+def run_ocr(image_data: Union[bytes, bytearray], on_stage: StageCallback = None) -> Tuple[str, bool]:
+    """
+    OCR阶段：使用百度OCR提取图片中的文字
+
+    Args:
+        image_data: 内存中的图片数据
+        on_stage: 阶段开始时的回调
+
+    Returns:
+        tuple: (识别的文字, 是否识别成功)；失败时文字为提示用户手动输入的说明
+    """
+    with stage("ocr", on_stage):
+        logger.info("开始使用百度OCR提取文字")
+        try:
+            baidu_ocr = BaiduOCR()
+            extracted_text = baidu_ocr.extract_ingredients_text(image_data, use_accurate=True)
+            logger.info(f"百度OCR提取完成，文本长度: {len(extracted_text)}")
+            logger.info(f"OCR识别的完整文字内容:\n{extracted_text}")
+        except Exception as e:
+            logger.error(f"百度OCR提取失败: {e}")
+            return OCR_FAILED_TEXT, False
+
+    # 检查OCR结果是否有效
+    if not extracted_text or len(extracted_text.strip()) < 10:
+        logger.warning("OCR提取的文本内容过少，可能识别失败")
+        return OCR_FAILED_TEXT, False
+    return extracted_text, True
+
+def analyze_image(image_data: Union[bytes, bytearray], file_type: Optional[str] = None,
+                  on_stage: StageCallback = None, start_time: Optional[float] = None,
+                  on_progress: ProgressCallback = None) -> Dict:
+    """
+    分析食品包装图片：OCR识别后评分
+
+    Args:
+        image_data: 内存中的图片数据
+        file_type: 图片类型（如image/jpeg），写入结果元数据
+        on_stage: 阶段开始时的回调
+        start_time: 计算processing_time的起点，默认为调用时刻
+        on_progress: 中间结果的回调；提供时在OCR完成后推送识别文字，并在调用大模型前推送本地初步评分
+
+    Returns:
+        dict: 包含健康评分、配料分析、建议和元数据的分析结果
+    """
+    start_time = start_time or time.time()
+    extracted_text, ocr_success = run_ocr(image_data, on_stage)
+    nutrition = parse_nutrition_facts(extracted_text) if ocr_success else None
+    if on_progress:
+        on_progress("ocr", {"text": extracted_text, "ocr_success": ocr_success})
+        if ocr_success:
+            on_progress("local_score", local_score(extracted_text, nutrition))
+
+    with stage("analysis", on_stage):
+        # 营养成分表可读且选择了本地Nutri-Score引擎时，直接本地评分，不调用大模型
+        if SCORING_ENGINE == "nutri_score" and NutriScore.can_score(nutrition):
+            analysis_result = nutri_score_result(extracted_text, nutrition)
+            analysis_provider = "本地Nutri-Score"
+        else:
+            analysis_provider = "DeepSeek-V3.1"
+            # 使用DeepSeek-V3.1分析食品
+            logger.info("开始使用DeepSeek-V3.1分析食品")
+            try:
+                deepseek_analyzer = DeepSeekAnalyzer()
+                analysis_result = deepseek_analyzer.analyze_food_ingredients(extracted_text)
+                logger.info(f"DeepSeek分析完成，健康评分: {analysis_result.get('score', 'N/A')}")
+            except Exception as e:
+                logger.error(f"DeepSeek分析失败: {e}")
+                # 如果分析失败，返回默认结果
+                analysis_result = default_analysis_result()
+
+    # 添加元数据到响应
+    analysis_result.update({
+        "processing_time": round(time.time() - start_time, 2),
+        "extracted_text": extracted_text,  # 添加OCR识别的完整文字
+        "extracted_text_length": len(extracted_text),
+        "file_size": len(image_data),
+        "file_type": file_type,
+        "ocr_provider": "百度OCR",
+        "analysis_provider": analysis_provider,
+        "ocr_success": ocr_success,  # 添加OCR成功标志
+        "nutrition_facts": nutrition.to_dict() if nutrition else None
+    })
+
+    logger.info(f"分析完成，总处理时间: {analysis_result['processing_time']}秒")
+    return analysis_result
+
+def analyze_text(text: str, food_name: str = "", session_id: str = "",
+                 on_stage: StageCallback = None, start_time: Optional[float] = None,
+                 on_progress: ProgressCallback = None) -> Dict:
+    """
+    分析手动输入的配料文本
+
+    Args:
+        text: 规范化后的标签文本（见normalize_text）
+        food_name: 用户提供的食品名称，覆盖分析结果中的名称
+        session_id: 上一次分析返回的session_id；提供时只重新评估修改过的配料
+        on_stage: 阶段开始时的回调
+        start_time: 计算processing_time的起点，默认为调用时刻
+        on_progress: 中间结果的回调；提供时在调用大模型前推送本地初步评分
+
+    Returns:
+        dict: 包含健康评分、配料分析、建议和元数据的分析结果
+    """
+    start_time = start_time or time.time()
+    nutrition = parse_nutrition_facts(text)
+    if on_progress:
+        on_progress("local_score", local_score(text, nutrition))
+
+    with stage("analysis", on_stage):
+        if SCORING_ENGINE == "nutri_score" and NutriScore.can_score(nutrition):
+            analysis_result = nutri_score_result(text, nutrition, food_name)
+        else:
+            # 使用DeepSeek-V3.1分析食品；同一会话的后续修改只增量评估变化的配料
+            logger.info(f"开始分析食品（会话: {session_id or '新会话'}）")
+            try:
+                analysis_result = incremental_analyzer.analyze(text, session_id)
+
+                # 如果提供了食品名称，则覆盖分析结果中的名称
+                if food_name:
+                    analysis_result["food_name"] = food_name
+
+                logger.info(f"分析完成，健康评分: {analysis_result.get('score', 'N/A')}")
+            except Exception as e:
+                logger.error(f"DeepSeek分析失败: {e}")
+                # 如果分析失败，返回默认结果
+                analysis_result = default_analysis_result(food_name)
+
+    # 添加元数据到响应
+    if "nutri_score" in analysis_result:
+        analysis_provider = "本地Nutri-Score"
+    elif analysis_result.get("incremental", False):
+        analysis_provider = "本地知识库+DeepSeek-V3.1(增量)"
+    else:
+        analysis_provider = "DeepSeek-V3.1"
+    analysis_result.update({
+        "processing_time": round(time.time() - start_time, 2),
+        "extracted_text": text,  # 添加用户输入的文字
+        "extracted_text_length": len(text),
+        "manual_input": True,
+        "nutrition_facts": nutrition.to_dict() if nutrition else None,
+        "analysis_provider": analysis_provider
+    })
+
+    logger.info(f"手动输入分析完成，总处理时间: {analysis_result['processing_time']}秒")
+    return analysis_result
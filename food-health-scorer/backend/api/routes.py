@@ -1,14 +1,21 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Body
+from fastapi import APIRouter, HTTPException, Request, Body
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import List, Optional
 import os
 import time
-import tempfile
 import logging
 from dotenv import load_dotenv
 
-from models.baidu_ocr import BaiduOCR
-from models.deepseek_analyzer import DeepSeekAnalyzer
+from api import pipeline
+from api.pipeline import food_analyzer
+from utils.field_projection import FieldTree, InvalidFieldSpec, project, resolve_projection
+from utils.quality_gate import assess_quality
+from utils.text_normalizer import normalize_text
+from utils.upload_stream import (
+    InvalidUpload, StreamedUpload, UnsupportedUploadType, UploadTooLarge, read_multipart_file
+)
 
 # Load environment variables
 load_dotenv()
@@ -31,116 +38,125 @@ ALLOWED_IMAGE_TYPES = {
     "image/bmp", "image/webp", "image/tiff"
 }
 
+# 上传前质量预检只读取的数据量（缩略图或原图的前若干KB）
+MAX_QUALITY_CHECK_SIZE = 512 * 1024
+
+# Bulk ingredient lookup limits
+MAX_LOOKUP_INGREDIENTS = 200
+MAX_INGREDIENT_NAME_LENGTH = 100
+
 class ManualTextInput(BaseModel):
     text: str
     food_name: str = ""
+    # 上一次分析返回的session_id；提供时只重新评估修改过的配料
+    session_id: str = ""
+
+class IngredientLookupRequest(BaseModel):
+    ingredients: List[str]
+
+# /analyze和/quality的请求体在接口中按流读取（见read_multipart_file），这里只为API文档声明表单字段
+ANALYZE_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["image"],
+                    "properties": {
+                        "image": {
+                            "type": "string",
+                            "format": "binary",
+                            "description": "包含食品包装配料表的图片文件"
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
 
-@router.post("/analyze")
-async def analyze_food_image(request: Request, image: UploadFile = File(...)):
+def response_projection(fields: Optional[str], profile: Optional[str]) -> Optional[FieldTree]:
+    """
+    解析分析结果的字段选择参数，不合法时返回400
+
+    Args:
+        fields: 逗号分隔的字段路径，如score,food_name,detailed_analysis.negative_aspects
+        profile: 预设的字段组合：full（默认，全部字段）或compact（小程序结果页所需字段）
+
+    Returns:
+        FieldTree: 要保留的字段，None表示返回全部字段
+    """
+    try:
+        return resolve_projection(fields, profile)
+    except InvalidFieldSpec as e:
+        raise HTTPException(status_code=400, detail=f"无效的fields或profile参数: {e}")
+
+async def read_image_upload(request: Request, max_size: int = MAX_FILE_SIZE,
+                            truncate: bool = False) -> StreamedUpload:
+    """
+    按流读取multipart表单中的image文件：边接收边计数，超过max_size立即返回413，
+    不把整个请求体缓存到内存或临时文件
+    
+    Args:
+        request: 原始请求
+        max_size: 文件大小上限，默认MAX_FILE_SIZE
+        truncate: 为True时只保留文件的前max_size字节并停止读取请求体，不返回413
+        
+    Returns:
+        StreamedUpload: 图片文件名、类型和内存中的数据（不超过max_size）
+    """
+    try:
+        upload = await read_multipart_file(
+            request.headers, request.stream(), "image", max_size, ALLOWED_IMAGE_TYPES, truncate
+        )
+    except UploadTooLarge as e:
+        logger.warning(f"上传文件过大，已在接收 {e.received} bytes 时中止")
+        raise HTTPException(
+            status_code=413,
+            detail=f"文件过大。最大允许大小: {max_size / (1024*1024):.1f}MB"
+        )
+    except UnsupportedUploadType as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件类型: {e.content_type}。支持的类型: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        )
+    except InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=f"无效的上传请求: {e}")
+    
+    if upload.size == 0:
+        raise HTTPException(status_code=400, detail="上传的文件为空")
+    return upload
+
+@router.post("/analyze", openapi_extra=ANALYZE_REQUEST_BODY)
+async def analyze_food_image(request: Request, fields: Optional[str] = None, profile: Optional[str] = None):
     """
     使用百度OCR和DeepSeek-V3.1分析食品包装图片
     
     Args:
-        image: 包含食品包装配料表的上传图片文件
+        image: 包含食品包装配料表的上传图片文件（multipart表单字段）
+        fields: 只返回这些字段（逗号分隔的字段路径），见response_projection
+        profile: 预设的字段组合（full / compact）
         
     Returns:
         dict: 包含健康评分、配料分析和建议的分析结果
     """
     start_time = time.time()
-    temp_file_path = None
+    # 在接收图片和调用OCR之前校验字段参数
+    projection = response_projection(fields, profile)
     
     try:
-        # 验证文件类型
-        if image.content_type not in ALLOWED_IMAGE_TYPES:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"不支持的文件类型: {image.content_type}。支持的类型: {', '.join(ALLOWED_IMAGE_TYPES)}"
-            )
-        
-        # 检查文件大小
-        file_size = 0
-        content = await image.read()
-        file_size = len(content)
-        
-        if file_size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
-            )
-        
-        if file_size == 0:
-            raise HTTPException(status_code=400, detail="上传的文件为空")
+        # 按流接收图片：大小超限时立即返回413，图片数据直接留在内存中交给OCR，不写临时文件
+        image = await read_image_upload(request)
+        file_size = image.size
         
         logger.info(f"收到图片文件: {image.filename}, 大小: {file_size} bytes, 类型: {image.content_type}")
         
-        # 保存临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        logger.info(f"临时文件已保存: {temp_file_path}")
-        
-        # 使用百度OCR提取文字
-        logger.info("开始使用百度OCR提取文字")
-        ocr_success = True
-        try:
-            baidu_ocr = BaiduOCR()
-            extracted_text = baidu_ocr.extract_ingredients_text(temp_file_path, use_accurate=True)
-            logger.info(f"百度OCR提取完成，文本长度: {len(extracted_text)}")
-            logger.info(f"OCR识别的完整文字内容:\n{extracted_text}")
-            
-            # 检查OCR结果是否有效
-            if not extracted_text or len(extracted_text.strip()) < 10:
-                logger.warning("OCR提取的文本内容过少，可能识别失败")
-                ocr_success = False
-                extracted_text = "OCR识别失败，请使用手动输入"
-        except Exception as e:
-            logger.error(f"百度OCR提取失败: {e}")
-            ocr_success = False
-            extracted_text = "OCR识别失败，请使用手动输入"
-        
-        # 使用DeepSeek-V3.1分析食品
-        logger.info("开始使用DeepSeek-V3.1分析食品")
-        try:
-            deepseek_analyzer = DeepSeekAnalyzer()
-            analysis_result = deepseek_analyzer.analyze_food_ingredients(extracted_text)
-            logger.info(f"DeepSeek分析完成，健康评分: {analysis_result.get('score', 'N/A')}")
-        except Exception as e:
-            logger.error(f"DeepSeek分析失败: {e}")
-            # 如果分析失败，返回默认结果
-            analysis_result = {
-                "food_name": "未识别食品",
-                "ingredients": [],
-                "score": 50,
-                "health_points": ["分析服务暂时不可用"],
-                "recommendations": ["建议查看食品标签，选择天然成分较多的产品"],
-                "detailed_analysis": {
-                    "positive_aspects": [],
-                    "negative_aspects": [],
-                    "nutritional_highlights": []
-                }
-            }
-        
-        # 添加元数据到响应
-        analysis_result.update({
-            "processing_time": round(time.time() - start_time, 2),
-            "extracted_text": extracted_text,  # 添加OCR识别的完整文字
-            "extracted_text_length": len(extracted_text),
-            "file_size": file_size,
-            "file_type": image.content_type,
-            "ocr_provider": "百度OCR",
-            "analysis_provider": "DeepSeek-V3.1",
-            "ocr_success": ocr_success  # 添加OCR成功标志
-        })
-        
-        # 清理临时文件
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-            temp_file_path = None
-        
-        logger.info(f"分析完成，总处理时间: {analysis_result['processing_time']}秒")
-        
-        return analysis_result
+        # OCR和分析在线程中运行，不阻塞事件循环；各阶段的并发数由pipeline限制
+        result = await run_in_threadpool(
+            pipeline.analyze_image, image.data, image.content_type, start_time=start_time
+        )
+        return project(result, projection)
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -148,15 +164,6 @@ async def analyze_food_image(request: Request, image: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"分析过程中发生未预期错误: {e}")
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
-    
-    finally:
-        # 确保清理临时文件
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                logger.info("临时文件已清理")
-            except Exception as e:
-                logger.error(f"清理临时文件失败: {e}")
 
 @router.get("/health")
 async def health_check():
@@ -179,20 +186,25 @@ async def health_check():
         raise HTTPException(status_code=500, detail="服务不可用")
 
 @router.post("/analyze-text")
-async def analyze_food_text(request: Request, input_data: ManualTextInput):
+async def analyze_food_text(request: Request, input_data: ManualTextInput,
+                            fields: Optional[str] = None, profile: Optional[str] = None):
     """
     分析手动输入的食品配料文本
     
     Args:
         input_data: 包含食品名称和配料文本的输入数据
+        fields: 只返回这些字段（逗号分隔的字段路径），见response_projection
+        profile: 预设的字段组合（full / compact）
         
     Returns:
         dict: 包含健康评分、配料分析和建议的分析结果
     """
     start_time = time.time()
-    
+    projection = response_projection(fields, profile)
+
     try:
-        text = input_data.text
+        # 统一全半角、繁简和OCR易混字符，后续配料匹配和会话缓存都基于规范化文本
+        text = normalize_text(input_data.text)
         food_name = input_data.food_name
         
         if not text or len(text.strip()) < 3:
@@ -201,45 +213,10 @@ async def analyze_food_text(request: Request, input_data: ManualTextInput):
         logger.info(f"收到手动输入的文本，长度: {len(text)}字符")
         logger.info(f"食品名称: {food_name if food_name else '未提供'}")
         
-        # 使用DeepSeek-V3.1分析食品
-        logger.info("开始使用DeepSeek-V3.1分析食品")
-        try:
-            deepseek_analyzer = DeepSeekAnalyzer()
-            analysis_result = deepseek_analyzer.analyze_food_ingredients(text)
-            
-            # 如果提供了食品名称，则覆盖分析结果中的名称
-            if food_name:
-                analysis_result["food_name"] = food_name
-                
-            logger.info(f"DeepSeek分析完成，健康评分: {analysis_result.get('score', 'N/A')}")
-        except Exception as e:
-            logger.error(f"DeepSeek分析失败: {e}")
-            # 如果分析失败，返回默认结果
-            analysis_result = {
-                "food_name": food_name if food_name else "未识别食品",
-                "ingredients": [],
-                "score": 50,
-                "health_points": ["分析服务暂时不可用"],
-                "recommendations": ["建议查看食品标签，选择天然成分较多的产品"],
-                "detailed_analysis": {
-                    "positive_aspects": [],
-                    "negative_aspects": [],
-                    "nutritional_highlights": []
-                }
-            }
-        
-        # 添加元数据到响应
-        analysis_result.update({
-            "processing_time": round(time.time() - start_time, 2),
-            "extracted_text": text,  # 添加用户输入的文字
-            "extracted_text_length": len(text),
-            "manual_input": True,
-            "analysis_provider": "DeepSeek-V3.1"
-        })
-        
-        logger.info(f"手动输入分析完成，总处理时间: {analysis_result['processing_time']}秒")
-        
-        return analysis_result
+        result = await run_in_threadpool(
+            pipeline.analyze_text, text, food_name, input_data.session_id, start_time=start_time
+        )
+        return project(result, projection)
         
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -248,6 +225,70 @@ async def analyze_food_text(request: Request, input_data: ManualTextInput):
         logger.error(f"分析过程中发生未预期错误: {e}")
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
 
+@router.post("/ingredients/lookup")
+async def lookup_ingredients(request_data: IngredientLookupRequest):
+    """
+    批量查询配料的健康信息（供前端FoodInfoTable一次性标注所有配料）
+    
+    Args:
+        request_data: 包含配料名称列表的请求数据
+        
+    Returns:
+        dict: 按输入顺序排列的配料健康信息；query为请求中的原始名称，
+            ingredient为规范化后（简体、半角）用于查询的名称
+    """
+    start_time = time.time()
+    
+    ingredients = [normalize_text(name).strip() for name in request_data.ingredients]
+    if len(ingredients) > MAX_LOOKUP_INGREDIENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一次最多查询{MAX_LOOKUP_INGREDIENTS}个配料"
+        )
+    
+    too_long = [name for name in ingredients if len(name) > MAX_INGREDIENT_NAME_LENGTH]
+    if too_long:
+        raise HTTPException(
+            status_code=400,
+            detail=f"配料名称过长（最多{MAX_INGREDIENT_NAME_LENGTH}个字符）"
+        )
+    
+    results = food_analyzer.get_ingredients_info(ingredients)
+    for query, result in zip(request_data.ingredients, results):
+        result["query"] = query
+    
+    return {
+        "results": results,
+        "count": len(results),
+        "processing_time": round(time.time() - start_time, 4)
+    }
+
+@router.post("/quality", openapi_extra=ANALYZE_REQUEST_BODY)
+async def check_image_quality(request: Request):
+    """
+    上传前的图片质量预检：客户端先发送缩略图（建议长边≥1024像素）或原图的前几百KB，
+    在数毫秒内得到模糊、曝光和对比度判断，质量不合格的照片无需完整上传和OCR/LLM分析
+    
+    Args:
+        request: 原始请求，表单字段image为缩略图或原图的开头部分（最多读取512KB）
+        
+    Returns:
+        dict: is_suitable、reason、各项判断、指标和解码信息
+    """
+    start_time = time.time()
+    
+    # 只接收开头部分，读满MAX_QUALITY_CHECK_SIZE后不再读取请求体的剩余数据
+    upload = await read_image_upload(request, MAX_QUALITY_CHECK_SIZE, truncate=True)
+    
+    try:
+        result = await run_in_threadpool(assess_quality, bytes(upload.data))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result["processing_time"] = round(time.time() - start_time, 4)
+    logger.info(f"图片质量预检: suitable={result['is_suitable']}, reason={result['reason']}")
+    return result
+
 @router.get("/")
 async def root():
     """根路径接口"""
@@ -255,5 +296,5 @@ async def root():
         "message": "食品健康评分API",
         "version": "2.1.0",
         "features": ["百度OCR文字识别", "DeepSeek-V3.1智能分析", "手动文本输入分析"],
-        "endpoints": ["/analyze", "/analyze-text", "/health"]
+        "endpoints": ["/analyze", "/analyze-text", "/ingredients/lookup", "/quality", "/health"]
     }
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException, Body
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import os
 import time
-import tempfile
 import logging
 import base64
 from dotenv import load_dotenv
 
-from models.baidu_ocr import BaiduOCR
+from models.baidu_ocr import BaiduOCR, MAX_BASE64_SIZE, SUPPORTED_IMAGE_TYPES, prepare_image
 from models.deepseek_analyzer import DeepSeekAnalyzer
+from utils.base64_image import InvalidBase64Image, parse_base64_image
+from utils.upload_stream import UploadTooLarge
 
 # Load environment variables
 load_dotenv()
@@ -41,43 +42,37 @@ async def ocr_base64_image(request_data: Base64ImageRequest):
         dict: 包含识别文字的结果
     """
     start_time = time.time()
-    temp_file_path = None
     
     try:
-        # 解码Base64图片
+        # 校验Base64图片：只检查字符集、长度和文件头，不解码整张图片
         try:
-            # 检查是否包含data:image前缀
-            image_data = request_data.image
-            if ',' in image_data:
-                # 移除前缀，如 "data:image/jpeg;base64,"
-                image_data = image_data.split(',', 1)[1]
-            
-            # 解码Base64
-            decoded_image = base64.b64decode(image_data)
-            
-            # 检查文件大小
-            file_size = len(decoded_image)
-            if file_size > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
-                )
-            
-            if file_size == 0:
-                raise HTTPException(status_code=400, detail="图片数据为空")
-            
-            logger.info(f"收到Base64图片，大小: {file_size} bytes")
-            
-        except Exception as e:
-            logger.error(f"Base64解码失败: {e}")
+            image = parse_base64_image(request_data.image, MAX_FILE_SIZE)
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=413,
+                detail=f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+            )
+        except InvalidBase64Image as e:
+            logger.error(f"Base64校验失败: {e}")
             raise HTTPException(status_code=400, detail="无效的Base64图片数据")
         
-        # 保存临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            temp_file.write(decoded_image)
-            temp_file_path = temp_file.name
+        file_size = image.size
+        if image.content_type is None:
+            raise HTTPException(status_code=400, detail="无效的Base64图片数据")
         
-        logger.info(f"临时文件已保存: {temp_file_path}")
+        logger.info(f"收到Base64图片，大小: {file_size} bytes, 格式: {image.content_type}")
+        
+        # 百度OCR支持的格式且未超出其大小上限时，Base64原样提交，不解码、不写临时文件、不重新编码；
+        # 否则解码后转换或压缩
+        if image.content_type in SUPPORTED_IMAGE_TYPES and len(image.payload) <= MAX_BASE64_SIZE:
+            ocr_input = {"image_base64": image.payload}
+        else:
+            logger.info("图片需要转换格式或压缩后再提交百度OCR")
+            try:
+                ocr_input = {"image": await run_in_threadpool(prepare_image, base64.b64decode(image.payload))}
+            except Exception as e:
+                logger.error(f"图片预处理失败: {e}")
+                raise HTTPException(status_code=400, detail="无效的Base64图片数据")
         
         # 使用百度OCR提取文字
         logger.info("开始使用百度OCR提取文字")
@@ -85,8 +80,8 @@ async def ocr_base64_image(request_data: Base64ImageRequest):
         try:
             baidu_ocr = BaiduOCR()
             extracted_text = baidu_ocr.extract_ingredients_text(
-                temp_file_path, 
-                use_accurate=request_data.use_accurate
+                use_accurate=request_data.use_accurate,
+                **ocr_input
             )
             logger.info(f"百度OCR提取完成，文本长度: {len(extracted_text)}")
             logger.info(f"OCR识别的完整文字内容:\n{extracted_text}")
@@ -101,11 +96,6 @@ async def ocr_base64_image(request_data: Base64ImageRequest):
             ocr_success = False
             extracted_text = "OCR识别失败，请使用手动输入"
         
-        # 清理临时文件
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-            temp_file_path = None
-        
         # 返回OCR结果
         result = {
             "text": extracted_text,
@@ -125,12 +115,3 @@ async def ocr_base64_image(request_data: Base64ImageRequest):
     except Exception as e:
         logger.error(f"OCR处理过程中发生未预期错误: {e}")
         raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
-    
-    finally:
-        # 确保清理临时文件
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                logger.info("临时文件已清理")
-            except Exception as e:
-                logger.error(f"清理临时文件失败: {e}")
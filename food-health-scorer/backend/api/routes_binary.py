@@ -0,0 +1,133 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+import time
+import logging
+from dotenv import load_dotenv
+
+from models.baidu_ocr import BaiduOCR, MAX_BASE64_SIZE, SUPPORTED_IMAGE_TYPES, prepare_image
+from utils.upload_stream import InvalidUpload, UnsupportedUploadType, UploadTooLarge, read_raw_image
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# File size limit (10MB)
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+# 按文件头识别出的格式，与/analyze允许的类型一致
+ALLOWED_IMAGE_TYPES = {
+    "image/jpeg", "image/png", "image/gif", "image/bmp", "image/webp", "image/tiff"
+}
+
+# 请求体就是图片本身，这里只为API文档声明请求体格式
+BINARY_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            content_type: {"schema": {"type": "string", "format": "binary"}}
+            for content_type in ["application/octet-stream", "image/jpeg", "image/png", "image/webp"]
+        }
+    }
+}
+
+@router.post("/ocr/binary", openapi_extra=BINARY_REQUEST_BODY)
+async def ocr_binary_image(request: Request, use_accurate: bool = True):
+    """
+    使用百度OCR识别以原始二进制上传的图片中的文字
+
+    请求体直接是图片文件（Content-Type为application/octet-stream或image/*），
+    相比/ocr/base64省去约33%的base64传输开销、JSON解析和解码。图片格式按文件头识别，
+    请求体按流读取，超过大小限制立即返回413，数据留在内存中直接交给OCR；
+    百度OCR不支持的格式或超出其大小上限的图片先转换或压缩。
+
+    Args:
+        request: 原始请求，请求体为图片数据
+        use_accurate: 是否使用高精度OCR接口，默认为True
+
+    Returns:
+        dict: 包含识别文字的结果
+    """
+    start_time = time.time()
+
+    try:
+        # 按流读取并识别图片格式
+        try:
+            image = await read_raw_image(
+                request.headers, request.stream(), MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES
+            )
+        except UploadTooLarge:
+            raise HTTPException(
+                status_code=413,
+                detail=f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+            )
+        except UnsupportedUploadType as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的文件类型: {e.content_type}。支持的类型: {', '.join(sorted(ALLOWED_IMAGE_TYPES))}"
+            )
+        except InvalidUpload:
+            raise HTTPException(status_code=400, detail="图片数据为空")
+
+        file_size = image.size
+        logger.info(f"收到二进制图片，大小: {file_size} bytes, 格式: {image.content_type}")
+
+        # 百度OCR只接受JPEG/PNG/BMP且base64后不超过MAX_BASE64_SIZE，否则先转换或压缩
+        image_data = image.data
+        if image.content_type not in SUPPORTED_IMAGE_TYPES or file_size > MAX_BASE64_SIZE // 4 * 3:
+            logger.info("图片需要转换格式或压缩后再提交百度OCR")
+            try:
+                image_data = await run_in_threadpool(prepare_image, bytes(image.data))
+            except Exception as e:
+                logger.error(f"图片预处理失败: {e}")
+                raise HTTPException(status_code=400, detail="无效的图片数据")
+
+        # 使用百度OCR提取文字（直接传入内存中的图片数据，不写临时文件）
+        logger.info("开始使用百度OCR提取文字")
+        ocr_success = True
+        try:
+            baidu_ocr = BaiduOCR()
+            extracted_text = await run_in_threadpool(
+                baidu_ocr.extract_ingredients_text, image_data, use_accurate
+            )
+            logger.info(f"百度OCR提取完成，文本长度: {len(extracted_text)}")
+            logger.info(f"OCR识别的完整文字内容:\n{extracted_text}")
+
+            # 检查OCR结果是否有效
+            if not extracted_text or len(extracted_text.strip()) < 10:
+                logger.warning("OCR提取的文本内容过少，可能识别失败")
+                ocr_success = False
+                extracted_text = "OCR识别失败，请使用手动输入"
+        except Exception as e:
+            logger.error(f"百度OCR提取失败: {e}")
+            ocr_success = False
+            extracted_text = "OCR识别失败，请使用手动输入"
+
+        # 返回OCR结果
+        result = {
+            "text": extracted_text,
+            "words_count": len(extracted_text),
+            "success": ocr_success,
+            "processing_time": round(time.time() - start_time, 2),
+            "ocr_provider": "百度OCR",
+            "file_size": file_size,
+            "file_type": image.content_type
+        }
+
+        logger.info(f"OCR处理完成，总处理时间: {result['processing_time']}秒")
+
+        return result
+
+    except HTTPException:
+        # Re-raise HTTP exceptions as-is
+        raise
+    except Exception as e:
+        logger.error(f"OCR处理过程中发生未预期错误: {e}")
+        raise HTTPException(status_code=500, detail=f"服务器内部错误: {str(e)}")
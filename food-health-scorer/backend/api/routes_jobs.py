@@ -0,0 +1,164 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional
+import logging
+from dotenv import load_dotenv
+
+from api import pipeline
+from api.routes import MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES, read_image_upload, response_projection
+from utils.field_projection import project
+from utils.job_queue import InvalidCallbackURL, JobQueue, JobQueueFull, validate_callback_url
+from utils.text_normalizer import normalize_text
+from utils.upload_stream import InvalidUpload, UnsupportedUploadType, UploadTooLarge, read_raw_image
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# 后台任务队列：固定数量的worker线程，排队上限和结果保留时间见JOB_*环境变量
+job_queue = JobQueue()
+
+# GET /jobs/{job_id}?wait= 长轮询的最长等待秒数
+MAX_WAIT_SECONDS = 30
+
+class JobTextInput(BaseModel):
+    text: str
+    food_name: str = ""
+    # 上一次分析返回的session_id；提供时只重新评估修改过的配料
+    session_id: str = ""
+    # 任务完成后以POST方式推送任务结果（JSON）的地址
+    callback_url: Optional[str] = None
+
+# 请求体可以是multipart图片、原始二进制图片或JSON文本，这里只为API文档声明请求体格式
+JOB_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"image": {"type": "string", "format": "binary"}},
+                    "required": ["image"]
+                }
+            },
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+            "application/json": {"schema": JobTextInput.model_json_schema()}
+        }
+    }
+}
+
+async def check_callback_url(callback_url: Optional[str]) -> Optional[str]:
+    """校验回调地址（可能需要DNS解析，放到线程池执行），不合法或未开启回调时返回400"""
+    if not callback_url:
+        return None
+    try:
+        return await run_in_threadpool(validate_callback_url, callback_url)
+    except InvalidCallbackURL as e:
+        raise HTTPException(status_code=400, detail=f"无效的回调地址: {e}")
+
+async def read_job_image(request: Request):
+    """按Content-Type读取任务图片：multipart表单的image字段或原始二进制请求体"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        return await read_image_upload(request)
+
+    try:
+        return await read_raw_image(request.headers, request.stream(), MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES)
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB"
+        )
+    except UnsupportedUploadType as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的文件类型: {e.content_type}。支持的类型: {', '.join(sorted(ALLOWED_IMAGE_TYPES))}"
+        )
+    except InvalidUpload:
+        raise HTTPException(status_code=400, detail="图片数据为空")
+
+@router.post("/jobs", status_code=202, openapi_extra=JOB_REQUEST_BODY)
+async def create_job(request: Request, callback_url: Optional[str] = None):
+    """
+    提交异步分析任务，立即返回任务ID，不等待OCR和分析完成
+
+    请求体为multipart图片（image字段）、原始二进制图片（application/octet-stream或image/*）
+    或JSON文本（与/analyze-text相同，另可带callback_url）。任务由有界的worker池处理，
+    结果通过GET /jobs/{job_id}获取（支持长轮询），或在完成后推送到callback_url。
+
+    Args:
+        request: 原始请求
+        callback_url: 图片任务的回调地址（文本任务也可在JSON中提供）
+
+    Returns:
+        dict: 任务ID、状态和查询地址
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("application/json"):
+        try:
+            input_data = JobTextInput.model_validate(await request.json())
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=400, detail=f"无效的请求数据: {e}")
+
+        # 统一全半角、繁简和OCR易混字符，后续配料匹配和会话缓存都基于规范化文本
+        text = normalize_text(input_data.text)
+        if not text or len(text.strip()) < 3:
+            raise HTTPException(status_code=400, detail="输入的文本内容过少")
+
+        callback = await check_callback_url(input_data.callback_url or callback_url)
+        kind, job_args = "text", (pipeline.analyze_text, text, input_data.food_name, input_data.session_id)
+        logger.info(f"收到文本分析任务，长度: {len(text)}字符")
+    else:
+        callback = await check_callback_url(callback_url)
+        image = await read_job_image(request)
+        kind, job_args = "image", (pipeline.analyze_image, image.data, image.content_type)
+        logger.info(f"收到图片分析任务，大小: {image.size} bytes, 类型: {image.content_type}")
+
+    try:
+        job = job_queue.submit(kind, *job_args, callback_url=callback)
+    except JobQueueFull as e:
+        logger.warning(f"任务队列已满，拒绝新任务: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "服务繁忙，请稍后重试"},
+            headers={"Retry-After": "5"}
+        )
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": str(request.url_for("get_job", job_id=job.id))
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0, fields: Optional[str] = None, profile: Optional[str] = None):
+    """
+    查询异步分析任务的状态和结果
+
+    Args:
+        job_id: POST /jobs返回的任务ID
+        wait: 任务未完成时最多等待的秒数（长轮询，上限MAX_WAIT_SECONDS），默认立即返回
+        fields: 分析结果只返回这些字段（逗号分隔的字段路径），见response_projection
+        profile: 分析结果预设的字段组合（full / compact）
+
+    Returns:
+        dict: 任务状态、当前阶段（ocr / analysis）、时间戳，以及完成后的结果或错误信息
+    """
+    projection = response_projection(fields, profile)
+    job = await job_queue.wait(job_id, min(max(wait, 0), MAX_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或结果已过期")
+    response = job.to_dict()
+    response["result"] = project(response["result"], projection)
+    return response
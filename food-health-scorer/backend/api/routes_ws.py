@@ -0,0 +1,163 @@
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from anyio import from_thread
+from typing import Optional
+import json
+import time
+import logging
+from dotenv import load_dotenv
+
+from api import pipeline
+from api.routes import MAX_FILE_SIZE, ALLOWED_IMAGE_TYPES, response_projection
+from utils.field_projection import FieldTree, project
+from utils.quality_gate import assess_quality
+from utils.text_normalizer import normalize_text
+from utils.upload_stream import SNIFF_SIZE, sniff_image_type
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class AnalysisRejected(Exception):
+    """本次分析无法进行，原因以error事件发给客户端，连接保持打开"""
+
+class AnalysisConnection:
+    """
+    一个WebSocket连接上的分析会话：按顺序处理客户端发来的图片和文本，逐阶段推送事件
+
+    同一连接上的文本分析沿用上一次返回的session_id，只重新评估修改过的配料。
+    """
+
+    def __init__(self, websocket: WebSocket, session_id: str = "", strict_quality: bool = False,
+                 projection: Optional[FieldTree] = None):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.strict_quality = strict_quality
+        self.projection = projection
+        self.analysis_id = 0
+
+    async def send_event(self, event: str, data: dict):
+        await self.websocket.send_json({"event": event, "analysis_id": self.analysis_id, **data})
+
+    def send_from_thread(self, event: str, data: dict):
+        """在流水线线程中推送中间结果；发送失败（如客户端已断开）时异常会终止后续阶段"""
+        from_thread.run(self.send_event, event, data)
+
+    async def analyze_image(self, data: bytes):
+        """图片：接收 → 质量预检 → OCR文字 → 本地初步评分 → 大模型分析"""
+        start_time = time.time()
+        file_type = sniff_image_type(data[:SNIFF_SIZE])
+        if len(data) > MAX_FILE_SIZE:
+            raise AnalysisRejected(f"文件过大。最大允许大小: {MAX_FILE_SIZE / (1024*1024):.1f}MB")
+        if file_type not in ALLOWED_IMAGE_TYPES:
+            raise AnalysisRejected("不支持的图片格式")
+
+        logger.info(f"WebSocket收到图片，大小: {len(data)} bytes, 格式: {file_type}")
+        await self.send_event("received", {"kind": "image", "file_size": len(data), "file_type": file_type})
+
+        try:
+            quality = await run_in_threadpool(assess_quality, data)
+        except ValueError:
+            raise AnalysisRejected("无法解码图片")
+        await self.send_event("quality", {
+            "is_suitable": quality["is_suitable"],
+            "reason": quality["reason"],
+            "verdicts": quality["verdicts"]
+        })
+        if self.strict_quality and not quality["is_suitable"]:
+            raise AnalysisRejected(quality["reason"])
+
+        return await run_in_threadpool(
+            pipeline.analyze_image, data, file_type,
+            start_time=start_time, on_progress=self.send_from_thread
+        )
+
+    async def analyze_text(self, message: dict):
+        """文本：接收 → 本地初步评分 → 大模型分析（同一会话增量评估）"""
+        start_time = time.time()
+        text = normalize_text(str(message.get("text") or ""))
+        if len(text.strip()) < 3:
+            raise AnalysisRejected("输入的文本内容过少")
+
+        session_id = str(message.get("session_id") or self.session_id)
+        await self.send_event("received", {"kind": "text", "length": len(text)})
+
+        result = await run_in_threadpool(
+            pipeline.analyze_text, text, str(message.get("food_name") or ""), session_id,
+            start_time=start_time, on_progress=self.send_from_thread
+        )
+        self.session_id = result.get("session_id") or self.session_id
+        return result
+
+    async def handle(self, message: dict):
+        """处理一条客户端消息：二进制帧为图片，文本帧为JSON（{"text": ..., "food_name": ..., "session_id": ...}）"""
+        self.analysis_id += 1
+        try:
+            if message.get("bytes") is not None:
+                result = await self.analyze_image(message["bytes"])
+            else:
+                try:
+                    payload = json.loads(message.get("text") or "")
+                except ValueError:
+                    raise AnalysisRejected("无效的JSON消息")
+                if not isinstance(payload, dict):
+                    raise AnalysisRejected("无效的JSON消息")
+                result = await self.analyze_text(payload)
+        except AnalysisRejected as e:
+            await self.send_event("error", {"detail": str(e)})
+            return
+        await self.send_event("analysis", {"result": project(result, self.projection)})
+
+@router.websocket("/ws/analyze")
+async def analyze_websocket(websocket: WebSocket, session_id: str = "", strict_quality: bool = False,
+                            fields: Optional[str] = None, profile: Optional[str] = None):
+    """
+    通过WebSocket分析食品图片或配料文本，每个阶段完成后立即推送事件
+
+    每条消息是一次分析：二进制帧为图片，文本帧为JSON格式的配料文本。服务端依次推送
+    received（已接收）、quality（质量预检，仅图片）、ocr（识别文字，仅图片）、
+    local_score（本地规则的初步评分）和analysis（与/analyze相同的完整结果）事件，
+    出错时推送error事件；每个事件都带analysis_id（本连接上的第几次分析）。
+    连接可连续用于多次分析，文本分析自动沿用同一会话的session_id。
+
+    Args:
+        websocket: WebSocket连接
+        session_id: 文本分析的初始会话ID（之前分析返回的session_id）
+        strict_quality: 为True时质量预检不合格的图片不再进行OCR和分析
+        fields: analysis事件的结果只返回这些字段（逗号分隔的字段路径），见response_projection
+        profile: analysis事件结果预设的字段组合（full / compact）
+    """
+    await websocket.accept()
+    try:
+        projection = response_projection(fields, profile)
+    except HTTPException as e:
+        await websocket.send_json({"event": "error", "analysis_id": 0, "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+    connection = AnalysisConnection(websocket, session_id, strict_quality, projection)
+    logger.info("WebSocket分析连接已建立")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            await connection.handle(message)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket分析过程中发生未预期错误: {e}")
+        try:
+            await websocket.close(code=1011)
+        except Exception:
+            # 客户端已断开
+            pass
+    logger.info(f"WebSocket分析连接已关闭，共分析{connection.analysis_id}次")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: raw binary image upload (/api/ocr/binary) vs. base64 JSON (/api/ocr/base64)
+
+Sends the same JPEG through both routes of the full app (middleware
+included) as 64KB ASGI messages and reports the request body bytes on the
+wire and the server CPU time per request. Baidu OCR is replaced by a stub
+returning fixed text, so only the server-side upload handling is measured.
+
+Usage:
+    python benchmarks/bench_binary_upload.py [--requests 20] [--sizes 0.5 2 5]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StubOCR:
+    """Stands in for BaiduOCR without network calls"""
+
+    def extract_ingredients_text(self, image=None, use_accurate=True, image_base64=None):
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                f.read()
+        return "配料：小麦粉，白砂糖，植物油，食用盐"
+
+
+def jpeg_of_size(megabytes):
+    """A noisy JPEG of roughly the given size"""
+    side = int(900 * megabytes ** 0.5) + 64
+    pixels = np.random.default_rng(1).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+async def post(app, path, content_type, body):
+    chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)] or [b""]
+    position = 0
+    status = None
+
+    async def receive():
+        nonlocal position
+        if position >= len(chunks):
+            return {"type": "http.disconnect"}
+        position += 1
+        return {"type": "http.request", "body": chunks[position - 1], "more_body": position < len(chunks)}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    }
+    await app(scope, receive, send)
+    assert status == 200, (path, status)
+
+
+def cpu_per_request(app, path, content_type, body, requests):
+    async def run():
+        # One untimed request warms up routing and imports
+        await post(app, path, content_type, body)
+        start = time.process_time()
+        for _ in range(requests):
+            await post(app, path, content_type, body)
+        return time.process_time() - start
+
+    return asyncio.run(run()) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.5, 2, 5])
+    args = parser.parse_args()
+
+    from api import routes_base64, routes_binary
+    from main import app
+    routes_base64.BaiduOCR = StubOCR
+    routes_binary.BaiduOCR = StubOCR
+    logging.disable(logging.INFO)
+
+    print(f"{'image KB':>8} {'base64 wire KB':>15} {'binary wire KB':>15} "
+          f"{'base64 cpu ms':>14} {'binary cpu ms':>14} {'speedup':>8}")
+    for size in args.sizes:
+        image = jpeg_of_size(size)
+        json_body = json.dumps({
+            "image": "data:image/jpeg;base64," + base64.b64encode(image).decode("ascii"),
+            "use_accurate": True
+        }).encode()
+        base64_cpu = cpu_per_request(app, "/api/ocr/base64", "application/json", json_body, args.requests)
+        binary_cpu = cpu_per_request(app, "/api/ocr/binary", "image/jpeg", image, args.requests)
+        print(f"{len(image) / 1024:8.0f} {len(json_body) / 1024:15.0f} {len(image) / 1024:15.0f} "
+              f"{base64_cpu * 1e3:14.2f} {binary_cpu * 1e3:14.2f} {base64_cpu / binary_cpu:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
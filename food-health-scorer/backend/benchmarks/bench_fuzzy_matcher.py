@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: symmetric-delete fuzzy index vs. an exhaustive edit-distance scan
+
+Usage:
+    python benchmarks/bench_fuzzy_matcher.py [--synthetic 20000] [--queries 2000] [--max-distance 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.ingredient_matcher import FuzzyIndex, bounded_edit_distance
+from bench_ingredient_matcher import synthetic_terms
+
+ALPHABET = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+
+
+def garble(term, rng):
+    """Simulate one OCR error: a substituted, dropped or inserted character"""
+    i = rng.randrange(len(term))
+    roll = rng.random()
+    if roll < 0.6:
+        return term[:i] + rng.choice(ALPHABET) + term[i + 1:]
+    if roll < 0.8 and len(term) > 3:
+        return term[:i] + term[i + 1:]
+    return term[:i] + rng.choice(ALPHABET) + term[i:]
+
+
+def exhaustive_search(text, terms, max_distance, min_length=3):
+    """Reference: compute the distance to every indexed term"""
+    best = None
+    for rank, term in enumerate(terms):
+        if len(term) < min_length:
+            continue
+        distance = bounded_edit_distance(text, term, max_distance)
+        if distance <= max_distance and (best is None or distance < best[1]):
+            best = (rank, distance)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--synthetic", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-distance", type=int, default=1)
+    args = parser.parse_args()
+
+    analyzer = FoodAnalyzer()
+    terms = list(analyzer.ingredient_data) + synthetic_terms(args.synthetic)
+
+    build_start = time.perf_counter()
+    index = FuzzyIndex(terms, args.max_distance)
+    build_time = time.perf_counter() - build_start
+
+    rng = random.Random(5)
+    indexed = [term for term in terms if len(term) >= 3]
+    queries = [garble(rng.choice(indexed), rng) for _ in range(args.queries)]
+    queries += [f"未知配料{i}" for i in range(args.queries // 4)]
+
+    # The exhaustive scan is slow; verify and time it on a sample
+    sample = queries[:200]
+    start = time.perf_counter()
+    for query in sample:
+        expected = exhaustive_search(query, terms, args.max_distance)
+        found = index.search(query)
+        assert (found is None) == (expected is None), query
+        assert found is None or found[1] == expected[1], query
+    exhaustive_time = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    hits = sum(index.search(query) is not None for query in queries)
+    index_time = (time.perf_counter() - start) / len(queries)
+
+    print(f"dictionary size    : {len(terms)} terms, {index.variant_count} deletion variants")
+    print(f"index build        : {build_time * 1000:.0f} ms")
+    print(f"queries            : {len(queries)} ({hits} resolved)")
+    print(f"exhaustive scan    : {exhaustive_time * 1e6:10.1f} us/lookup")
+    print(f"symmetric delete   : {index_time * 1e6:10.1f} us/lookup")
+    print(f"speedup            : {exhaustive_time / index_time:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
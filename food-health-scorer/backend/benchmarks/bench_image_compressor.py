@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compress_image vs. the previous quality-stepping compressor
+
+The previous compressor encoded the full image with optimize=True at quality
+95, 85, ... 30 and then resized once. For each photo and target size this
+prints encode count, wall time, output size and whether the target was met.
+Pass real phone photos of labels with --images; without them a synthetic
+12 MP label-like photo (shading, text blocks, sensor noise) is used.
+
+Usage:
+    python benchmarks/bench_image_compressor.py [--images IMG_0001.jpg ...] [--targets 2048 1024 512 200]
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils import image_compressor
+from utils.image_compressor import compress_image
+
+
+def legacy_compress(data, max_size):
+    """The compressor compress_image replaced; returns (data, encodes)"""
+    img = Image.open(io.BytesIO(data))
+    if img.mode == 'RGBA':
+        img = img.convert('RGB')
+    img_format = img.format or 'JPEG'
+    quality = 95
+    encodes = 0
+    while True:
+        output = io.BytesIO()
+        img.save(output, format=img_format, quality=quality, optimize=True)
+        encodes += 1
+        if output.tell() <= max_size or quality <= 30:
+            break
+        quality -= 10
+    if output.tell() > max_size:
+        ratio = math.sqrt(max_size / output.tell()) * 0.9
+        img = img.resize((int(img.width * ratio), int(img.height * ratio)), Image.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format=img_format, quality=quality, optimize=True)
+        encodes += 1
+    return output.getvalue(), encodes
+
+
+def synthetic_photo(width=4000, height=3000):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    shading = 150 + 50 * np.sin(x / 700) + 30 * np.cos(y / 500)
+    img = Image.fromarray(np.clip(shading, 0, 255).astype(np.uint8)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for top in range(200, height - 200, 90):
+        for left in range(200, width - 200, 55):
+            if rng.random() < 0.8:
+                draw.rectangle([left, top, left + 35, top + 45], fill=(25, 25, 25))
+    noisy = np.asarray(img).astype(np.int16) + rng.normal(0, 5, (height, width, 3)).astype(np.int16)
+    output = io.BytesIO()
+    Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)).save(output, format='JPEG', quality=92)
+    return output.getvalue()
+
+
+def count_encodes(data, max_size):
+    """Run compress_image counting encodes (probe/search encodes plus the final one)"""
+    counted = []
+    original = image_compressor._Encoder.size
+
+    def size(encoder, quality):
+        if quality not in encoder.results:
+            counted.append(quality)
+        return original(encoder, quality)
+
+    image_compressor._Encoder.size = size
+    try:
+        result, success, _ = compress_image(data, max_size)
+    finally:
+        image_compressor._Encoder.size = original
+    return result, len(counted) + (1 if success and result is not data else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", nargs="+")
+    parser.add_argument("--targets", type=int, nargs="+", default=[2048, 1024, 512, 200], help="target sizes in KB")
+    args = parser.parse_args()
+
+    if args.images:
+        photos = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                photos.append((os.path.basename(path), f.read()))
+    else:
+        photos = [("synthetic 4000x3000", synthetic_photo())]
+
+    print(f"{'image':<22} {'target':>8} {'impl':<7} {'encodes':>7} {'ms':>8} {'KB':>8} {'fits':>5}")
+    for name, data in photos:
+        print(f"{name:<22} {len(data) / 1024:7.0f}K original")
+        for target_kb in args.targets:
+            max_size = target_kb * 1024
+            for impl, compress in (("legacy", legacy_compress), ("new", count_encodes)):
+                start = time.perf_counter()
+                result, encodes = compress(data, max_size)
+                elapsed = time.perf_counter() - start
+                fits = 0 < len(result) <= max_size
+                print(f"{name:<22} {target_kb:7d}K {impl:<7} {encodes:7d} {elapsed * 1000:8.0f} "
+                      f"{len(result) / 1024:8.0f} {'yes' if fits else 'NO':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compile/load cost of the memory-mapped ingredient database
+
+Also breaks down the per-process Python heap of one IngredientSnapshot:
+the mapped table itself holds almost nothing, but every process (each
+OCR pool worker included) builds its own matcher, substring index, fuzzy
+indexes and exact-lookup dict from the table's names.
+
+Usage:
+    python benchmarks/bench_ingredient_db.py [--entries 20000]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.ingredient_db import (
+    DEFAULT_SOURCE_PATH, FUZZY_MAX_DISTANCE, FUZZY_MIN_LENGTH, IngredientDatabase, IngredientSnapshot,
+    IngredientTable, compile_database, load_known_words
+)
+from models.ingredient_matcher import OCR_CONFUSABLE_GLYPHS, FuzzyIndex, IngredientMatcher, SubstringIndex
+
+
+def synthetic_source(path, entries, seed=5):
+    """Extend the shipped knowledge base with synthetic entries"""
+    with open(DEFAULT_SOURCE_PATH, "r", encoding="utf-8") as f:
+        source = json.load(f)
+    rng = random.Random(seed)
+    alphabet = [chr(c) for c in range(0x4E00, 0x4E00 + 3000)]
+    names = {entry["name"] for entry in source["ingredients"]}
+    while len(source["ingredients"]) < entries:
+        name = "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 6)))
+        if name not in names:
+            names.add(name)
+            source["ingredients"].append({
+                "name": name,
+                "score": rng.randint(-15, 10),
+                "reason": "".join(rng.choice(alphabet) for _ in range(30))
+            })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(source, f, ensure_ascii=False)
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def traced_mb(build):
+    """Python heap allocated by build() and still alive afterwards, in MB"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    return size / (1024 * 1024)
+
+
+def snapshot_breakdown(database_path):
+    """Per-process heap of an IngredientSnapshot and of each structure it builds"""
+    table = IngredientTable(database_path)
+    ingredients = list(table.ingredient_names())
+    additives = list(table.additive_names())
+    aliases = dict(table.aliases())
+    rows = [
+        ("mapped table", lambda: IngredientTable(database_path)),
+        ("name lists", lambda: (list(table.ingredient_names()), list(table.additive_names()), dict(table.aliases()))),
+        ("matcher", lambda: IngredientMatcher(ingredients, additives, aliases.items())),
+        ("substring index", lambda: SubstringIndex(ingredients)),
+    ]
+    if FUZZY_MAX_DISTANCE > 0:
+        fuzzy_options = (FUZZY_MAX_DISTANCE, FUZZY_MIN_LENGTH, OCR_CONFUSABLE_GLYPHS, load_known_words())
+        rows.append(("fuzzy indexes", lambda: (FuzzyIndex(ingredients, *fuzzy_options),
+                                               FuzzyIndex(additives, *fuzzy_options))))
+    rows.append(("whole snapshot", lambda: IngredientSnapshot(table)))
+    return [(name, traced_mb(build)) for name, build in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_path = os.path.join(temp_dir, "ingredients.json")
+        database_path = os.path.join(temp_dir, "ingredients.bin")
+        synthetic_source(source_path, args.entries)
+
+        start = time.perf_counter()
+        compile_database(source_path, database_path)
+        compile_time = time.perf_counter() - start
+
+        rss_before = max_rss_mb()
+        start = time.perf_counter()
+        database = IngredientDatabase(database_path, source_path=None)
+        load_time = time.perf_counter() - start
+        rss_after = max_rss_mb()
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            FoodAnalyzer(database)
+        construct_time = (time.perf_counter() - start) / 1000
+
+        print(f"entries            : {args.entries}")
+        print(f"json source        : {os.path.getsize(source_path) / 1024:8.1f} KB")
+        print(f"binary database    : {os.path.getsize(database_path) / 1024:8.1f} KB")
+        print(f"compile            : {compile_time * 1000:8.1f} ms")
+        print(f"load + matcher     : {load_time * 1000:8.1f} ms (once per process / per reload)")
+        print(f"FoodAnalyzer()     : {construct_time * 1e6:8.1f} us")
+        print(f"max RSS growth     : {rss_after - rss_before:8.1f} MB")
+        print("per-process Python heap of one snapshot:")
+        for name, size in snapshot_breakdown(database_path):
+            print(f"  {name:<17}: {size:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass ingredient parser vs. the original extract_ingredients
+
+Long labels are built from a realistic preamble, an ingredient list with
+nested additive groups and percentages, and the sections that follow it.
+
+Usage:
+    python benchmarks/bench_ingredient_parser.py [--rounds 500] [--sizes 10 50 200]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingredient_parser import INGREDIENT_MARKERS, SEPARATORS, extract_ingredients
+
+# The original section end markers
+SECTION_END_MARKERS = ["营养成分", "保质期", "储存条件", "生产日期", "保存方法"]
+
+
+def legacy_extract_ingredients(text, markers=INGREDIENT_MARKERS, separators=SEPARATORS):
+    """The original extract_ingredients, minus logging"""
+    if not text:
+        return []
+    
+    # Convert text to lowercase for case-insensitive matching
+    text_lower = text.lower()
+    
+    # Find the ingredients section
+    ingredients_section = ""
+    lines = text.split('\n')
+    
+    # Try to find the ingredients section
+    found_ingredients = False
+    for i, line in enumerate(lines):
+        line_lower = line.lower()
+        
+        # Check if this line contains an ingredient marker
+        if any(marker.lower() in line_lower for marker in markers):
+            found_ingredients = True
+            # Start with this line and include several following lines
+            ingredients_section = line
+            
+            # Include up to 5 more lines or until a new section starts
+            for j in range(1, 6):
+                if i + j < len(lines) and not any(marker.lower() in lines[i + j].lower() for marker in SECTION_END_MARKERS):
+                    ingredients_section += " " + lines[i + j]
+                else:
+                    break
+            
+            break
+    
+    # If no specific ingredients section found, use the entire text
+    if not found_ingredients:
+        ingredients_section = text
+    
+    # Extract ingredients from the section
+    ingredients = []
+    
+    # Try to find ingredients after a marker
+    for marker in markers:
+        if marker.lower() in ingredients_section.lower():
+            # Get text after the marker
+            marker_index = ingredients_section.lower().find(marker.lower())
+            ingredients_text = ingredients_section[marker_index + len(marker):]
+            
+            # Split by common separators
+            for separator in separators:
+                if separator in ingredients_text:
+                    ingredients = [item.strip() for item in ingredients_text.split(separator) if item.strip()]
+                    break
+            
+            if ingredients:
+                break
+    
+    # If no ingredients found using markers and separators, try to extract using regex patterns
+    if not ingredients:
+        # Look for patterns like Chinese characters followed by percentages
+        percentage_pattern = r'([^\d%]+)(\d+(?:\.\d+)?%)'
+        matches = re.findall(percentage_pattern, ingredients_section)
+        if matches:
+            ingredients = [match[0].strip() for match in matches]
+    
+    # If still no ingredients found, split by common separators
+    if not ingredients:
+        for separator in separators:
+            if separator in ingredients_section:
+                ingredients = [item.strip() for item in ingredients_section.split(separator) if item.strip()]
+                break
+    
+    # Clean up ingredients
+    cleaned_ingredients = []
+    for item in ingredients:
+        # Remove percentages and other non-ingredient text
+        cleaned = re.sub(r'\d+(?:\.\d+)?%', '', item).strip()
+        cleaned = re.sub(r'^\W+|\W+$', '', cleaned).strip()  # Remove leading/trailing non-word chars
+        
+        # Remove common non-ingredient text patterns
+        cleaned = re.sub(r'保质期.*', '', cleaned)
+        cleaned = re.sub(r'生产日期.*', '', cleaned)
+        cleaned = re.sub(r'储存条件.*', '', cleaned)
+        cleaned = re.sub(r'营养成分.*', '', cleaned)
+        cleaned = re.sub(r'[\(\)（）\[\]【】]', '', cleaned)  # Remove brackets
+        
+        if cleaned and len(cleaned) < 30:  # Avoid very long strings that are likely not ingredients
+            cleaned_ingredients.append(cleaned)
+    
+    return cleaned_ingredients
+
+
+BASE_NAMES = ["小麦粉", "白砂糖", "植物油", "鸡蛋", "食用盐", "全脂乳粉", "麦芽糊精", "食用香精",
+              "可可粉", "燕麦", "葡萄糖浆", "乳清粉", "淀粉", "大豆油", "香草粉"]
+ADDITIVE_GROUPS = [("食品添加剂", ["碳酸氢钠", "柠檬酸", "山梨酸钾"]),
+                   ("乳化剂", ["单硬脂酸甘油酯", "大豆磷脂"]),
+                   ("膨松剂", ["碳酸氢铵", "焦磷酸二氢二钠"])]
+
+
+def synthetic_label(size, seed=0):
+    """A label whose ingredient list has size top-level entries"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(size):
+        if i % 7 == 6:
+            name, subs = ADDITIVE_GROUPS[i % len(ADDITIVE_GROUPS)]
+            items.append(f"{name}（{'、'.join(subs)}）")
+        else:
+            item = BASE_NAMES[rng.randrange(len(BASE_NAMES))] + str(i)
+            if rng.random() < 0.2:
+                item += f"{rng.randint(1, 40)}%"
+            items.append(item)
+    # Wrap the list over a few lines, as OCR returns it
+    lines = ["，".join(items[i:i + 10]) for i in range(0, len(items), 10)]
+    body = "，\n".join(lines[:5]) + "，" + "，".join(lines[5:]) if len(lines) > 5 else "，\n".join(lines)
+    return ("产品名称：某某饼干\n配料：" + body +
+            "\n营养成分表 能量 2000kJ 蛋白质 8.0g\n保质期：12个月\n储存条件：阴凉干燥处")
+
+
+def time_per_call(func, text, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(text)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    logging_level = os.getenv("LOG_LEVEL")
+    if not logging_level:
+        import logging
+        logging.disable(logging.INFO)
+
+    print(f"{'entries':>7} {'chars':>6} {'legacy us':>10} {'new us':>10} {'speedup':>8} {'legacy n':>9} {'new n':>6}")
+    for size in args.sizes:
+        text = synthetic_label(size)
+        legacy = time_per_call(legacy_extract_ingredients, text, args.rounds)
+        new = time_per_call(extract_ingredients, text, args.rounds)
+        print(f"{size:7d} {len(text):6d} {legacy * 1e6:10.1f} {new * 1e6:10.1f} {legacy / new:7.1f}x "
+              f"{len(legacy_extract_ingredients(text)):9d} {len(extract_ingredients(text)):6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark: connection hold time of /api/analyze vs. /api/jobs under a burst of uploads
+
+Fires a burst of concurrent image uploads at the full app (middleware
+included) and reports how long each client's HTTP request stays open. Baidu
+OCR and DeepSeek are replaced by stubs that sleep for their typical latency,
+so the numbers show request handling, not network. For /api/jobs the time
+until the result is ready is measured separately through long-polling, and
+the peak number of concurrent stub OCR calls shows the stage limit at work.
+
+Usage:
+    python benchmarks/bench_jobs.py [--clients 16] [--ocr-seconds 1.5] [--llm-seconds 4]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+OCR_SECONDS = 1.5
+LLM_SECONDS = 4.0
+BOUNDARY = "benchboundary"
+
+
+class Concurrency:
+    """Counts concurrent calls and remembers the peak"""
+
+    def __init__(self):
+        self.current = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.current -= 1
+
+
+ocr_calls = Concurrency()
+
+
+class StubOCR:
+    """Stands in for BaiduOCR with a fixed latency"""
+
+    def extract_ingredients_text(self, image=None, use_accurate=True, image_base64=None):
+        with ocr_calls:
+            time.sleep(OCR_SECONDS)
+        return "配料：小麦粉，白砂糖，植物油，食用盐"
+
+
+class StubDeepSeek:
+    """Stands in for DeepSeekAnalyzer with a fixed latency"""
+
+    def analyze_food_ingredients(self, text):
+        time.sleep(LLM_SECONDS)
+        return {"food_name": "饼干", "ingredients": [], "score": 60}
+
+
+def multipart_image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 240), (200, 120, 40)).save(buffer, format="JPEG")
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"a.jpg\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + buffer.getvalue() + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def request(app, method, path, query=b"", content_type="", body=b""):
+    """Send one request through the ASGI app; returns (status, JSON body)"""
+    sent = False
+    status, chunks = None, []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    headers = [(b"content-length", str(len(body)).encode())]
+    if content_type:
+        headers.append((b"content-type", content_type.encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query, "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": headers,
+    }
+    await app(scope, receive, send)
+    return status, json.loads(b"".join(chunks))
+
+
+async def sync_client(app, body):
+    start = time.perf_counter()
+    status, result = await request(app, "POST", "/api/analyze", content_type=f"multipart/form-data; boundary={BOUNDARY}", body=body)
+    assert status == 200 and "score" in result, status
+    held = time.perf_counter() - start
+    return held, held
+
+
+async def job_client(app, body):
+    start = time.perf_counter()
+    status, job = await request(app, "POST", "/api/jobs", content_type=f"multipart/form-data; boundary={BOUNDARY}", body=body)
+    assert status == 202, status
+    held = time.perf_counter() - start
+    while True:
+        status, job = await request(app, "GET", f"/api/jobs/{job['job_id']}", query=b"wait=30")
+        if job["status"] in ("succeeded", "failed"):
+            break
+    assert job["status"] == "succeeded", job
+    return held, time.perf_counter() - start
+
+
+async def burst(client, app, body, clients):
+    start = time.perf_counter()
+    timings = await asyncio.gather(*(client(app, body) for _ in range(clients)))
+    return timings, time.perf_counter() - start
+
+
+def main():
+    global OCR_SECONDS, LLM_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--ocr-seconds", type=float, default=OCR_SECONDS)
+    parser.add_argument("--llm-seconds", type=float, default=LLM_SECONDS)
+    args = parser.parse_args()
+    OCR_SECONDS, LLM_SECONDS = args.ocr_seconds, args.llm_seconds
+
+    from api import pipeline
+    from main import app
+    pipeline.BaiduOCR = StubOCR
+    pipeline.DeepSeekAnalyzer = StubDeepSeek
+    logging.disable(logging.WARNING)
+    body = multipart_image()
+
+    print(f"{args.clients} concurrent uploads, OCR {OCR_SECONDS}s + LLM {LLM_SECONDS}s, "
+          f"stage limits ocr={pipeline.OCR_STAGE_CONCURRENCY} analysis={pipeline.ANALYSIS_STAGE_CONCURRENCY}")
+    print(f"{'route':>13} {'held mean s':>12} {'held max s':>11} {'ready max s':>12} {'burst s':>8} {'peak OCR':>9}")
+    for name, client in (("/api/analyze", sync_client), ("/api/jobs", job_client)):
+        ocr_calls.peak = 0
+        timings, elapsed = asyncio.run(burst(client, app, body, args.clients))
+        held = [t[0] for t in timings]
+        print(f"{name:>13} {sum(held) / len(held):12.2f} {max(held):11.2f} "
+              f"{max(t[1] for t in timings):12.2f} {elapsed:8.2f} {ocr_calls.peak:9d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Nutri-Score per product vs. vectorised score_batch
+
+Products are random nutrition tables (foods and beverages) in realistic
+ranges. Both paths are checked to agree before timing.
+
+Usage:
+    python benchmarks/bench_nutri_score.py [--rounds 5] [--sizes 100 1000 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.nutri_score import NutriScore
+from utils.nutrition_parser import NutritionFacts
+
+
+def random_products(count, seed=1):
+    rng = random.Random(seed)
+    products = []
+    for _ in range(count):
+        liquid = rng.random() < 0.3
+        products.append(NutritionFacts(
+            energy_kj=rng.uniform(0, 400 if liquid else 3500),
+            protein_g=rng.uniform(0, 30),
+            saturated_fat_g=rng.uniform(0, 15),
+            sugar_g=rng.uniform(0, 50),
+            fiber_g=rng.choice([None, rng.uniform(0, 10)]),
+            sodium_mg=rng.uniform(0, 1200),
+            basis="100ml" if liquid else "100g"
+        ))
+    return products
+
+
+def best_time(function, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    logging_level = os.getenv("LOG_LEVEL")
+    if not logging_level:
+        import logging
+        logging.disable(logging.INFO)
+
+    engine = NutriScore()
+    print(f"{'products':>8} {'scalar us/product':>18} {'batch us/product':>17} {'speedup':>8}")
+    for size in args.sizes:
+        products = random_products(size)
+        batch = engine.score_batch(products)
+        assert all(engine.points(facts)["points"] == batch["points"][index]
+                   for index, facts in enumerate(products))
+
+        scalar = best_time(lambda: [engine.points(facts) for facts in products], args.rounds)
+        vector = best_time(lambda: engine.score_batch(products), args.rounds)
+        print(f"{size:8d} {scalar / size * 1e6:18.2f} {vector / size * 1e6:17.2f} {scalar / vector:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
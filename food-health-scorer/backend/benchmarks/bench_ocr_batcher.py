@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batched OCR pool throughput and latency under concurrent load
+
+Closed-loop clients each submit extract_text jobs back to back to an
+OCRProcessPool. By default the workers run a synthetic processor: a call
+costs a fixed overhead plus a per-image cost, and a batch call amortises the
+overhead and runs the per-image part at --batch-efficiency of the
+single-image cost, which is the shape EasyOCR's detector/recognizer batching
+has. --image runs the real ImageProcessor on the given label photo instead.
+
+Usage:
+    python benchmarks/bench_ocr_batcher.py [--clients 1 4 8 16] [--waits 0 5 10 20] [--batch-size 8]
+    python benchmarks/bench_ocr_batcher.py --image label.jpg --clients 1 4 --waits 0 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr_pool import OCRProcessPool, build_image_processor
+
+# Cost model of the synthetic processor, set from the command line through the environment
+COST_ENV = "BENCH_OCR_COST"
+
+
+class SyntheticProcessor:
+    """Cost model of an OCR processor whose batch calls amortise fixed overhead"""
+
+    def __init__(self):
+        self.overhead, self.per_image, self.batch_efficiency = map(float, os.environ[COST_ENV].split(","))
+
+    def extract_text(self, image):
+        time.sleep(self.overhead + self.per_image)
+        return "", True, None
+
+    def extract_text_batch(self, images):
+        time.sleep(self.overhead + self.per_image * len(images) * self.batch_efficiency)
+        return [("", True, None) for _ in images]
+
+
+def build_synthetic_processor():
+    return SyntheticProcessor()
+
+
+def run(pool, image, clients, requests_per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            pool.submit("extract_text", image).result()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return len(latencies) / total, statistics.median(latencies), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 5, 10, 20], help="max wait in ms")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--overhead-ms", type=float, default=40)
+    parser.add_argument("--per-image-ms", type=float, default=60)
+    parser.add_argument("--batch-efficiency", type=float, default=0.4)
+    parser.add_argument("--image")
+    args = parser.parse_args()
+
+    if args.image:
+        factory = build_image_processor
+        with open(args.image, "rb") as f:
+            image = f.read()
+    else:
+        # Inherited by the spawned workers
+        os.environ[COST_ENV] = f"{args.overhead_ms / 1000},{args.per_image_ms / 1000},{args.batch_efficiency}"
+        factory, image = build_synthetic_processor, b""
+
+    settings = [("off", 1, 0)] + [(f"{wait:.0f}", args.batch_size, wait / 1000) for wait in args.waits]
+    print(f"{'clients':>7} {'max wait':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>11}")
+    for label, batch_size, wait in settings:
+        pool = OCRProcessPool(workers=args.workers, max_pending=max(args.clients) * args.requests,
+                              processor_factory=factory, max_batch_size=batch_size, max_wait=wait)
+        try:
+            pool.warm_up()
+            for clients in args.clients:
+                before = pool.statistics()
+                throughput, p50, p95 = run(pool, image, clients, args.requests)
+                after = pool.statistics()
+                batches = after.get("batches", 0) - before.get("batches", 0)
+                mean_batch = (after.get("jobs", 0) - before.get("jobs", 0)) / batches if batches else 1
+                print(f"{clients:7d} {label:>9} {throughput:8.1f} {p50 * 1000:8.0f} {p95 * 1000:8.0f} {mean_batch:11.2f}")
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
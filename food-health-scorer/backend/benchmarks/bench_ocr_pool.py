@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OCR process pool throughput vs. worker count
+
+By default every job runs a synthetic CPU-bound stage (grayscale, Laplacian
+variance and a contrast stretch on a phone-sized image in pure NumPy) so the
+scaling can be measured without EasyOCR. --images runs the real
+ImageProcessor.extract_text on the given files instead; that needs easyocr,
+opencv-python and torch installed.
+
+Usage:
+    python benchmarks/bench_ocr_pool.py [--workers 1 2 4 8] [--jobs 64] [--threads-per-worker 1]
+    python benchmarks/bench_ocr_pool.py --images label1.jpg label2.jpg [--jobs 32]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.ocr_pool import OCRProcessPool, build_image_processor
+
+
+class SyntheticProcessor:
+    """CPU-bound stand-in for ImageProcessor.extract_text"""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(1600, 1200, 3), dtype=np.uint8)
+
+    def extract_text(self, _image_path):
+        image = self.image.astype(np.float32)
+        gray = image @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+        laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+                     - 4 * gray[1:-1, 1:-1])
+        stretched = np.clip((gray - gray.mean()) * 1.8 + 128, 0, 255)
+        return "", bool(laplacian.var() > 100), f"{stretched.std():.1f}"
+
+
+def build_synthetic_processor():
+    return SyntheticProcessor()
+
+
+def run(workers, jobs, threads, factory, images):
+    pool = OCRProcessPool(workers=workers, threads_per_worker=threads, max_pending=jobs,
+                          processor_factory=factory)
+    try:
+        pool.warm_up()
+        start = time.perf_counter()
+        futures = [pool.submit("extract_text", images[i % len(images)]) for i in range(jobs)]
+        latencies = []
+        for future in futures:
+            future.result()
+            latencies.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+    return jobs / elapsed, sorted(latencies)[len(latencies) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--jobs", type=int, default=64)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--images", nargs="+")
+    args = parser.parse_args()
+
+    if args.images:
+        factory, images = build_image_processor, args.images
+    else:
+        factory, images = build_synthetic_processor, ["synthetic.jpg"]
+
+    print(f"cpu cores          : {os.cpu_count()}")
+    print(f"stage              : {'extract_text' if args.images else 'synthetic preprocessing'}, {args.jobs} jobs")
+    baseline = None
+    for workers in args.workers:
+        throughput, median_latency = run(workers, args.jobs, args.threads_per_worker, factory, images)
+        baseline = baseline or throughput
+        print(
+            f"{workers:2d} workers         : {throughput:8.1f} jobs/s  "
+            f"median completion {median_latency * 1000:8.0f} ms  scaling {throughput / baseline:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/analyze payload bytes and parse time per response profile and encoding
+
+Serializes a representative image analysis result the way the app does
+(JSONResponse), applies each projection and content coding, and reports the
+bytes on the wire, the server time spent compressing, and the time to
+decompress and parse the body (a proxy for client parse cost).
+
+Usage:
+    python benchmarks/bench_response_size.py [--rounds 2000]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+
+from utils.compression import brotli, compress
+from utils.field_projection import project, resolve_projection
+
+OCR_TEXT = (
+    "配料：小麦粉、白砂糖、植物油（棕榈油、大豆油）、鸡蛋、全脂乳粉、食用盐、膨松剂（碳酸氢钠、碳酸氢铵）、"
+    "食用香精、山梨酸钾、柠檬黄。致敏物质提示：含有麸质谷物、蛋类、乳制品。营养成分表 项目 每100克 "
+    "营养素参考值% 能量 2093千焦 25% 蛋白质 6.8克 11% 脂肪 24.5克 41% 饱和脂肪 11.6克 58% "
+    "碳水化合物 63.2克 21% 糖 28.4克 钠 386毫克 19% 贮存条件：置于阴凉干燥处。保质期：12个月。"
+)
+
+RESULT = {
+    "food_name": "黄油曲奇饼干",
+    "ingredients": ["小麦粉", "白砂糖", "棕榈油", "大豆油", "鸡蛋", "全脂乳粉", "食用盐",
+                    "碳酸氢钠", "碳酸氢铵", "食用香精", "山梨酸钾", "柠檬黄"],
+    "score": 32,
+    "health_points": [
+        "白砂糖位列第二，添加糖含量高，长期过量摄入增加肥胖、2型糖尿病和龋齿风险",
+        "含棕榈油，饱和脂肪比例高，过量摄入可能升高低密度脂蛋白胆固醇",
+        "含山梨酸钾、柠檬黄等添加剂，在国家标准限量内使用是安全的，但儿童宜少量食用",
+        "钠含量中等，每100克约占每日参考值的19%",
+    ],
+    "recommendations": [
+        "作为偶尔的零食，每次食用量控制在2-3块",
+        "选择添加糖和饱和脂肪更低、全谷物含量更高的饼干",
+        "食用后注意清洁牙齿，避免睡前食用",
+    ],
+    "detailed_analysis": {
+        "positive_aspects": ["含鸡蛋和乳粉，提供少量优质蛋白", "小麦粉提供碳水化合物，是能量的主要来源"],
+        "negative_aspects": [
+            "添加糖含量高（每100克28.4克），超过世界卫生组织建议的每日添加糖上限",
+            "饱和脂肪含量高（每100克11.6克，占参考值58%）",
+            "能量密度高，每100克约2093千焦，占每日参考值25%",
+            "含人工色素柠檬黄，部分研究提示可能与儿童多动有关",
+        ],
+        "nutritional_highlights": ["高能量、高糖、高饱和脂肪", "蛋白质和膳食纤维含量较低"],
+    },
+    "processing_time": 6.84,
+    "extracted_text": OCR_TEXT,
+    "extracted_text_length": len(OCR_TEXT),
+    "file_size": 1843210,
+    "file_type": "image/jpeg",
+    "ocr_provider": "百度OCR",
+    "analysis_provider": "DeepSeek-V3.1",
+    "ocr_success": True,
+    "nutrition_facts": {
+        "basis": "100g", "energy_kj": 2093.0, "protein_g": 6.8, "fat_g": 24.5, "saturated_fat_g": 11.6,
+        "carbohydrate_g": 63.2, "sugar_g": 28.4, "sodium_mg": 386.0, "fiber_g": None,
+    },
+}
+
+PROJECTIONS = [
+    ("full", None, None),
+    ("compact", None, "compact"),
+    ("score only", "food_name,score", None),
+]
+
+
+def decode(body, encoding):
+    if encoding == "br":
+        return json.loads(brotli.decompress(body))
+    if encoding == "gzip":
+        return json.loads(gzip.decompress(body))
+    return json.loads(body)
+
+
+def best_time(function, rounds):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            function()
+        best = min(best, (time.perf_counter() - start) / rounds)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    if brotli is None:
+        print("brotli is not installed, br rows skipped")
+    print(f"{'profile':>10} {'encoding':>9} {'bytes':>6} {'compress µs':>12} {'decode+parse µs':>16}")
+    for name, fields, profile in PROJECTIONS:
+        body = JSONResponse(project(RESULT, resolve_projection(fields, profile))).body
+        for encoding in encodings:
+            if encoding == "identity":
+                wire, compress_time = body, 0.0
+            else:
+                wire = compress(body, encoding)
+                compress_time = best_time(lambda: compress(body, encoding), args.rounds // 10)
+            parse_time = best_time(lambda: decode(wire, encoding), args.rounds)
+            print(f"{name:>10} {encoding:>9} {len(wire):6d} {compress_time * 1e6:12.1f} {parse_time * 1e6:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: API process import time and baseline RSS
+
+Runs `python -X importtime -c "import main"` in fresh interpreters and reports
+the total import time, the slowest top-level imports and the resident set
+size right after import. --with-local-ocr additionally imports the EasyOCR
+stack to show what ENABLE_LOCAL_OCR costs a worker.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10] [--with-local-ocr]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("openai", "requests", "numpy", "PIL", "cv2", "easyocr", "torch")
+
+PROBE = """
+import resource, sys
+{imports}
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print("RSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print("LOADED", ",".join(loaded))
+"""
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output
+
+    Returns:
+        tuple: total import time in us, and (cumulative_us, module) of the
+        modules imported directly by the probed imports, slowest first
+    """
+    total_us, direct = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented by two extra spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            total_us += int(cumulative_us)
+        elif depth == 1:
+            direct.append((int(cumulative_us), name.strip()))
+    return total_us, sorted(direct, reverse=True)
+
+
+def run_once(imports):
+    code = PROBE.format(imports=imports, heavy=HEAVY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        sys.exit(f"import failed: {lines[-1] if lines else proc.returncode}")
+    rss_kb, loaded = 0, []
+    for line in proc.stdout.splitlines():
+        if line.startswith("RSS_KB "):
+            rss_kb = int(line.split()[1])
+        elif line.startswith("LOADED "):
+            loaded = [m for m in line.split(" ", 1)[1].split(",") if m]
+    return (*parse_importtime(proc.stderr), rss_kb, loaded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--with-local-ocr", action="store_true")
+    args = parser.parse_args()
+
+    imports = "import main"
+    if args.with_local_ocr:
+        imports += "\nimport utils.image_processor"
+
+    totals, rss, slowest, loaded = [], [], None, []
+    for _ in range(args.runs):
+        total_us, slowest, rss_kb, loaded = run_once(imports)
+        totals.append(total_us)
+        rss.append(rss_kb)
+
+    print(f"command            : python -X importtime -c {imports!r}")
+    print(f"import time        : {statistics.median(totals) / 1000:8.1f} ms (median of {args.runs})")
+    print(f"baseline RSS       : {statistics.median(rss) / 1024:8.1f} MB")
+    print(f"heavy modules      : {', '.join(loaded) or 'none'}")
+    print("slowest direct imports (last run):")
+    for cumulative_us, name in slowest[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
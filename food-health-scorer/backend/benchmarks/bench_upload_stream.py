@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of concurrent oversized uploads, UploadFile vs. streaming
+
+Each client sends a multipart body larger than MAX_FILE_SIZE in 64KB
+messages, as a server delivers it to the ASGI app. The original endpoint
+declares an UploadFile parameter and checks the size after image.read();
+the new one reads the body with read_multipart_file. Each mode runs in a
+fresh process; reported are the growth of its peak RSS over the baseline
+after imports, body bytes pulled per client before the 413, and wall time.
+
+Usage:
+    python benchmarks/bench_upload_stream.py [--clients 8] [--upload-mb 50]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+
+from utils.upload_stream import UploadTooLarge, read_multipart_file
+
+MAX_FILE_SIZE = 10 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = b"benchboundary"
+
+app = FastAPI()
+
+
+@app.post("/legacy")
+async def legacy_upload(image: UploadFile = File(...)):
+    """The original size check: after the whole file has been read"""
+    content = await image.read()
+    if len(content) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="too large")
+    return {"size": len(content)}
+
+
+@app.post("/streaming")
+async def streaming_upload(request: Request):
+    try:
+        upload = await read_multipart_file(request.headers, request.stream(), "image", MAX_FILE_SIZE)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="too large")
+    return {"size": upload.size}
+
+
+class Client:
+    """ASGI receive/send pair streaming one oversized multipart upload"""
+
+    def __init__(self, upload_size):
+        self.head = (
+            b"--" + BOUNDARY + b"\r\n"
+            b'Content-Disposition: form-data; name="image"; filename="big.jpg"\r\n'
+            b"Content-Type: image/jpeg\r\n\r\n"
+        )
+        self.tail = b"\r\n--" + BOUNDARY + b"--\r\n"
+        self.upload_size = upload_size
+        self.sent = 0
+        self.status = None
+
+    @property
+    def body_size(self):
+        return len(self.head) + self.upload_size + len(self.tail)
+
+    async def receive(self):
+        # Let the other clients' requests run between messages
+        await asyncio.sleep(0)
+        if self.sent == 0:
+            chunk = self.head
+        elif self.sent < len(self.head) + self.upload_size:
+            chunk = b"x" * min(CHUNK_SIZE, len(self.head) + self.upload_size - self.sent)
+        elif self.sent < self.body_size:
+            chunk = self.tail
+        else:
+            return {"type": "http.disconnect"}
+        self.sent += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": self.sent < self.body_size}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+
+    def scope(self, path):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+            "headers": [
+                (b"content-type", b"multipart/form-data; boundary=" + BOUNDARY),
+                # Chunked transfer: no Content-Length, so the size is only known by reading
+            ],
+        }
+
+
+async def run(path, clients, upload_size):
+    pending = [Client(upload_size) for _ in range(clients)]
+    await asyncio.gather(*(app(client.scope(path), client.receive, client.send) for client in pending))
+    return pending
+
+
+def peak_rss():
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(path, clients, upload_size):
+    """Runs in a fresh worker process, so ru_maxrss covers only this mode"""
+    baseline = peak_rss()
+    start = time.perf_counter()
+    finished = asyncio.run(run(path, clients, upload_size))
+    elapsed = time.perf_counter() - start
+    assert all(client.status == 413 for client in finished), [client.status for client in finished]
+    return peak_rss() - baseline, sum(client.sent for client in finished) / clients, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--upload-mb", type=int, default=50)
+    args = parser.parse_args()
+
+    upload_size = args.upload_mb * 1024 * 1024
+    print(f"{args.clients} concurrent uploads of {args.upload_mb}MB, limit {MAX_FILE_SIZE // (1024 * 1024)}MB")
+    print(f"{'mode':>10} {'peak RSS +MB':>13} {'read per client MB':>19} {'seconds':>8}")
+    for mode in ("legacy", "streaming"):
+        with ProcessPoolExecutor(max_workers=1) as worker:
+            peak, read_per_client, elapsed = worker.submit(measure, f"/{mode}", args.clients, upload_size).result()
+        print(f"{mode:>10} {peak / 2 ** 20:13.1f} {read_per_client / 2 ** 20:19.1f} {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time until the client sees results, /api/analyze vs. the /api/ws/analyze events
+
+Sends the same label photo to the full app through /api/analyze and
+through one WebSocket connection, and reports when each WebSocket event
+arrives next to the single /api/analyze response. Baidu OCR and DeepSeek are
+replaced by stubs that sleep for their typical latency, so the numbers show
+when results become visible, not network time.
+
+Usage:
+    python benchmarks/bench_ws_progress.py [--rounds 3] [--ocr-seconds 1] [--llm-seconds 6]
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+
+OCR_SECONDS = 1.0
+LLM_SECONDS = 6.0
+
+
+class StubOCR:
+    """Stands in for BaiduOCR with a fixed latency"""
+
+    def extract_ingredients_text(self, image=None, use_accurate=True, image_base64=None):
+        time.sleep(OCR_SECONDS)
+        return "配料：小麦粉，白砂糖，植物油，食用盐，山梨酸钾"
+
+
+class StubDeepSeek:
+    """Stands in for DeepSeekAnalyzer with a fixed latency"""
+
+    def analyze_food_ingredients(self, text):
+        time.sleep(LLM_SECONDS)
+        return {"food_name": "饼干", "ingredients": [], "score": 60}
+
+
+def label_photo():
+    pixels = np.random.default_rng(0).integers(0, 256, (1200, 900, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def main():
+    global OCR_SECONDS, LLM_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--ocr-seconds", type=float, default=OCR_SECONDS)
+    parser.add_argument("--llm-seconds", type=float, default=LLM_SECONDS)
+    args = parser.parse_args()
+    OCR_SECONDS, LLM_SECONDS = args.ocr_seconds, args.llm_seconds
+
+    from fastapi.testclient import TestClient
+    from api import pipeline
+    from main import app
+    pipeline.BaiduOCR = StubOCR
+    pipeline.DeepSeekAnalyzer = StubDeepSeek
+    logging.disable(logging.WARNING)
+    client = TestClient(app)
+    photo = label_photo()
+
+    print(f"OCR {OCR_SECONDS}s + LLM {LLM_SECONDS}s, photo {len(photo) / 1024:.0f}KB, seconds after sending")
+    http = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        response = client.post("/api/analyze", files={"image": ("label.jpg", photo, "image/jpeg")})
+        assert response.status_code == 200, response.status_code
+        http.append(time.perf_counter() - start)
+    print(f"{'/api/analyze response':>24} {min(http):8.2f}")
+
+    arrivals = {}
+    # All rounds share one connection
+    with client.websocket_connect("/api/ws/analyze") as ws:
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            ws.send_bytes(photo)
+            while True:
+                event = ws.receive_json()
+                elapsed = time.perf_counter() - start
+                arrivals[event["event"]] = min(arrivals.get(event["event"], elapsed), elapsed)
+                if event["event"] in ("analysis", "error"):
+                    break
+    for name, elapsed in arrivals.items():
+        print(f"{'ws ' + name:>24} {elapsed:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
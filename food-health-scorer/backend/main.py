@@ -13,7 +13,18 @@ from typing import Callable
 from dotenv import load_dotenv
 from api.routes import router as api_router
 from api.routes_base64 import router as base64_router
-from utils.image_processor import ImageProcessor
+from api.routes_binary import router as binary_router
+from api.routes_jobs import router as jobs_router, job_queue
+from api.routes_ws import router as ws_router
+from utils.model_loader import BackgroundLoader, DISABLED, READY
+from utils.compression import CompressionMiddleware
+
+# 请求体为文件或图片数据的类型，不解码也不记录请求体
+BINARY_CONTENT_TYPES = ("multipart/form-data", "application/octet-stream", "image/")
+
+def is_binary_body(content_type: str) -> bool:
+    """请求体是否为二进制数据（文件上传或原始图片）"""
+    return content_type.split(";", 1)[0].strip().lower().startswith(BINARY_CONTENT_TYPES)
 
 # 自定义中间件类来记录请求和响应信息
 class APILoggingMiddleware(CORSMiddleware):
@@ -45,9 +56,9 @@ class APILoggingMiddleware(CORSMiddleware):
         if query_params:
             logger.debug(f"API查询参数 [{request_id}]: {query_params}")
         
-        # 记录请求体（如果不是文件上传）
+        # 记录请求体（如果不是文件上传或二进制图片，且开启了DEBUG日志）
         content_type = headers.get("content-type", "")
-        if method == "POST" and "multipart/form-data" not in content_type:
+        if method == "POST" and not is_binary_body(content_type) and logger.isEnabledFor(logging.DEBUG):
             try:
                 # 保存原始请求体
                 original_receive = receive
@@ -164,13 +175,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 全局初始化ImageProcessor
-image_processor = None
+# 按Accept-Encoding压缩较大的响应（安装brotli后优先br，否则gzip），WebSocket和流式响应不压缩
+app.add_middleware(CompressionMiddleware)
+
+def local_ocr_enabled() -> bool:
+    """本地OCR（EasyOCR/torch/cv2）为可选功能，默认关闭，线上路由只使用百度OCR"""
+    return os.getenv("ENABLE_LOCAL_OCR", "false").lower() in ("1", "true", "yes")
+
+def load_ocr_pool():
+    """启动本地OCR进程池，并等待每个worker加载并预热EasyOCR模型（在后台线程中运行）"""
+    # 延迟导入：EasyOCR/torch 只在worker进程中导入
+    from utils.ocr_pool import OCRProcessPool
+    pool = OCRProcessPool()
+    try:
+        pool.warm_up()
+    except Exception:
+        pool.shutdown(wait=False)
+        raise
+    return pool
+
+# 本地OCR引擎在后台加载，不阻塞服务启动
+ocr_loader = BackgroundLoader("local_ocr", load_ocr_pool)
+
+def get_ocr_pool():
+    """返回已就绪的OCRProcessPool，模型尚未就绪时返回None"""
+    return ocr_loader.get()
 
 @app.on_event("startup")
 async def startup_event():
-    global image_processor
-    
     # 加载环境变量
     try:
         # 尝试加载.env文件
@@ -197,19 +229,33 @@ async def startup_event():
     except Exception as e:
         logger.error(f"加载配置文件失败: {str(e)}")
     
-    # 初始化ImageProcessor
-    logger.info("Initializing ImageProcessor on startup...")
-    try:
-        image_processor = ImageProcessor()
-        logger.info("ImageProcessor initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize ImageProcessor: {str(e)}")
-        raise e
+    # 后台加载本地OCR引擎，不需要本地OCR的路由可立即提供服务
+    if local_ocr_enabled():
+        ocr_loader.start()
+        logger.info("Starting the local OCR pool in the background, see /ready for its status")
+    else:
+        ocr_loader.disable()
+        logger.info("本地OCR未启用 (ENABLE_LOCAL_OCR)，跳过EasyOCR模型加载")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    pool = get_ocr_pool()
+    if pool is not None:
+        logger.info(f"本地OCR进程池统计: {pool.statistics()}")
+        pool.shutdown(wait=False)
+    # 不再启动排队中的任务，正在运行的任务不等待
+    job_queue.shutdown(wait=False)
 
 # Include API routes
 app.include_router(api_router, prefix="/api")
 # Include Base64 API routes
 app.include_router(base64_router, prefix="/api")
+# Include raw binary image upload routes
+app.include_router(binary_router, prefix="/api")
+# Include asynchronous analysis job routes
+app.include_router(jobs_router, prefix="/api")
+# Include WebSocket analysis routes
+app.include_router(ws_router, prefix="/api")
 
 # Root endpoint
 @app.get("/")
@@ -221,5 +267,19 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness probe: 本地OCR模型加载状态 (loading/ready/failed/disabled)，就绪后附带进程池统计
+@app.get("/ready")
+async def readiness_check():
+    ocr_status = ocr_loader.status()
+    ready = ocr_status["status"] in (READY, DISABLED)
+    pool = get_ocr_pool()
+    if pool is not None:
+        # 所有worker合计的OCR识别次数、排队任务数和批处理情况
+        ocr_status["statistics"] = pool.statistics()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": ocr_status["status"], "components": {"local_ocr": ocr_status}}
+    )
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,9 +1,8 @@
-import requests
 import base64
 import json
 import os
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 import logging
 
 # 尝试导入配置文件
@@ -18,8 +17,58 @@ try:
 except ImportError:
     pass  # 如果没有配置文件，继续使用环境变量
 
+from utils.text_normalizer import normalize_text
+
 logger = logging.getLogger(__name__)
 
+# 百度OCR接口支持的图片格式，以及图片base64编码后的大小上限
+SUPPORTED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/bmp"}
+MAX_BASE64_SIZE = 10 * 1024 * 1024
+
+# base64中需要在表单中转义的字符（其余字符都是URL安全的）
+BASE64_FORM_ESCAPES = (("+", "%2B"), ("/", "%2F"), ("=", "%3D"))
+
+def image_form_body(image_base64: str) -> str:
+    """
+    构造image=<base64>的表单请求体
+    
+    requests对dict参数做urlencode时逐字节转义，几MB的base64需要上百毫秒；
+    base64只有+、/、=三个字符需要转义，用str.replace即可
+    """
+    for char, escaped in BASE64_FORM_ESCAPES:
+        image_base64 = image_base64.replace(char, escaped)
+    return "image=" + image_base64
+
+def prepare_image(image_data: bytes) -> bytes:
+    """
+    将百度OCR不支持的图片（格式不支持或base64后超出大小上限）转换为可识别的图片：
+    非JPEG/PNG/BMP格式转为JPEG，超出大小上限时压缩
+    
+    Args:
+        image_data: 图片数据
+        
+    Returns:
+        bytes: 可直接提交给百度OCR的图片数据
+    """
+    import io
+    from PIL import Image  # 只在需要转换时导入
+    from utils.image_compressor import compress_image
+    
+    img = Image.open(io.BytesIO(image_data))
+    if Image.MIME.get(img.format) not in SUPPORTED_IMAGE_TYPES:
+        buffer = io.BytesIO()
+        img.convert("RGB").save(buffer, format="JPEG", quality=90)
+        image_data = buffer.getvalue()
+        logger.info(f"图片格式{img.format}不受百度OCR支持，已转换为JPEG")
+    
+    max_size = MAX_BASE64_SIZE // 4 * 3
+    if len(image_data) > max_size:
+        compressed, success, error = compress_image(image_data, max_size)
+        if not success:
+            raise ValueError(error)
+        image_data = compressed
+    return image_data
+
 class BaiduOCR:
     """百度OCR服务类"""
     
@@ -37,6 +86,7 @@ class BaiduOCR:
     
     def get_access_token(self) -> str:
         """获取百度API访问令牌"""
+        import requests  # 首次调用时导入，加快服务启动
         if self.access_token:
             return self.access_token
             
@@ -63,10 +113,12 @@ class BaiduOCR:
             logger.error(f"获取百度OCR访问令牌失败: {e}")
             raise
     
-    def image_to_base64(self, image_path: str) -> str:
-        """将图片转换为base64编码"""
+    def image_to_base64(self, image: Union[str, bytes, bytearray]) -> str:
+        """将图片（文件路径或内存中的图片数据）转换为base64编码"""
         try:
-            with open(image_path, 'rb') as f:
+            if isinstance(image, (bytes, bytearray, memoryview)):
+                return base64.b64encode(image).decode('ascii')
+            with open(image, 'rb') as f:
                 image_data = f.read()
                 base64_data = base64.b64encode(image_data).decode('utf-8')
                 return base64_data
@@ -74,25 +126,33 @@ class BaiduOCR:
             logger.error(f"图片转base64失败: {e}")
             raise
     
-    def extract_text_general(self, image_path: str) -> Dict[str, Any]:
-        """使用百度通用文字识别API提取文本"""
+    @staticmethod
+    def _describe(image: Union[str, bytes, bytearray]) -> str:
+        """日志中的图片描述：文件路径或内存数据大小"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return f"内存数据 {len(image)} bytes"
+        return image
+    
+    def extract_text_general(self, image: Union[str, bytes, bytearray, None] = None,
+                            image_base64: Optional[str] = None) -> Dict[str, Any]:
+        """使用百度通用文字识别API提取文本（image为文件路径或图片数据；已有base64时传image_base64，原样提交）"""
+        import requests  # 首次调用时导入，加快服务启动
         try:
-            logger.info(f"开始调用百度通用OCR接口，图片路径: {image_path}")
+            logger.info(f"开始调用百度通用OCR接口，图片: {self._describe(image) if image_base64 is None else 'base64数据'}")
             access_token = self.get_access_token()
             url = f"https://aip.baidubce.com/rest/2.0/ocr/v1/general_basic?access_token={access_token}"
             
-            # 将图片转换为base64
-            image_base64 = self.image_to_base64(image_path)
-            logger.info(f"图片转换为base64成功，长度: {len(image_base64)}字符")
+            # 将图片转换为base64（客户端已提供base64时直接使用）
+            if image_base64 is None:
+                image_base64 = self.image_to_base64(image)
+                logger.info(f"图片转换为base64成功，长度: {len(image_base64)}字符")
             
             headers = {
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'Accept': 'application/json'
             }
             
-            data = {
-                'image': image_base64
-            }
+            data = image_form_body(image_base64)
             
             logger.info(f"发送请求到百度通用OCR接口: {url}")
             response = requests.post(url, headers=headers, data=data)
@@ -124,7 +184,7 @@ class BaiduOCR:
                 logger.info(f"识别文本预览: {preview}")
             
             return {
-                "text": extracted_text.strip(),
+                "text": normalize_text(extracted_text).strip(),
                 "raw_result": result,
                 "words_count": words_count
             }
@@ -136,25 +196,26 @@ class BaiduOCR:
             logger.error(f"百度通用OCR文字识别失败: {e}")
             raise
     
-    def extract_text_accurate(self, image_path: str) -> Dict[str, Any]:
-        """使用百度高精度文字识别API提取文本"""
+    def extract_text_accurate(self, image: Union[str, bytes, bytearray, None] = None,
+                             image_base64: Optional[str] = None) -> Dict[str, Any]:
+        """使用百度高精度文字识别API提取文本（image为文件路径或图片数据；已有base64时传image_base64，原样提交）"""
+        import requests  # 首次调用时导入，加快服务启动
         try:
-            logger.info(f"开始调用百度高精度OCR接口，图片路径: {image_path}")
+            logger.info(f"开始调用百度高精度OCR接口，图片: {self._describe(image) if image_base64 is None else 'base64数据'}")
             access_token = self.get_access_token()
             url = f"https://aip.baidubce.com/rest/2.0/ocr/v1/accurate_basic?access_token={access_token}"
             
-            # 将图片转换为base64
-            image_base64 = self.image_to_base64(image_path)
-            logger.info(f"图片转换为base64成功，长度: {len(image_base64)}字符")
+            # 将图片转换为base64（客户端已提供base64时直接使用）
+            if image_base64 is None:
+                image_base64 = self.image_to_base64(image)
+                logger.info(f"图片转换为base64成功，长度: {len(image_base64)}字符")
             
             headers = {
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'Accept': 'application/json'
             }
             
-            data = {
-                'image': image_base64
-            }
+            data = image_form_body(image_base64)
             
             logger.info(f"发送请求到百度高精度OCR接口: {url}")
             response = requests.post(url, headers=headers, data=data)
@@ -186,7 +247,7 @@ class BaiduOCR:
                 logger.info(f"识别文本预览: {preview}")
             
             return {
-                "text": extracted_text.strip(),
+                "text": normalize_text(extracted_text).strip(),
                 "raw_result": result,
                 "words_count": words_count
             }
@@ -198,12 +259,14 @@ class BaiduOCR:
             logger.error(f"百度高精度OCR文字识别失败: {e}")
             raise
     
-    def extract_ingredients_text(self, image_path: str, use_accurate: bool = True) -> str:
+    def extract_ingredients_text(self, image: Union[str, bytes, bytearray, None] = None, use_accurate: bool = True,
+                                 image_base64: Optional[str] = None) -> str:
         """提取食品配料表文字（主要接口）
         
         Args:
-            image_path: 图片文件路径
+            image: 图片文件路径，或内存中的图片数据（无需写临时文件）
             use_accurate: 是否使用高精度OCR接口，默认为True
+            image_base64: 已编码的base64图片（不含data URL前缀），提供时不再读取和编码image
             
         Returns:
             str: 提取的文字内容
@@ -211,10 +274,10 @@ class BaiduOCR:
         try:
             logger.info(f"OCR识别模式: {'高精度' if use_accurate else '通用'}")
             if use_accurate:
-                result = self.extract_text_accurate(image_path)
+                result = self.extract_text_accurate(image, image_base64)
                 logger.info("使用百度高精度OCR接口提取文字")
             else:
-                result = self.extract_text_general(image_path)
+                result = self.extract_text_general(image, image_base64)
                 logger.info("使用百度通用OCR接口提取文字")
             
             return result["text"]
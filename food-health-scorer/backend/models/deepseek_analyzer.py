@@ -3,7 +3,6 @@ import os
 import re
 from typing import Dict, Any, List
 import logging
-from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +34,71 @@ class DeepSeekAnalyzer:
             # 返回默认结果而不是抛出异常
             return self._get_default_result()
     
+    def analyze_new_ingredients(self, ingredients: List[str], context: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        只评估新增或被移除的配料（增量分析），不重新分析整个配料表
+        
+        Args:
+            ingredients: 需要评估的新增或被移除的配料
+            context: 当前完整配料表，仅作为判断参考
+            
+        Returns:
+            dict: 配料名称 -> {"score": -10到10的健康影响分, "description": 说明}；
+                  调用或解析失败时返回空字典
+        """
+        if not ingredients:
+            return {}
+        
+        prompt = self._build_delta_prompt(ingredients, context)
+        
+        try:
+            response = self._call_deepseek_api(prompt, max_tokens=800)
+            return self._parse_delta_result(response, ingredients)
+        except Exception as e:
+            logger.error(f"DeepSeek增量分析失败: {e}")
+            return {}
+    
+    def _build_delta_prompt(self, ingredients: List[str], context: List[str]) -> str:
+        """构建增量分析提示词"""
+        return f"""你是一个专业的食品营养分析师。用户修改了一份配料表，请只评估下面这些新增或被移除的配料本身对健康的影响。
+
+完整配料表（仅供参考）：
+{"、".join(context)}
+
+需要评估的配料：
+{json.dumps(ingredients, ensure_ascii=False)}
+
+请按照以下JSON格式返回，score为-10到10之间的整数（正数有益健康，负数不利于健康，0为中性）：
+{{
+    "ingredients": [
+        {{"name": "配料名称", "score": -5, "description": "一句话说明原因"}}
+    ]
+}}
+
+请确保name与给出的配料名称完全一致，并返回有效的JSON格式。"""
+    
+    def _parse_delta_result(self, response_content: str, ingredients: List[str]) -> Dict[str, Dict[str, Any]]:
+        """解析增量分析结果，只保留请求过的配料"""
+        content = response_content.strip()
+        start_idx = content.find('{')
+        end_idx = content.rfind('}') + 1
+        if start_idx == -1 or end_idx <= start_idx:
+            raise ValueError("未找到有效的JSON格式")
+        
+        requested = set(ingredients)
+        results = {}
+        for item in json.loads(content[start_idx:end_idx]).get('ingredients', []):
+            if not isinstance(item, dict) or item.get('name') not in requested:
+                continue
+            score = item.get('score')
+            if not isinstance(score, (int, float)):
+                continue
+            results[item['name']] = {
+                "score": max(-10, min(10, int(score))),
+                "description": str(item.get('description') or "")
+            }
+        return results
+    
     def _build_analysis_prompt(self, extracted_text: str) -> str:
         """构建分析提示词"""
         prompt = f"""你是一个专业的食品营养分析师。请分析以下食品包装上的文字信息，重点关注配料表，并给出详细的健康评估。
@@ -81,8 +145,10 @@ class DeepSeekAnalyzer:
 
         return prompt
     
-    def _call_deepseek_api(self, prompt: str) -> str:
+    def _call_deepseek_api(self, prompt: str, max_tokens: int = 2000) -> str:
         """调用DeepSeek API，使用OpenAI客户端库"""
+        from openai import OpenAI  # 首次调用时导入，加快服务启动
+        
         try:
             # 创建OpenAI客户端，配置为使用DeepSeek API
             client = OpenAI(
@@ -97,7 +163,7 @@ class DeepSeekAnalyzer:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=max_tokens
             )
             
             # 提取内容
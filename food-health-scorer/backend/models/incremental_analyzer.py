@@ -0,0 +1,246 @@
+"""
+Session-scoped incremental analysis for the manual text input flow
+
+Users correct OCR mistakes one ingredient at a time and resubmit the whole
+text. The first submission of a session gets a full LLM analysis, which
+becomes the session's base. Later submissions are diffed against that base:
+entries the knowledge base knows move the score by the difference between
+the local engine's scores of the new and the base list (both on the same
+0-100 scale as the LLM score), and only added or removed ingredients the
+knowledge base does not know are sent to the LLM, in one small delta
+request. Edits that only touch known ingredients never leave the process.
+"""
+
+import copy
+import logging
+import os
+import threading
+import uuid
+from collections import Counter
+from typing import Callable, List, Optional
+
+from models.food_analyzer import FoodAnalyzer
+from utils.ingredient_parser import extract_ingredients
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Idle sessions are forgotten after this many seconds
+SESSION_TTL = float(os.getenv("ANALYSIS_SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.getenv("ANALYSIS_MAX_SESSIONS", "10000"))
+
+# Share of the ingredient list that may differ from the base before the
+# incremental estimate is abandoned for a new full analysis
+REANALYSIS_RATIO = 0.5
+
+
+class AnalysisSession:
+    """Base analysis of a session plus the ingredient impacts scored since"""
+
+    def __init__(self, session_id: str, base_result: dict, base_ingredients: List[str],
+                 base_local_score: int):
+        self.session_id = session_id
+        self.base_result = base_result
+        self.base_counts = Counter(base_ingredients)
+        self.ingredients = list(base_ingredients)
+        # FoodAnalyzer score of the base list, the reference for local deltas
+        self.base_local_score = base_local_score
+        # ingredient name -> {"score", "description", "source"}
+        self.impacts = {}
+        self.lock = threading.Lock()
+
+
+class IncrementalTextAnalyzer:
+    """
+    Incremental re-scoring of resubmitted ingredient texts
+    """
+
+    def __init__(self, food_analyzer: Optional[FoodAnalyzer] = None,
+                 llm_factory: Optional[Callable] = None, sessions: Optional[TTLCache] = None):
+        """
+        Args:
+            food_analyzer (FoodAnalyzer): Local engine used for known ingredients
+            llm_factory (callable): Returns an object with analyze_food_ingredients()
+                and analyze_new_ingredients(), DeepSeekAnalyzer by default
+            sessions (TTLCache): Session store
+        """
+        if llm_factory is None:
+            from models.deepseek_analyzer import DeepSeekAnalyzer
+            llm_factory = DeepSeekAnalyzer
+        self.food_analyzer = food_analyzer or FoodAnalyzer()
+        self.llm_factory = llm_factory
+        self.sessions = sessions if sessions is not None else TTLCache(SESSION_TTL, MAX_SESSIONS)
+
+    def analyze(self, text: str, session_id: Optional[str] = None) -> dict:
+        """
+        Analyze a (re)submitted ingredient text
+
+        Args:
+            text (str): Full ingredient text as entered by the user
+            session_id (str): Session returned by an earlier call, if any
+
+        Returns:
+            dict: Analysis result in the DeepSeekAnalyzer format, plus
+            session_id, incremental, changes and llm_calls
+        """
+        ingredients = extract_ingredients(text)
+        session = self.sessions.get(session_id) if session_id else None
+
+        if session is None:
+            # Unknown or expired ids are never adopted: the new session gets its own id
+            return self._full_analysis(text, ingredients, None)
+
+        with session.lock:
+            if not self._needs_full_analysis(session, ingredients):
+                result = self._incremental_analysis(session, ingredients)
+                # Refresh the expiry of an active session
+                self.sessions.set(session.session_id, session)
+                return result
+
+        return self._full_analysis(text, ingredients, session.session_id)
+
+    def _needs_full_analysis(self, session: AnalysisSession, ingredients: List[str]) -> bool:
+        if not ingredients or not session.base_counts:
+            return True
+        current = Counter(ingredients)
+        changed = sum(((current - session.base_counts) + (session.base_counts - current)).values())
+        return changed > REANALYSIS_RATIO * max(sum(session.base_counts.values()), len(ingredients))
+
+    def _full_analysis(self, text: str, ingredients: List[str], session_id: Optional[str]) -> dict:
+        """Analyze the whole text with the LLM and make it the session's base"""
+        result = self.llm_factory().analyze_food_ingredients(text)
+
+        session = AnalysisSession(
+            session_id or uuid.uuid4().hex, copy.deepcopy(result), ingredients, self._local_score(ingredients)
+        )
+        if result.get("ingredients"):
+            self.sessions.set(session.session_id, session)
+            logger.info(f"Session {session.session_id}: full analysis of {len(ingredients)} ingredients")
+        else:
+            # A failed analysis (DeepSeekAnalyzer's default result) is no base to build on
+            logger.warning(f"Session {session.session_id}: analysis returned no ingredients, not kept")
+
+        result.update({
+            "session_id": session.session_id,
+            "incremental": False,
+            "changes": {"added": [], "removed": []},
+            "llm_calls": 1
+        })
+        return result
+
+    def _local_score(self, ingredients: List[str]) -> int:
+        """Score of an ingredient list from the local engine, on its 0-100 scale"""
+        return self.food_analyzer.analyze(ingredients)["score"]
+
+    def _local_impact(self, snapshot, name: str) -> Optional[dict]:
+        """
+        Describe an ingredient from the knowledge base, or None if it is unknown there
+
+        Only exact lookups count: an approximate match could turn a real
+        ingredient the database lacks into a different entry, and the user
+        typed this name on purpose.
+        """
+        if snapshot.lookup(name) == (None, False):
+            return None
+        info = self.food_analyzer.get_ingredient_info(name)
+        return {"score": info["score"], "description": info["description"], "source": "local"}
+
+    def _incremental_analysis(self, session: AnalysisSession, ingredients: List[str]) -> dict:
+        """Re-score only the entries that differ from the session's base"""
+        current = Counter(ingredients)
+        previous = Counter(session.ingredients)
+        added = current - session.base_counts
+        removed = session.base_counts - current
+
+        # Score entries the session has not seen yet: locally when the
+        # knowledge base knows them, otherwise with one LLM delta request.
+        # Removed names are scored too, so that dropping an ingredient only
+        # the LLM knew (an additive the base analysis penalised) moves the score
+        snapshot = self.food_analyzer.database.current()
+        unknown = []
+        for name in list(added) + list(removed):
+            if name in session.impacts:
+                continue
+            impact = self._local_impact(snapshot, name)
+            if impact is not None:
+                session.impacts[name] = impact
+            else:
+                unknown.append(name)
+
+        llm_calls = 0
+        if unknown:
+            llm_calls = 1
+            try:
+                impacts = self.llm_factory().analyze_new_ingredients(unknown, ingredients)
+            except Exception as e:
+                logger.error(f"Delta analysis of {len(unknown)} changed ingredients failed: {e}")
+                impacts = {}
+            for name, impact in impacts.items():
+                session.impacts[name] = {**impact, "source": "llm"}
+
+        def source_of(name):
+            return session.impacts.get(name, {}).get("source")
+
+        # Knowledge-base changes: the local engine scores the current list
+        # (without the LLM-scored names) against the base list, so the delta
+        # is on the 0-100 scale of the base score rather than a sum of
+        # per-ingredient points
+        local_delta = 0
+        if any(source_of(name) == "local" for name in list(added) + list(removed)):
+            local_ingredients = [name for name in ingredients if source_of(name) != "llm"]
+            local_delta = self._local_score(local_ingredients) - session.base_local_score
+
+        # LLM-scored additions carry their own -10..10 impact and removals
+        # take theirs back; unscored entries (a failed delta request) count
+        # as neutral
+        llm_delta = sum(
+            session.impacts[name]["score"] * count
+            for name, count in added.items() if source_of(name) == "llm"
+        ) - sum(
+            session.impacts[name]["score"] * count
+            for name, count in removed.items() if source_of(name) == "llm"
+        )
+
+        base = session.base_result
+        score = max(0, min(100, int(round(base.get("score", 50) + local_delta + llm_delta))))
+
+        health_points = list(base.get("health_points", []))
+        for name in added:
+            impact = session.impacts.get(name)
+            if impact is None:
+                continue
+            if impact["source"] == "llm":
+                health_points.append(f"新增配料 {name}：{impact['description']} ({impact['score']:+d}分)")
+            else:
+                health_points.append(f"新增配料 {name}：{impact['description']}")
+        for name in removed:
+            impact = session.impacts.get(name)
+            if impact is None:
+                continue
+            if impact["source"] == "llm":
+                health_points.append(f"移除配料 {name}：{impact['description']} ({-impact['score']:+d}分)")
+            else:
+                health_points.append(f"移除配料 {name}")
+        if local_delta:
+            health_points.append(f"本地知识库评估的配料变化 ({local_delta:+d}分)")
+
+        session.ingredients = list(ingredients)
+        logger.info(
+            f"Session {session.session_id}: incremental update, {sum(added.values())} added, "
+            f"{sum(removed.values())} removed, {llm_calls} LLM calls"
+        )
+
+        result = copy.deepcopy(base)
+        result.update({
+            "ingredients": list(ingredients),
+            "score": score,
+            "health_points": health_points,
+            "session_id": session.session_id,
+            "incremental": True,
+            "changes": {
+                "added": list((current - previous).elements()),
+                "removed": list((previous - current).elements())
+            },
+            "llm_calls": llm_calls
+        })
+        return result
@@ -0,0 +1,576 @@
+"""
+Compiled, memory-mapped ingredient knowledge base
+
+The editable source of the knowledge base is a JSON document
+(data/ingredients.json). It is compiled into a compact binary table with a
+shared UTF-8 string pool, which every worker process memory-maps read-only,
+so the operating system keeps a single copy of the data in the page cache.
+
+The binary file is replaced atomically (write to a temporary file, then
+os.replace) and IngredientDatabase notices the new file on a later lookup,
+so a new database can be shipped without restarting the service.
+
+Usage:
+    python -m models.ingredient_db compile data/ingredients.json data/ingredients.bin
+"""
+
+import functools
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Tuple
+
+from models.ingredient_matcher import OCR_CONFUSABLE_GLYPHS, FuzzyIndex, IngredientMatcher, SubstringIndex
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_SOURCE_PATH = os.path.join(DATA_DIR, "ingredients.json")
+DEFAULT_DATABASE_PATH = os.path.join(DATA_DIR, "ingredients.bin")
+KNOWN_WORDS_PATH = os.path.join(DATA_DIR, "known_words.txt")
+
+# Ingredient categories used by the distribution rules, checked in this order;
+# an entry belongs to the first category with a term contained in its name
+INGREDIENT_CATEGORIES = (
+    ("sugar", ("糖", "白砂糖", "蔗糖", "葡萄糖", "果糖", "玉米糖浆", "高果糖玉米糖浆", "转化糖浆")),
+    ("unhealthy_fat", ("反式脂肪", "氢化植物油", "部分氢化植物油", "人造奶油", "起酥油")),
+    ("artificial_additive", ("人工色素", "人工香料", "甜味剂", "甜蜜素", "安赛蜜", "糖精")),
+    ("whole_food", ("全麦", "全谷物", "燕麦", "糙米", "藜麦", "蔬菜", "水果", "坚果", "豆类")),
+)
+
+# Binary layout (little-endian):
+#   header            MAGIC, version, ingredient count, additive count, alias count,
+#                     ingredient records offset, additive records offset,
+#                     alias records offset, pool offset
+#   ingredient record name offset, name length, reason offset, reason length,
+#                     score (int16), category code (int8, -1 = none), padding
+#   additive record   name offset, name length, reason offset, reason length
+#   alias record      alias offset, alias length, canonical name offset, canonical name length
+#   string pool       UTF-8 strings, offsets relative to the pool start
+MAGIC = b"FHSIDB\x00\x00"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIIIIIII")
+INGREDIENT_RECORD = struct.Struct("<IIIIhbx")
+ADDITIVE_RECORD = struct.Struct("<IIII")
+ALIAS_RECORD = struct.Struct("<IIII")
+
+# Memoised free-form lookups per database generation
+LOOKUP_CACHE_SIZE = int(os.getenv("INGREDIENT_LOOKUP_CACHE_SIZE", "4096"))
+
+# Edit distance tolerated when resolving unrecognised (e.g. OCR-garbled) names; 0 disables
+FUZZY_MAX_DISTANCE = int(os.getenv("INGREDIENT_FUZZY_DISTANCE", "1"))
+
+# Shorter names only match through OCR look-alike glyphs, never through free edits
+FUZZY_MIN_LENGTH = 4
+
+
+@functools.lru_cache(maxsize=None)
+def load_known_words(path: str = KNOWN_WORDS_PATH) -> frozenset:
+    """
+    Read the real ingredient words that are not in the database
+
+    Fuzzy matching skips them, so a correctly spelled 柠檬汁 or 葡萄干 is
+    not rewritten into the nearest database entry (柠檬黄, 葡萄糖).
+    One word per line; blank lines and lines starting with # are ignored.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    except FileNotFoundError:
+        logger.warning(f"Known words list not found: {path}")
+        return frozenset()
+
+
+def categorize(name: str) -> Optional[str]:
+    """Return the category of an ingredient name, or None"""
+    for category, terms in INGREDIENT_CATEGORIES:
+        if any(term in name for term in terms):
+            return category
+    return None
+
+
+class _StringPool:
+    """Deduplicating UTF-8 string pool used while compiling"""
+
+    def __init__(self):
+        self._offsets = {}
+        self._chunks = []
+        self._size = 0
+
+    def add(self, text: str) -> Tuple[int, int]:
+        data = text.encode("utf-8")
+        offset = self._offsets.get(data)
+        if offset is None:
+            offset = self._size
+            self._offsets[data] = offset
+            self._chunks.append(data)
+            self._size += len(data)
+        return offset, len(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+def compile_database(source_path: str, target_path: str) -> str:
+    """
+    Compile the JSON knowledge base into the binary table format
+
+    The target is written to a temporary file next to it and moved into
+    place with os.replace, so readers never see a partially written file.
+    Ingredient and additive entries may list "aliases" (E/INS codes,
+    English names, spelling variants); each alias is stored with the name
+    of the entry it belongs to.
+
+    Args:
+        source_path (str): Path to the JSON source
+        target_path (str): Path of the binary database to write
+
+    Returns:
+        str: target_path
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        source = json.load(f)
+
+    category_codes = {category: code for code, (category, _) in enumerate(INGREDIENT_CATEGORIES)}
+    pool = _StringPool()
+    ingredient_records = []
+    additive_records = []
+    alias_records = []
+    alias_names = {}
+
+    def add_aliases(entry, name):
+        for alias in entry.get("aliases", []):
+            alias = alias.strip()
+            if not alias:
+                raise ValueError(f"Empty alias for {name}")
+            if alias_names.setdefault(alias, name) != name:
+                raise ValueError(f"Alias {alias!r} used for both {alias_names[alias]} and {name}")
+            if (alias, name) not in alias_records:
+                alias_records.append((alias, name))
+
+    seen = set()
+    for entry in source.get("ingredients", []):
+        name = entry["name"].strip()
+        if not name or name in seen:
+            raise ValueError(f"Empty or duplicate ingredient name: {entry['name']!r}")
+        seen.add(name)
+        score = int(entry["score"])
+        if not -32768 <= score <= 32767:
+            raise ValueError(f"Score out of range for {name}: {score}")
+        ingredient_records.append(INGREDIENT_RECORD.pack(
+            *pool.add(name), *pool.add(entry.get("reason", "")),
+            score, category_codes.get(categorize(name), -1)
+        ))
+        add_aliases(entry, name)
+
+    seen = set()
+    for entry in source.get("additives", []):
+        name = entry["name"].strip()
+        if not name or name in seen:
+            raise ValueError(f"Empty or duplicate additive name: {entry['name']!r}")
+        seen.add(name)
+        additive_records.append(ADDITIVE_RECORD.pack(*pool.add(name), *pool.add(entry.get("reason", ""))))
+        add_aliases(entry, name)
+
+    alias_records = [ALIAS_RECORD.pack(*pool.add(alias), *pool.add(name)) for alias, name in alias_records]
+
+    ingredients_offset = HEADER.size
+    additives_offset = ingredients_offset + len(ingredient_records) * INGREDIENT_RECORD.size
+    aliases_offset = additives_offset + len(additive_records) * ADDITIVE_RECORD.size
+    pool_offset = aliases_offset + len(alias_records) * ALIAS_RECORD.size
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(ingredient_records), len(additive_records), len(alias_records),
+        ingredients_offset, additives_offset, aliases_offset, pool_offset
+    )
+
+    target_dir = os.path.dirname(os.path.abspath(target_path))
+    os.makedirs(target_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".ingredients-", suffix=".tmp", dir=target_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(b"".join(ingredient_records))
+            f.write(b"".join(additive_records))
+            f.write(b"".join(alias_records))
+            f.write(pool.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    logger.info(
+        f"Compiled ingredient database {target_path}: "
+        f"{len(ingredient_records)} ingredients, {len(additive_records)} additives, {len(alias_records)} aliases"
+    )
+    return target_path
+
+
+def read_format_version(path: str) -> Optional[int]:
+    """Return the format version of a binary database, or None if it is not one"""
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + 4)
+    if len(prefix) < len(MAGIC) + 4 or prefix[:len(MAGIC)] != MAGIC:
+        return None
+    return struct.unpack_from("<I", prefix, len(MAGIC))[0]
+
+
+class IngredientTable:
+    """
+    Read-only view over one memory-mapped binary database file
+
+    Records and strings stay in the mapped file, shared between processes
+    through the page cache, and are decoded on access. The table itself
+    holds no per-entry Python objects; the lookup structures built from its
+    names (see IngredientSnapshot) do, and are private to each process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if read_format_version(path) != FORMAT_VERSION:
+            raise ValueError(f"Not an ingredient database (version {FORMAT_VERSION}): {path}")
+        (_, _, self.ingredient_count, self.additive_count, self.alias_count,
+         self._ingredients_offset, self._additives_offset, self._aliases_offset,
+         self._pool_offset) = HEADER.unpack_from(self._buffer, 0)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._pool_offset + offset
+        return self._buffer[start:start + length].decode("utf-8")
+
+    def ingredient(self, rank: int) -> Tuple[str, int, str, Optional[str]]:
+        """Return (name, score, reason, category) of an ingredient"""
+        name_offset, name_length, reason_offset, reason_length, score, category = INGREDIENT_RECORD.unpack_from(
+            self._buffer, self._ingredients_offset + rank * INGREDIENT_RECORD.size
+        )
+        return (
+            self._string(name_offset, name_length),
+            score,
+            self._string(reason_offset, reason_length),
+            INGREDIENT_CATEGORIES[category][0] if category >= 0 else None
+        )
+
+    def ingredient_score(self, rank: int) -> int:
+        """Return the score of an ingredient without decoding its strings"""
+        return INGREDIENT_RECORD.unpack_from(
+            self._buffer, self._ingredients_offset + rank * INGREDIENT_RECORD.size
+        )[4]
+
+    def ingredient_reason(self, rank: int) -> str:
+        """Return the scientific reasoning of an ingredient"""
+        _, _, reason_offset, reason_length, _, _ = INGREDIENT_RECORD.unpack_from(
+            self._buffer, self._ingredients_offset + rank * INGREDIENT_RECORD.size
+        )
+        return self._string(reason_offset, reason_length)
+
+    def additive(self, rank: int) -> Tuple[str, str]:
+        """Return (name, reason) of a concerning additive"""
+        name_offset, name_length, reason_offset, reason_length = ADDITIVE_RECORD.unpack_from(
+            self._buffer, self._additives_offset + rank * ADDITIVE_RECORD.size
+        )
+        return self._string(name_offset, name_length), self._string(reason_offset, reason_length)
+
+    def ingredient_names(self) -> Iterator[str]:
+        """Iterate over ingredient names in rank order"""
+        records = self._buffer[self._ingredients_offset:self._additives_offset]
+        for name_offset, name_length, _, _, _, _ in INGREDIENT_RECORD.iter_unpack(records):
+            yield self._string(name_offset, name_length)
+
+    def additive_names(self) -> Iterator[str]:
+        """Iterate over additive names in rank order"""
+        records = self._buffer[self._additives_offset:self._aliases_offset]
+        for name_offset, name_length, _, _ in ADDITIVE_RECORD.iter_unpack(records):
+            yield self._string(name_offset, name_length)
+
+    def aliases(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over (alias, canonical name) pairs"""
+        records = self._buffer[self._aliases_offset:self._pool_offset]
+        for alias_offset, alias_length, name_offset, name_length in ALIAS_RECORD.iter_unpack(records):
+            yield self._string(alias_offset, alias_length), self._string(name_offset, name_length)
+
+
+class IngredientSnapshot:
+    """
+    An immutable generation of the knowledge base: the mapped table plus
+    the matcher compiled from it. Lookups hold on to one snapshot for their
+    whole duration, so a reload never mixes two database versions.
+
+    Only the table is shared memory. The Aho-Corasick matcher, the suffix
+    automaton, the fuzzy indexes and the exact-lookup dict are ordinary
+    Python objects built in every process that loads the database, OCR
+    pool workers included: about 0.7 MB for the shipped knowledge base and
+    about 60 MB at 20,000 entries (benchmarks/bench_ingredient_db.py).
+
+    The lookup caches wrap module functions over those structures rather
+    than bound methods, so a snapshot is in no reference cycle and its
+    mapping is closed as soon as the last reference to it goes away.
+    """
+
+    def __init__(self, table: IngredientTable):
+        self.table = table
+        self.loaded_at = time.time()
+
+        ingredient_names = list(table.ingredient_names())
+        additive_names = list(table.additive_names())
+        self.ingredient_ranks = {name: rank for rank, name in enumerate(ingredient_names)}
+        self.additive_ranks = {name: rank for rank, name in enumerate(additive_names)}
+        self.aliases = dict(table.aliases())
+        self.matcher = IngredientMatcher(ingredient_names, additive_names, self.aliases.items())
+        self.substring_index = SubstringIndex(ingredient_names)
+        
+        # Approximate indexes, consulted only for names the exact matcher misses
+        self.fuzzy_ingredients = None
+        self.fuzzy_additives = None
+        self.fuzzy_match = None
+        if FUZZY_MAX_DISTANCE > 0:
+            known_words = load_known_words()
+            self.fuzzy_ingredients = FuzzyIndex(ingredient_names, FUZZY_MAX_DISTANCE, FUZZY_MIN_LENGTH,
+                                                OCR_CONFUSABLE_GLYPHS, known_words)
+            self.fuzzy_additives = FuzzyIndex(additive_names, FUZZY_MAX_DISTANCE, FUZZY_MIN_LENGTH,
+                                              OCR_CONFUSABLE_GLYPHS, known_words)
+            self.fuzzy_match = functools.lru_cache(maxsize=LOOKUP_CACHE_SIZE)(
+                functools.partial(_fuzzy_match, self.fuzzy_ingredients, self.fuzzy_additives)
+            )
+        
+        # Exact-name answers of lookup(), resolved once per generation
+        self._exact = {name: self._resolve(name) for name in ingredient_names}
+        self._exact.update((name, self._resolve(name)) for name in additive_names if name not in self._exact)
+        self._exact.update((alias, self._resolve(alias)) for alias in self.aliases if alias not in self._exact)
+        
+        # Memoised lookups; the cache is dropped together with the snapshot
+        self.lookup = functools.lru_cache(maxsize=LOOKUP_CACHE_SIZE)(
+            functools.partial(_lookup, self._exact, self.matcher, self.substring_index)
+        )
+    
+    def match(self, ingredient: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Find the ingredient and additive ranks for one ingredient string
+        
+        Exact substring matches come first. Only when neither table matches
+        is the name looked up approximately, so OCR near-misses such as
+        白沙糖 or 山梨酸钟 still resolve to their database entries. Real
+        words from load_known_words() are never looked up approximately,
+        and three-character names only match through look-alike glyphs.
+        
+        Returns:
+            Tuple[Optional[int], Optional[int]]: Same as IngredientMatcher.match
+        """
+        ranks = self.matcher.match(ingredient)
+        if ranks == (None, None) and self.fuzzy_match is not None:
+            return self.fuzzy_match(ingredient)
+        return ranks
+    
+    def _resolve(self, ingredient: str) -> Tuple[Optional[int], bool]:
+        return _resolve(self.matcher, self.substring_index, ingredient)
+
+
+def _fuzzy_match(fuzzy_ingredients: FuzzyIndex, fuzzy_additives: FuzzyIndex,
+                 ingredient: str) -> Tuple[Optional[int], Optional[int]]:
+    ingredient_hit = fuzzy_ingredients.search(ingredient)
+    additive_hit = fuzzy_additives.search(ingredient)
+    return (
+        ingredient_hit[0] if ingredient_hit else None,
+        additive_hit[0] if additive_hit else None,
+    )
+
+
+def _resolve(matcher: IngredientMatcher, substring_index: SubstringIndex,
+             ingredient: str) -> Tuple[Optional[int], bool]:
+    # First entry (in database order) that is contained in the name or contains it
+    contained_rank, additive_rank = matcher.match(ingredient)
+    containing_rank = substring_index.first_containing(ingredient)
+    candidates = [rank for rank in (contained_rank, containing_rank) if rank is not None]
+    return (min(candidates) if candidates else None), additive_rank is not None
+
+
+def _lookup(exact: Dict[str, Tuple[Optional[int], bool]], matcher: IngredientMatcher,
+            substring_index: SubstringIndex, ingredient: str) -> Tuple[Optional[int], bool]:
+    """
+    Resolve a free-form ingredient name (IngredientSnapshot.lookup)
+    
+    Returns:
+        Tuple[Optional[int], bool]: Rank of the first database ingredient
+        that is contained in the name or contains it (None if there is
+        none), and whether the name contains a concerning additive
+    """
+    hit = exact.get(ingredient)
+    if hit is not None:
+        return hit
+    return _resolve(matcher, substring_index, ingredient)
+
+
+class _IngredientMapping(Mapping):
+    """Read-only dict view: ingredient name -> (score, reason)"""
+
+    def __init__(self, snapshot: IngredientSnapshot, scores_only: bool = False):
+        self._snapshot = snapshot
+        self._scores_only = scores_only
+
+    def __getitem__(self, name):
+        rank = self._snapshot.ingredient_ranks[name]
+        if self._scores_only:
+            return self._snapshot.table.ingredient_score(rank)
+        _, score, reason, _ = self._snapshot.table.ingredient(rank)
+        return score, reason
+
+    def __iter__(self):
+        return iter(self._snapshot.ingredient_ranks)
+
+    def __len__(self):
+        return len(self._snapshot.ingredient_ranks)
+
+
+class _AdditiveMapping(Mapping):
+    """Read-only dict view: additive name -> reason"""
+
+    def __init__(self, snapshot: IngredientSnapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, name):
+        return self._snapshot.table.additive(self._snapshot.additive_ranks[name])[1]
+
+    def __iter__(self):
+        return iter(self._snapshot.additive_ranks)
+
+    def __len__(self):
+        return len(self._snapshot.additive_ranks)
+
+
+class IngredientDatabase:
+    """
+    Hot-reloadable handle on the compiled knowledge base
+
+    current() returns the live IngredientSnapshot. At most once every
+    check_interval seconds it stats the database (and its JSON source) and,
+    if either changed, loads a new snapshot and swaps it in with a single
+    reference assignment. In-flight lookups keep using the old snapshot,
+    whose mapping is released once nothing references it.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, source_path: Optional[str] = None,
+                 check_interval: Optional[float] = None):
+        """
+        Args:
+            path (str): Binary database path (INGREDIENT_DB_PATH)
+            source_path (str): JSON source compiled when the binary is missing
+                or older (INGREDIENT_DB_SOURCE); None disables compilation
+            check_interval (float): Seconds between change checks
+                (INGREDIENT_DB_CHECK_INTERVAL, default 5)
+        """
+        self.path = path or os.getenv("INGREDIENT_DB_PATH", DEFAULT_DATABASE_PATH)
+        self.source_path = source_path if source_path is not None else os.getenv(
+            "INGREDIENT_DB_SOURCE", DEFAULT_SOURCE_PATH
+        )
+        if check_interval is None:
+            check_interval = float(os.getenv("INGREDIENT_DB_CHECK_INTERVAL", "5"))
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._signature = None
+        self._next_check = 0.0
+        self._reload()
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None, source_path: Optional[str] = None) -> "IngredientDatabase":
+        """Return the process-wide database instance for a path"""
+        key = (path, source_path)
+        with cls._shared_lock:
+            database = cls._shared.get(key)
+            if database is None:
+                database = cls(path, source_path)
+                cls._shared[key] = database
+            return database
+
+    def _stat(self, path: Optional[str]) -> Optional[Tuple[int, int, int]]:
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _ensure_compiled(self, source_signature, database_signature):
+        """Compile the JSON source if the binary is missing, older than it or in an old format"""
+        if source_signature is None:
+            return
+        if (database_signature is not None and database_signature[0] >= source_signature[0]
+                and read_format_version(self.path) == FORMAT_VERSION):
+            return
+        try:
+            compile_database(self.source_path, self.path)
+        except OSError as e:
+            # Read-only deployment directory: compile into the temp directory instead
+            fallback = os.path.join(tempfile.gettempdir(), "fhs-ingredients.bin")
+            logger.warning(f"Cannot write {self.path} ({e}), using {fallback}")
+            self.path = compile_database(self.source_path, fallback)
+
+    def _reload(self):
+        source_signature = self._stat(self.source_path)
+        database_signature = self._stat(self.path)
+        self._ensure_compiled(source_signature, database_signature)
+        database_signature = self._stat(self.path)
+        signature = (source_signature, database_signature)
+
+        if signature != self._signature:
+            if database_signature is None:
+                raise FileNotFoundError(f"Ingredient database not found: {self.path}")
+            snapshot = IngredientSnapshot(IngredientTable(self.path))
+            self._snapshot = snapshot
+            self._signature = signature
+            logger.info(
+                f"Loaded ingredient database {self.path}: {snapshot.table.ingredient_count} ingredients, "
+                f"{snapshot.table.additive_count} additives, {snapshot.table.alias_count} aliases, "
+                f"{snapshot.matcher.state_count} matcher states"
+            )
+
+    def current(self) -> IngredientSnapshot:
+        """Return the live snapshot, reloading it first if the files changed"""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                self._reload()
+            except Exception as e:
+                # Keep serving the last good snapshot
+                logger.error(f"Ingredient database reload failed: {e}")
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def ingredient_mapping(self, scores_only: bool = False) -> Mapping:
+        """Dict-like view of ingredients in the live snapshot"""
+        return _IngredientMapping(self.current(), scores_only)
+
+    def additive_mapping(self) -> Mapping:
+        """Dict-like view of concerning additives in the live snapshot"""
+        return _AdditiveMapping(self.current())
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] != "compile":
+        print(__doc__.strip().splitlines()[-1].strip())
+        return 2
+    logging.basicConfig(level=logging.INFO)
+    compile_database(argv[1], argv[2])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
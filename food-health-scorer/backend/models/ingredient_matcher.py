@@ -0,0 +1,517 @@
+import re
+from collections import deque
+from itertools import combinations
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Sentinel rank for "no term of this table occurs in the text"
+NO_MATCH = 1 << 30
+
+# Brackets, separators, whitespace and percentages that split an OCR'd ingredient into parts
+SEGMENT_SEPARATORS = re.compile(r"(?:\d+(?:\.\d+)?\s*[%％]|[()（）\[\]【】{}<>《》,，、。:：;；/\\\s])+")
+
+# Shortest query segment that is ever looked up approximately
+MIN_FUZZY_LENGTH = 3
+
+# Glyphs OCR engines misread as one another on ingredient labels; each group is
+# interchangeable. FuzzyIndex uses them for names too short for free edits.
+OCR_CONFUSABLE_GLYPHS = (
+    "主甲", "沙砂", "钟钾", "纳钠", "己已巳", "未末", "士土", "日曰",
+    "苯笨", "粉份", "精睛", "盐盆", "油汕",
+)
+
+
+# Symbol classes of the normalised character stream scanned by IngredientMatcher
+OTHER, EDGE, SPACE, LETTER, DIGIT = range(5)
+
+# Symbol emitted where an ASCII word (a run of letters or of digits) starts or ends
+BOUNDARY = "\x00"
+
+# Characters below this code point need normalising; CJK text never does
+SYMBOL_LIMIT = "\u3001"
+
+# character -> (symbol, class) for characters below SYMBOL_LIMIT that are not OTHER
+SYMBOLS = {}
+for _code in range(ord(SYMBOL_LIMIT)):
+    _ch = chr(_code)
+    if _ch.isspace() or _ch in (BOUNDARY, "-"):
+        SYMBOLS[_ch] = (None, SPACE)
+    elif _ch.isascii() and _ch.isalpha():
+        SYMBOLS[_ch] = (_ch.lower(), LETTER)
+    elif _ch.isascii() and _ch.isdigit():
+        SYMBOLS[_ch] = (_ch, DIGIT)
+del _code, _ch
+
+
+def normalize(text: str) -> str:
+    """
+    Map text to the symbol stream the matcher scans
+
+    ASCII letters are lower-cased; whitespace and hyphens are dropped. A
+    BOUNDARY symbol marks both ends of every ASCII letter or digit run, so
+    "E202", "e 202" and "E-202" all read the same and never run into
+    neighbouring words, while a CJK name with a stray space ("白 砂糖")
+    reads as if it had none.
+    IngredientMatcher.match performs the same transformation inline.
+    """
+    symbols = []
+    previous = EDGE
+    gap = False
+    for ch in text:
+        symbol, kind = SYMBOLS.get(ch, (ch, OTHER)) if ch < SYMBOL_LIMIT else (ch, OTHER)
+        if kind == SPACE:
+            gap = True
+            continue
+        if (kind != previous or gap) and (kind >= LETTER or previous >= LETTER):
+            symbols.append(BOUNDARY)
+        symbols.append(symbol)
+        previous = kind
+        gap = False
+    if previous >= LETTER:
+        symbols.append(BOUNDARY)
+    return "".join(symbols)
+
+
+class IngredientMatcher:
+    """
+    Aho-Corasick automaton over the ingredient and additive dictionaries.
+
+    Every term keeps its position (rank) in the dictionary it came from.
+    Each automaton state stores the lowest rank of any term that ends at it,
+    including terms reachable through failure links, so a single scan of an
+    ingredient string yields the first dictionary entry (in dictionary order)
+    that occurs anywhere in it - the same entry the original nested
+    ``for known in dictionary: if known in ingredient: break`` loop picked.
+
+    Aliases (E/INS codes, English names, spelling variants) are compiled
+    into the same automaton. An alias reports exactly the ranks its
+    canonical name would, so no separate normalisation pass is needed.
+    Aliases starting or ending with an ASCII letter or digit only match
+    whole words ("E202" does not match inside "E2020"). Text is scanned
+    case-insensitively (see normalize).
+    """
+
+    def __init__(self, ingredient_terms: Iterable[str], additive_terms: Iterable[str],
+                 aliases: Iterable[Tuple[str, str]] = ()):
+        """
+        Build the automaton
+
+        Args:
+            ingredient_terms: Ingredient names in priority order
+            additive_terms: Concerning additive names in priority order
+            aliases: (alias, canonical name) pairs
+        """
+        ingredient_terms = list(ingredient_terms)
+        additive_terms = list(additive_terms)
+        aliases = list(aliases)
+
+        # Per-state transition table, failure link and best ranks per dictionary
+        self._goto = [{}]
+        self._fail = [0]
+        self._ingredient_rank = [NO_MATCH]
+        self._additive_rank = [NO_MATCH]
+        # Alias end states whose ranks are final and not folded along failure links
+        self._pinned = set()
+
+        for rank, term in enumerate(ingredient_terms):
+            state = self._insert(normalize(term).strip(BOUNDARY))
+            if rank < self._ingredient_rank[state]:
+                self._ingredient_rank[state] = rank
+
+        for rank, term in enumerate(additive_terms):
+            state = self._insert(normalize(term).strip(BOUNDARY))
+            if rank < self._additive_rank[state]:
+                self._additive_rank[state] = rank
+
+        if aliases:
+            # An alias stands for its canonical name: resolve that name against
+            # the plain dictionaries once and store the result at the alias' end
+            canonical = IngredientMatcher(ingredient_terms, additive_terms)
+            for alias, name in aliases:
+                ingredient_rank, additive_rank = canonical.match(name)
+                if ingredient_rank is None and additive_rank is None:
+                    raise ValueError(f"Alias {alias!r} refers to unknown name {name!r}")
+                state = self._insert(normalize(alias))
+                if state in self._pinned or (self._ingredient_rank[state], self._additive_rank[state]) == (NO_MATCH, NO_MATCH):
+                    # The alias wins over shorter terms it happens to contain
+                    # ("whole wheat flour" is 全麦粉, not "wheat flour" or "flour")
+                    self._pinned.add(state)
+                if ingredient_rank is not None and ingredient_rank < self._ingredient_rank[state]:
+                    self._ingredient_rank[state] = ingredient_rank
+                if additive_rank is not None and additive_rank < self._additive_rank[state]:
+                    self._additive_rank[state] = additive_rank
+
+        self._build_failure_links()
+
+    def _insert(self, term: str) -> int:
+        """Insert a term into the trie and return its final state"""
+        if not term:
+            raise ValueError("Empty terms cannot be indexed")
+
+        state = 0
+        for ch in term:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._ingredient_rank.append(NO_MATCH)
+                self._additive_rank.append(NO_MATCH)
+                self._goto[state][ch] = next_state
+            state = next_state
+        return state
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and fold output ranks along them"""
+        goto = self._goto
+        fail = self._fail
+        ingredient_rank = self._ingredient_rank
+        additive_rank = self._additive_rank
+        pinned = self._pinned
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in goto[state].items():
+                link = fail[state]
+                while link and ch not in goto[link]:
+                    link = fail[link]
+                target = goto[link].get(ch, 0)
+                fail[child] = target if target != child else 0
+
+                # A state also "contains" every term that ends at its failure state
+                if child not in pinned:
+                    if ingredient_rank[fail[child]] < ingredient_rank[child]:
+                        ingredient_rank[child] = ingredient_rank[fail[child]]
+                    if additive_rank[fail[child]] < additive_rank[child]:
+                        additive_rank[child] = additive_rank[fail[child]]
+
+                queue.append(child)
+
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states"""
+        return len(self._goto)
+
+    def match(self, text: str) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Find the highest-priority ingredient and additive occurring in text
+
+        Args:
+            text (str): Ingredient string to scan
+
+        Returns:
+            Tuple[Optional[int], Optional[int]]: Rank of the matched ingredient
+            and rank of the matched additive, or None when nothing matched
+        """
+        goto = self._goto
+        fail = self._fail
+        ingredient_rank = self._ingredient_rank
+        additive_rank = self._additive_rank
+        symbols = SYMBOLS
+        limit = SYMBOL_LIMIT
+
+        best_ingredient = NO_MATCH
+        best_additive = NO_MATCH
+        state = 0
+        previous = EDGE
+        gap = False
+        # normalize() fused into the scan; runs of CJK text only pay for the
+        # two comparisons of the fast path
+        for ch in text:
+            if ch < limit:
+                ch, kind = symbols.get(ch, (ch, OTHER))
+                if kind == SPACE:
+                    gap = True
+                    continue
+                if (kind != previous or gap) and (kind >= LETTER or previous >= LETTER):
+                    state = self._advance(state, BOUNDARY)
+                    best_ingredient = min(best_ingredient, ingredient_rank[state])
+                    best_additive = min(best_additive, additive_rank[state])
+                previous = kind
+                gap = False
+            elif previous:
+                if previous >= LETTER:
+                    state = self._advance(state, BOUNDARY)
+                    best_ingredient = min(best_ingredient, ingredient_rank[state])
+                    best_additive = min(best_additive, additive_rank[state])
+                previous = OTHER
+                gap = False
+
+            transitions = goto[state]
+            while state and ch not in transitions:
+                state = fail[state]
+                transitions = goto[state]
+            state = transitions.get(ch, 0)
+
+            rank = ingredient_rank[state]
+            if rank < best_ingredient:
+                best_ingredient = rank
+            rank = additive_rank[state]
+            if rank < best_additive:
+                best_additive = rank
+
+        if previous >= LETTER:
+            state = self._advance(state, BOUNDARY)
+            best_ingredient = min(best_ingredient, ingredient_rank[state])
+            best_additive = min(best_additive, additive_rank[state])
+
+        return (
+            best_ingredient if best_ingredient != NO_MATCH else None,
+            best_additive if best_additive != NO_MATCH else None,
+        )
+
+    def _advance(self, state: int, symbol: str) -> int:
+        """Follow one symbol from state, through failure links if needed"""
+        while state and symbol not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(symbol, 0)
+
+    def match_all(self, texts: Iterable[str]) -> List[Tuple[Optional[int], Optional[int]]]:
+        """Match a sequence of ingredient strings"""
+        return [self.match(text) for text in texts]
+
+
+class SubstringIndex:
+    """
+    Generalized suffix automaton over a list of terms.
+
+    Answers "which is the first term (in list order) that contains this
+    string?" in time proportional to the query length. Every state records
+    the lowest rank of the terms whose substrings it represents; since terms
+    are inserted in rank order, a state is marked by the first term that
+    reaches it and the marking walk up the suffix links stops at the first
+    state that is already marked.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        """
+        Build the automaton
+
+        Args:
+            terms: Terms in priority order
+        """
+        self._next = [{}]
+        self._link = [-1]
+        self._length = [0]
+        self._rank = [NO_MATCH]
+
+        for rank, term in enumerate(terms):
+            last = 0
+            for ch in term:
+                last = self._extend(last, ch)
+                state = last
+                while state != -1 and self._rank[state] == NO_MATCH:
+                    self._rank[state] = rank
+                    state = self._link[state]
+
+    def _new_state(self, length: int, transitions: dict, link: int, rank: int) -> int:
+        self._next.append(transitions)
+        self._link.append(link)
+        self._length.append(length)
+        self._rank.append(rank)
+        return len(self._next) - 1
+
+    def _clone(self, source: int, length: int) -> int:
+        return self._new_state(length, dict(self._next[source]), self._link[source], self._rank[source])
+
+    def _extend(self, last: int, ch: str) -> int:
+        """Append a character to the current term and return the new last state"""
+        next_ = self._next
+        length = self._length
+        link = self._link
+
+        # The substring already exists (shared with an earlier term)
+        target = next_[last].get(ch)
+        if target is not None:
+            if length[last] + 1 == length[target]:
+                return target
+            clone = self._clone(target, length[last] + 1)
+            state = last
+            while state != -1 and next_[state].get(ch) == target:
+                next_[state][ch] = clone
+                state = link[state]
+            link[target] = clone
+            return clone
+
+        current = self._new_state(length[last] + 1, {}, 0, NO_MATCH)
+        state = last
+        while state != -1 and ch not in next_[state]:
+            next_[state][ch] = current
+            state = link[state]
+        if state != -1:
+            target = next_[state][ch]
+            if length[state] + 1 == length[target]:
+                link[current] = target
+            else:
+                clone = self._clone(target, length[state] + 1)
+                while state != -1 and next_[state].get(ch) == target:
+                    next_[state][ch] = clone
+                    state = link[state]
+                link[target] = clone
+                link[current] = clone
+        return current
+
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states"""
+        return len(self._next)
+
+    def first_containing(self, text: str) -> Optional[int]:
+        """
+        Find the first term that contains text as a substring
+
+        Args:
+            text (str): Query string
+
+        Returns:
+            Optional[int]: Rank of the term, or None
+        """
+        next_ = self._next
+        state = 0
+        for ch in text:
+            state = next_[state].get(ch)
+            if state is None:
+                return None
+        rank = self._rank[state]
+        return rank if rank != NO_MATCH else None
+
+
+def deletion_variants(term: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to max_distance characters from term"""
+    variants = {term}
+    for count in range(1, min(max_distance, len(term)) + 1):
+        for positions in combinations(range(len(term)), count):
+            skip = set(positions)
+            variants.add("".join(ch for i, ch in enumerate(term) if i not in skip))
+    return variants
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance between a and b, or limit + 1 once it exceeds limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ch_a != ch_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class FuzzyIndex:
+    """
+    Symmetric-delete index for approximate term lookup.
+
+    Every term is stored under all of its deletion variants (the term with
+    up to ``max_distance`` characters removed). A query generates its own
+    deletion variants and only terms sharing one of them are verified with
+    a bounded edit distance, so the cost of a lookup depends on the query
+    length and ``max_distance`` but not on the number of indexed terms.
+
+    Terms shorter than ``min_length`` get no free edits: one edit on a
+    three-character name usually yields another real name (柠檬汁 and
+    柠檬黄, 山梨醇 and 山梨酸). If ``confusables`` are given, such short
+    terms are still found when the query differs from them only by
+    swapping one glyph for a look-alike from the same group (苯主酸 for
+    苯甲酸). Query segments listed in ``exclude`` are known words of their
+    own and are never rewritten into a term.
+    """
+
+    def __init__(self, terms: Iterable[str], max_distance: int = 1, min_length: int = 3,
+                 confusables: Iterable[str] = (), exclude: Iterable[str] = ()):
+        """
+        Build the index
+
+        Args:
+            terms: Terms in priority order
+            max_distance: Largest edit distance still accepted as a match
+            min_length: Shortest term that is matched with arbitrary edits
+            confusables: Groups of look-alike glyphs, e.g. OCR_CONFUSABLE_GLYPHS
+            exclude: Query segments that must never match approximately
+        """
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.exclude = frozenset(exclude)
+        self._terms = []
+        self._variants = {}
+        self._max_term_length = 0
+        self._glyphs = {}
+        self._short_terms = {}
+
+        for group in confusables:
+            for glyph in group:
+                self._glyphs.setdefault(glyph, set()).update(other for other in group if other != glyph)
+
+        for rank, term in enumerate(terms):
+            self._terms.append(term)
+            if len(term) < min_length:
+                if self._glyphs and len(term) >= MIN_FUZZY_LENGTH:
+                    self._short_terms.setdefault(term, rank)
+                continue
+            self._max_term_length = max(self._max_term_length, len(term))
+            for variant in deletion_variants(term, max_distance):
+                ranks = self._variants.setdefault(variant, [])
+                if not ranks or ranks[-1] != rank:
+                    ranks.append(rank)
+
+    @property
+    def variant_count(self) -> int:
+        """Number of stored deletion variants"""
+        return len(self._variants)
+
+    def _confusable_rank(self, segment: str) -> Optional[int]:
+        # Smallest rank of a short term one look-alike glyph away from segment
+        best = None
+        for i, glyph in enumerate(segment):
+            for other in self._glyphs.get(glyph, ()):
+                rank = self._short_terms.get(segment[:i] + other + segment[i + 1:])
+                if rank is not None and (best is None or rank < best):
+                    best = rank
+        return best
+
+    def search(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        Find the term closest to text or to one of its bracketed/separated parts
+
+        Args:
+            text (str): Query string, e.g. an OCR'd ingredient
+
+        Returns:
+            Optional[Tuple[int, int]]: (rank, distance) of the best term - the
+            smallest distance, then the smallest rank - or None
+        """
+        best = None
+        shortest = max(MIN_FUZZY_LENGTH, self.min_length - self.max_distance)
+        for segment in SEGMENT_SEPARATORS.split(text):
+            if segment in self.exclude or len(segment) < MIN_FUZZY_LENGTH:
+                continue
+
+            if self._short_terms and len(segment) < self.min_length:
+                rank = self._confusable_rank(segment)
+                if rank is not None and (best is None or (1, rank) < best[::-1]):
+                    best = (rank, 1)
+
+            if not shortest <= len(segment) <= self._max_term_length + self.max_distance:
+                continue
+
+            limit = self.max_distance if best is None else best[1]
+            checked = set()
+            for variant in deletion_variants(segment, self.max_distance):
+                for rank in self._variants.get(variant, ()):
+                    if rank in checked:
+                        continue
+                    checked.add(rank)
+                    distance = bounded_edit_distance(segment, self._terms[rank], limit)
+                    if distance <= limit and (best is None or (distance, rank) < best[::-1]):
+                        best = (rank, distance)
+                        limit = distance
+        return best
@@ -0,0 +1,259 @@
+"""
+Nutri-Score nutrient-profile scoring
+
+A deterministic alternative to FoodAnalyzer's ingredient rules, computed
+from the label's nutrition table (utils.nutrition_parser) with the
+published Nutri-Score algorithm (Santé publique France, 2017 version for
+general foods and beverages): negative points for energy, sugars,
+saturated fat and sodium, positive points for fibre, protein and fruit,
+vegetable and nut content, each looked up in a threshold table. Needs no
+LLM call; a single label scores in microseconds and score_batch handles
+whole catalogues as NumPy array operations.
+
+The cheese and added-fats special cases of the algorithm are not applied:
+the label text does not say which category a product belongs to.
+"""
+
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from utils.nutrition_parser import NutritionFacts
+
+logger = logging.getLogger(__name__)
+
+# (NutritionFacts field, food thresholds, beverage thresholds): a component
+# scores one point for every threshold its per-100g/100ml value exceeds
+NEGATIVE_COMPONENTS = (
+    ("energy_kj", (335, 670, 1005, 1340, 1675, 2010, 2345, 2680, 3015, 3350),
+     (0, 30, 60, 90, 120, 150, 180, 210, 240, 270)),
+    ("sugar_g", (4.5, 9, 13.5, 18, 22.5, 27, 31, 36, 40, 45),
+     (0, 1.5, 3, 4.5, 6, 7.5, 9, 10.5, 12, 13.5)),
+    ("saturated_fat_g", (1, 2, 3, 4, 5, 6, 7, 8, 9, 10),
+     (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)),
+    ("sodium_mg", (90, 180, 270, 360, 450, 540, 630, 720, 810, 900),
+     (90, 180, 270, 360, 450, 540, 630, 720, 810, 900)),
+)
+POSITIVE_COMPONENTS = (
+    ("fiber_g", (0.9, 1.9, 2.8, 3.7, 4.7), (0.9, 1.9, 2.8, 3.7, 4.7)),
+    ("protein_g", (1.6, 3.2, 4.8, 6.4, 8.0), (1.6, 3.2, 4.8, 6.4, 8.0)),
+)
+COMPONENTS = NEGATIVE_COMPONENTS + POSITIVE_COMPONENTS
+
+# Fruit, vegetable and nut content (%): thresholds, and points for
+# exceeding none, one, two or all of them (food, beverage)
+FRUIT_VEG_THRESHOLDS = (40, 60, 80)
+FRUIT_VEG_POINTS = ((0, 1, 2, 5), (0, 2, 4, 10))
+
+# Protein only counts against high negative points when fruit and
+# vegetable content earns at least this many points
+PROTEIN_NEGATIVE_LIMIT = 11
+PROTEIN_FRUIT_VEG_POINTS = 5
+
+# Largest points of each grade, A to D (E is everything above). Only
+# water is graded A among beverages
+GRADES = "ABCDE"
+GRADE_LIMITS = ((-1, 2, 10, 18), (None, 1, 5, 9))
+
+# Piecewise-linear map from points to the 0-100 response score, placing
+# each grade in its own band (A 80-100, B 60-79, C 40-59, D 20-39, E 0-19)
+SCORE_KNOTS = (
+    ((-15, -1, 2, 10, 18, 40), (100, 80, 60, 40, 20, 0)),
+    ((-20, 1, 5, 9, 40), (79, 60, 40, 20, 0)),
+)
+
+# Without these the points say little about the product
+REQUIRED_NUTRIENTS = ("energy_kj", "sodium_mg")
+
+NUTRIENT_LABELS = {
+    "energy_kj": ("Energy", "kJ"),
+    "sugar_g": ("Sugars", "g"),
+    "saturated_fat_g": ("Saturated fat", "g"),
+    "sodium_mg": ("Sodium", "mg"),
+    "fiber_g": ("Fibre", "g"),
+    "protein_g": ("Protein", "g"),
+}
+
+GRADE_RECOMMENDATIONS = {
+    "A": "Nutri-Score A: a nutritionally favourable choice within its category.",
+    "B": "Nutri-Score B: a good choice for regular consumption.",
+    "C": "Nutri-Score C: fine in moderation; compare with similar products.",
+    "D": "Nutri-Score D: eat occasionally and in small portions.",
+    "E": "Nutri-Score E: look for alternatives with less sugar, saturated fat and salt.",
+}
+
+
+def _grade(points: int, beverage: bool, water: bool) -> str:
+    if water:
+        return "A"
+    for grade, limit in zip(GRADES, GRADE_LIMITS[beverage]):
+        if limit is not None and points <= limit:
+            return grade
+    return "E"
+
+
+class NutriScore:
+    """
+    Nutri-Score engine with the same result shape as FoodAnalyzer.analyze
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('NutriScore')
+
+    @staticmethod
+    def can_score(nutrition: Optional[NutritionFacts]) -> bool:
+        """Whether a nutrition table has the values the score needs, per 100g/100ml"""
+        return (
+            nutrition is not None and nutrition.per_100
+            and all(getattr(nutrition, name) is not None for name in REQUIRED_NUTRIENTS)
+        )
+
+    def points(self, nutrition: NutritionFacts, fruit_veg_percent: float = 0.0,
+               water: bool = False) -> Dict[str, Any]:
+        """
+        Nutri-Score points of one product
+
+        Args:
+            nutrition (NutritionFacts): Values per 100g, or per 100ml for beverages
+            fruit_veg_percent (float): Fruit, vegetable and nut content in percent
+            water (bool): Plain water, the only grade-A beverage
+
+        Returns:
+            dict: points, grade, score (0-100), negative_points, positive_points,
+            per-component points, whether protein counted, and the nutrients
+            missing from the label (counted as zero)
+        """
+        beverage = nutrition.is_liquid
+        components = {}
+        missing = []
+        for name, food_thresholds, beverage_thresholds in COMPONENTS:
+            value = getattr(nutrition, name)
+            if value is None:
+                missing.append(name)
+                value = 0.0
+            thresholds = beverage_thresholds if beverage else food_thresholds
+            components[name] = bisect_left(thresholds, value)
+        components["fruit_veg"] = FRUIT_VEG_POINTS[beverage][bisect_left(FRUIT_VEG_THRESHOLDS, fruit_veg_percent)]
+
+        negative = sum(components[name] for name, _, _ in NEGATIVE_COMPONENTS)
+        positive = components["fiber_g"] + components["fruit_veg"]
+        protein_counted = negative < PROTEIN_NEGATIVE_LIMIT or components["fruit_veg"] >= PROTEIN_FRUIT_VEG_POINTS
+        if protein_counted:
+            positive += components["protein_g"]
+        points = negative - positive
+
+        knots, scores = SCORE_KNOTS[beverage]
+        return {
+            "points": points,
+            "grade": _grade(points, beverage, water),
+            "score": 100 if water else int(round(float(np.interp(points, knots, scores)))),
+            "negative_points": negative,
+            "positive_points": positive,
+            "components": components,
+            "protein_counted": protein_counted,
+            "missing": missing
+        }
+
+    def analyze(self, ingredients: Sequence[str], nutrition: NutritionFacts,
+                fruit_veg_percent: float = 0.0, water: bool = False) -> Dict[str, Any]:
+        """
+        Score a product from its nutrition table
+
+        Args:
+            ingredients (list): Ingredient names (reported only; the score
+                comes from the nutrition table)
+            nutrition (NutritionFacts): Parsed nutrition table; see can_score
+            fruit_veg_percent (float): Fruit, vegetable and nut content in percent
+            water (bool): Plain water
+
+        Returns:
+            dict: score, health_points, recommendations and scientific_reasoning
+            as from FoodAnalyzer.analyze, plus the nutri_score details
+        """
+        result = self.points(nutrition, fruit_veg_percent, water)
+        basis = nutrition.basis
+        health_points = [f"Nutri-Score {result['grade']} ({result['points']} points)"]
+        for name, _, _ in COMPONENTS:
+            value = getattr(nutrition, name)
+            component = result["components"][name]
+            if value is None or component == 0 or (name == "protein_g" and not result["protein_counted"]):
+                continue
+            label, unit = NUTRIENT_LABELS[name]
+            sign = "-" if any(name == negative for negative, _, _ in NEGATIVE_COMPONENTS) else "+"
+            health_points.append(f"{label}: {value:g}{unit} per {basis} ({sign}{component} points)")
+        if result["missing"]:
+            health_points.append(f"Not on the label, counted as zero: {', '.join(result['missing'])}")
+
+        self.logger.info(f"Nutri-Score {result['grade']} ({result['points']} points) for {len(ingredients)} ingredients")
+        return {
+            "score": result["score"],
+            "health_points": health_points,
+            "recommendations": [GRADE_RECOMMENDATIONS[result["grade"]]],
+            "scientific_reasoning": [
+                "Nutri-Score weighs energy, sugars, saturated fat and sodium against fibre, "
+                "protein and fruit and vegetable content per 100g (100ml for drinks)."
+            ],
+            "nutri_score": result
+        }
+
+    def score_batch(self, nutrition_list: Sequence[NutritionFacts],
+                    fruit_veg_percent: Optional[Sequence[float]] = None,
+                    water: Optional[Sequence[bool]] = None) -> Dict[str, np.ndarray]:
+        """
+        Score many products at once
+
+        The nutrition tables are laid out as a product x nutrient matrix and
+        every component is a searchsorted lookup over a whole column.
+
+        Args:
+            nutrition_list (list): NutritionFacts per product
+            fruit_veg_percent (list): Fruit, vegetable and nut content per product
+            water (list): Plain-water flags per product
+
+        Returns:
+            dict: points, score and grade arrays, identical to points() per product
+        """
+        count = len(nutrition_list)
+        beverage = np.fromiter((facts.is_liquid for facts in nutrition_list), dtype=bool, count=count)
+        water = np.zeros(count, dtype=bool) if water is None else np.asarray(water, dtype=bool)
+        fruit_veg = np.zeros(count) if fruit_veg_percent is None else np.asarray(fruit_veg_percent, dtype=float)
+        values = np.array(
+            [[getattr(facts, name) or 0.0 for name, _, _ in COMPONENTS] for facts in nutrition_list],
+            dtype=float
+        ).reshape(count, len(COMPONENTS))
+
+        components = {}
+        for column, (name, food_thresholds, beverage_thresholds) in enumerate(COMPONENTS):
+            food = np.searchsorted(food_thresholds, values[:, column], side="left")
+            drink = np.searchsorted(beverage_thresholds, values[:, column], side="left")
+            components[name] = np.where(beverage, drink, food)
+        fruit_veg_step = np.searchsorted(FRUIT_VEG_THRESHOLDS, fruit_veg, side="left")
+        fruit_veg_points = np.where(
+            beverage, np.take(FRUIT_VEG_POINTS[1], fruit_veg_step), np.take(FRUIT_VEG_POINTS[0], fruit_veg_step)
+        )
+
+        negative = sum(components[name] for name, _, _ in NEGATIVE_COMPONENTS)
+        protein_counts = (negative < PROTEIN_NEGATIVE_LIMIT) | (fruit_veg_points >= PROTEIN_FRUIT_VEG_POINTS)
+        positive = components["fiber_g"] + fruit_veg_points + np.where(protein_counts, components["protein_g"], 0)
+        points = negative - positive
+
+        grade_index = np.full(count, len(GRADES) - 1)
+        for category in (0, 1):
+            limits = [limit for limit in GRADE_LIMITS[category] if limit is not None]
+            offset = len(GRADE_LIMITS[category]) - len(limits)
+            category_grade = offset + np.searchsorted(limits, points, side="left")
+            grade_index = np.where(beverage == bool(category), category_grade, grade_index)
+        grade_index = np.where(water, 0, grade_index)
+
+        food_score = np.interp(points, *SCORE_KNOTS[0])
+        drink_score = np.interp(points, *SCORE_KNOTS[1])
+        score = np.rint(np.where(beverage, drink_score, food_score)).astype(np.int64)
+        score = np.where(water, 100, score)
+
+        return {
+            "points": points.astype(np.int64),
+            "score": score,
+            "grade": np.take(np.array(list(GRADES)), grade_index)
+        }
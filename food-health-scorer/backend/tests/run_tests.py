@@ -15,6 +15,24 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from tests.test_api_routes import TestAPIRoutes
 from tests.test_food_analyzer import TestFoodAnalyzer
 from tests.test_image_processor import TestImageProcessor
+from tests.test_ingredient_matcher import TestIngredientMatcher, TestSubstringIndex, TestFuzzyIndex, TestIngredientLookup
+from tests.test_ingredient_db import TestIngredientDatabase
+from tests.test_incremental_analyzer import TestIncrementalTextAnalyzer, TestTTLCache
+from tests.test_model_loader import TestBackgroundLoader, TestLazyImports
+from tests.test_ocr_pool import TestOCRProcessPool
+from tests.test_ocr_batcher import TestMicroBatcher, TestReadtextMany
+from tests.test_quality_gate import TestQualityGate
+from tests.test_image_compressor import TestImageCompressor
+from tests.test_ingredient_parser import TestIngredientParser
+from tests.test_text_normalizer import TestTextNormalizer
+from tests.test_nutrition_parser import TestNutritionParser, TestNutrientRules
+from tests.test_nutri_score import TestNutriScore
+from tests.test_upload_stream import TestUploadStream, TestRawImageUpload
+from tests.test_base64_image import TestBase64Image, TestBinaryOCRRoute
+from tests.test_job_queue import TestJobQueue
+from tests.test_ws_analysis import TestWebSocketAnalysis
+from tests.test_field_projection import TestFieldProjection
+from tests.test_compression import TestCompression
 
 
 def run_tests_with_coverage():
@@ -39,6 +57,33 @@ def run_tests_with_coverage():
     test_suite.addTest(unittest.makeSuite(TestAPIRoutes))
     test_suite.addTest(unittest.makeSuite(TestFoodAnalyzer))
     test_suite.addTest(unittest.makeSuite(TestImageProcessor))
+    test_suite.addTest(unittest.makeSuite(TestIngredientMatcher))
+    test_suite.addTest(unittest.makeSuite(TestSubstringIndex))
+    test_suite.addTest(unittest.makeSuite(TestFuzzyIndex))
+    test_suite.addTest(unittest.makeSuite(TestIngredientLookup))
+    test_suite.addTest(unittest.makeSuite(TestIngredientDatabase))
+    test_suite.addTest(unittest.makeSuite(TestIncrementalTextAnalyzer))
+    test_suite.addTest(unittest.makeSuite(TestTTLCache))
+    test_suite.addTest(unittest.makeSuite(TestBackgroundLoader))
+    test_suite.addTest(unittest.makeSuite(TestLazyImports))
+    test_suite.addTest(unittest.makeSuite(TestOCRProcessPool))
+    test_suite.addTest(unittest.makeSuite(TestReadtextMany))
+    test_suite.addTest(unittest.makeSuite(TestMicroBatcher))
+    test_suite.addTest(unittest.makeSuite(TestQualityGate))
+    test_suite.addTest(unittest.makeSuite(TestImageCompressor))
+    test_suite.addTest(unittest.makeSuite(TestIngredientParser))
+    test_suite.addTest(unittest.makeSuite(TestTextNormalizer))
+    test_suite.addTest(unittest.makeSuite(TestNutritionParser))
+    test_suite.addTest(unittest.makeSuite(TestNutrientRules))
+    test_suite.addTest(unittest.makeSuite(TestNutriScore))
+    test_suite.addTest(unittest.makeSuite(TestUploadStream))
+    test_suite.addTest(unittest.makeSuite(TestRawImageUpload))
+    test_suite.addTest(unittest.makeSuite(TestBase64Image))
+    test_suite.addTest(unittest.makeSuite(TestBinaryOCRRoute))
+    test_suite.addTest(unittest.makeSuite(TestJobQueue))
+    test_suite.addTest(unittest.makeSuite(TestWebSocketAnalysis))
+    test_suite.addTest(unittest.makeSuite(TestFieldProjection))
+    test_suite.addTest(unittest.makeSuite(TestCompression))
     
     # Run tests with timing
     start_time = time.time()
@@ -84,6 +129,33 @@ def run_tests_simple():
     test_suite.addTest(unittest.makeSuite(TestAPIRoutes))
     test_suite.addTest(unittest.makeSuite(TestFoodAnalyzer))
     test_suite.addTest(unittest.makeSuite(TestImageProcessor))
+    test_suite.addTest(unittest.makeSuite(TestIngredientMatcher))
+    test_suite.addTest(unittest.makeSuite(TestSubstringIndex))
+    test_suite.addTest(unittest.makeSuite(TestFuzzyIndex))
+    test_suite.addTest(unittest.makeSuite(TestIngredientLookup))
+    test_suite.addTest(unittest.makeSuite(TestIngredientDatabase))
+    test_suite.addTest(unittest.makeSuite(TestIncrementalTextAnalyzer))
+    test_suite.addTest(unittest.makeSuite(TestTTLCache))
+    test_suite.addTest(unittest.makeSuite(TestBackgroundLoader))
+    test_suite.addTest(unittest.makeSuite(TestLazyImports))
+    test_suite.addTest(unittest.makeSuite(TestOCRProcessPool))
+    test_suite.addTest(unittest.makeSuite(TestReadtextMany))
+    test_suite.addTest(unittest.makeSuite(TestMicroBatcher))
+    test_suite.addTest(unittest.makeSuite(TestQualityGate))
+    test_suite.addTest(unittest.makeSuite(TestImageCompressor))
+    test_suite.addTest(unittest.makeSuite(TestIngredientParser))
+    test_suite.addTest(unittest.makeSuite(TestTextNormalizer))
+    test_suite.addTest(unittest.makeSuite(TestNutritionParser))
+    test_suite.addTest(unittest.makeSuite(TestNutrientRules))
+    test_suite.addTest(unittest.makeSuite(TestNutriScore))
+    test_suite.addTest(unittest.makeSuite(TestUploadStream))
+    test_suite.addTest(unittest.makeSuite(TestRawImageUpload))
+    test_suite.addTest(unittest.makeSuite(TestBase64Image))
+    test_suite.addTest(unittest.makeSuite(TestBinaryOCRRoute))
+    test_suite.addTest(unittest.makeSuite(TestJobQueue))
+    test_suite.addTest(unittest.makeSuite(TestWebSocketAnalysis))
+    test_suite.addTest(unittest.makeSuite(TestFieldProjection))
+    test_suite.addTest(unittest.makeSuite(TestCompression))
     
     # Run tests
     runner = unittest.TextTestRunner(verbosity=2)
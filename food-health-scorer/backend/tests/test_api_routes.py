@@ -176,6 +176,15 @@ class TestAPIRoutes(unittest.TestCase):
         # Should include scientific reasoning for known ingredients
         self.assertIn("scientific_reasoning", data)
     
+    def test_lookup_ingredients_returns_query(self):
+        """Test that bulk lookup results carry the caller's original name, in input order"""
+        response = self.client.post("/api/ingredients/lookup", json={"ingredients": ["鹽", "（白砂糖）"]})
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["query"] for result in results], ["鹽", "（白砂糖）"])
+        self.assertEqual([result["ingredient"] for result in results], ["盐", "(白砂糖)"])
+    
     @patch('utils.image_processor.ImageProcessor.extract_text')
     @patch('utils.image_processor.ImageProcessor.extract_ingredients')
     @patch('models.food_analyzer.FoodAnalyzer.analyze')
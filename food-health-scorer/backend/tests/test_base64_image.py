@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import io
+import base64
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlencode
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from fastapi.testclient import TestClient
+
+import main
+
+from models.baidu_ocr import image_form_body, prepare_image
+from utils.base64_image import InvalidBase64Image, parse_base64_image
+from utils.upload_stream import UploadTooLarge
+
+
+def encoded_image(img_format="JPEG", size=(64, 48)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 120, 40)).save(buffer, format=img_format)
+    return buffer.getvalue()
+
+
+class TestBase64Image(unittest.TestCase):
+    """Test cases for in-place base64 image validation"""
+
+    def setUp(self):
+        self.jpeg = encoded_image()
+        self.payload = base64.b64encode(self.jpeg).decode("ascii")
+
+    def test_plain_and_data_url(self):
+        """Test that plain base64 and data URLs give the same payload"""
+        for value in (self.payload, "data:image/jpeg;base64," + self.payload):
+            image = parse_base64_image(value, 10 ** 6)
+            self.assertEqual(image.payload, self.payload)
+            self.assertEqual(image.size, len(self.jpeg))
+            self.assertEqual(image.content_type, "image/jpeg")
+
+    def test_sizes_with_padding(self):
+        """Test the decoded size computed from the length and padding"""
+        for data in (b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0d", b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dI",
+                     b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0dIH"):
+            image = parse_base64_image(base64.b64encode(data).decode(), 100)
+            self.assertEqual(image.size, len(data))
+            self.assertEqual(image.content_type, "image/png")
+
+    def test_mime_wrapped(self):
+        """Test that line-wrapped base64 is accepted"""
+        wrapped = base64.encodebytes(self.jpeg).decode("ascii")
+        image = parse_base64_image(wrapped, 10 ** 6)
+        self.assertEqual(image.payload, self.payload)
+
+    def test_invalid(self):
+        """Test strict rejection of malformed base64"""
+        invalid = [
+            "",
+            "data:image/jpeg;base64,",
+            "data:image/jpeg," + self.payload,
+            self.payload[:-1],
+            "ab*d" + self.payload[4:],
+            "ab=d" + self.payload[4:],
+            self.payload[:-4] + "A===",
+            "配料" + self.payload[2:],
+        ]
+        for value in invalid:
+            with self.assertRaises(InvalidBase64Image, msg=value[:30]):
+                parse_base64_image(value, 10 ** 6)
+
+    def test_too_large(self):
+        """Test that the decoded size is checked before validation"""
+        with self.assertRaises(UploadTooLarge):
+            parse_base64_image(self.payload, len(self.jpeg) - 1)
+
+    def test_unknown_format(self):
+        """Test that non-image data is valid base64 without a content type"""
+        image = parse_base64_image(base64.b64encode(b"%PDF-1.7 document").decode(), 100)
+        self.assertIsNone(image.content_type)
+
+    def test_form_body(self):
+        """Test that the form body matches urlencode and decodes to the payload"""
+        payload = base64.b64encode(bytes(range(256)) * 4).decode()
+        body = image_form_body(payload)
+        self.assertEqual(body, urlencode({"image": payload}))
+        self.assertEqual(parse_qs(body)["image"], [payload])
+
+    def test_prepare_image(self):
+        """Test conversion of formats Baidu OCR does not accept"""
+        converted = prepare_image(encoded_image("GIF"))
+        self.assertEqual(Image.open(io.BytesIO(converted)).format, "JPEG")
+        png = encoded_image("PNG")
+        self.assertEqual(prepare_image(png), png)
+
+
+
+class TestBinaryOCRRoute(unittest.TestCase):
+    """Test cases for /api/ocr/binary image preparation"""
+
+    def setUp(self):
+        self.client = TestClient(main.app)
+        self.sent = []
+        extract = patch("models.baidu_ocr.BaiduOCR.extract_ingredients_text", side_effect=self.extract)
+        init = patch("models.baidu_ocr.BaiduOCR.__init__", return_value=None)
+        extract.start()
+        init.start()
+        self.addCleanup(extract.stop)
+        self.addCleanup(init.stop)
+
+    def extract(self, image, use_accurate=True):
+        self.sent.append(bytes(image))
+        return "配料：小麦粉、白砂糖、植物油"
+
+    def post(self, data):
+        return self.client.post("/api/ocr/binary", content=data,
+                                headers={"Content-Type": "application/octet-stream"})
+
+    def test_supported_image_is_sent_as_is(self):
+        """Test that a small JPEG reaches Baidu OCR unchanged"""
+        jpeg = encoded_image()
+        response = self.post(jpeg)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.sent, [jpeg])
+
+    def test_unsupported_format_is_converted(self):
+        """Test that formats Baidu OCR does not accept are converted to JPEG first"""
+        response = self.post(encoded_image("GIF"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["file_type"], "image/gif")
+        self.assertEqual(Image.open(io.BytesIO(self.sent[0])).format, "JPEG")
+
+    def test_non_image_is_rejected(self):
+        """Test that a body without an image signature is a 400, as on /analyze"""
+        response = self.post(b"%PDF-1.7" + b"\x00" * 100)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
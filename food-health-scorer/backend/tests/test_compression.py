@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+import gzip
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from utils.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+
+LARGE = {"health_points": ["含糖量较高，长期大量摄入可能增加肥胖和龋齿风险"] * 40}
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"score": 60}
+
+    @app.get("/vary")
+    async def vary():
+        return JSONResponse(LARGE, headers={"Vary": "Origin"})
+
+    @app.get("/encoded")
+    async def encoded():
+        body = gzip.compress(b"x" * 2000)
+        return Response(body, media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\xff\xd8\xff" + b"\x00" * 2000, media_type="image/jpeg")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([b"a" * 1000, b"b" * 1000]), media_type="text/plain")
+
+    return app
+
+
+class TestCompression(unittest.TestCase):
+    """Test cases for Accept-Encoding negotiation and response compression"""
+
+    def setUp(self):
+        self.client = TestClient(make_app())
+
+    def get(self, path, accept_encoding):
+        return self.client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    def test_parse_accept_encoding(self):
+        """Test quality values of an Accept-Encoding header"""
+        self.assertEqual(parse_accept_encoding("gzip, deflate, br;q=0.9, *;q=0"),
+                         {"gzip": 1.0, "deflate": 1.0, "br": 0.9, "*": 0.0})
+        self.assertEqual(parse_accept_encoding(""), {})
+        self.assertEqual(parse_accept_encoding("gzip;q=x"), {"gzip": 0.0})
+
+    def test_choose_encoding(self):
+        """Test brotli preference, q-values and wildcards"""
+        self.assertEqual(choose_encoding("gzip, br", brotli_available=True), "br")
+        self.assertEqual(choose_encoding("gzip, br", brotli_available=False), "gzip")
+        self.assertEqual(choose_encoding("gzip, br;q=0.5", brotli_available=True), "gzip")
+        self.assertEqual(choose_encoding("*", brotli_available=True), "br")
+        self.assertIsNone(choose_encoding("gzip;q=0, deflate", brotli_available=True))
+        self.assertIsNone(choose_encoding("identity"))
+
+    def test_gzip(self):
+        """Test that large JSON responses are gzipped with correct headers"""
+        response = self.get("/large", "gzip")
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertLess(int(response.headers["content-length"]), 500)
+        self.assertEqual(response.json(), LARGE)
+
+    def test_existing_vary(self):
+        """Test that Accept-Encoding is added to an existing Vary header"""
+        response = self.get("/vary", "gzip")
+        self.assertEqual(response.headers["vary"], "Origin, Accept-Encoding")
+
+    def test_passthrough(self):
+        """Test responses that are left uncompressed"""
+        self.assertNotIn("content-encoding", self.get("/large", "identity").headers)
+        self.assertNotIn("content-encoding", self.get("/small", "gzip").headers)
+        self.assertNotIn("content-encoding", self.get("/image", "gzip").headers)
+        stream = self.get("/stream", "gzip")
+        self.assertNotIn("content-encoding", stream.headers)
+        self.assertEqual(stream.text, "a" * 1000 + "b" * 1000)
+        encoded = self.get("/encoded", "gzip")
+        self.assertEqual(encoded.headers["content-encoding"], "gzip")
+        self.assertEqual(encoded.text, "x" * 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.field_projection import InvalidFieldSpec, parse_fields, project, resolve_projection
+
+RESULT = {
+    "food_name": "饼干",
+    "score": 35,
+    "ingredients": ["小麦粉", "白砂糖"],
+    "health_points": ["含糖量较高"],
+    "recommendations": ["控制食用量"],
+    "detailed_analysis": {
+        "positive_aspects": ["小麦粉提供碳水化合物"],
+        "negative_aspects": ["白砂糖属于添加糖"],
+        "nutritional_highlights": []
+    },
+    "nutri_score": {"grade": "D", "points": 14, "components": {"sugar_g": 6}},
+    "extracted_text": "配料：小麦粉、白砂糖",
+    "ocr_success": True,
+    "processing_time": 6.2
+}
+
+
+class TestFieldProjection(unittest.TestCase):
+    """Test cases for sparse fieldsets on analysis results"""
+
+    def test_parse_fields(self):
+        """Test nested paths and whole-value precedence"""
+        self.assertEqual(parse_fields("score, detailed_analysis.negative_aspects,,"),
+                         {"score": {}, "detailed_analysis": {"negative_aspects": {}}})
+        self.assertEqual(parse_fields("a.b,a"), {"a": {}})
+        self.assertEqual(parse_fields("a,a.b"), {"a": {}})
+        self.assertEqual(parse_fields("a.b.c,a.b"), {"a": {"b": {}}})
+
+    def test_invalid_fields(self):
+        """Test that malformed paths are rejected"""
+        for spec in ("a..b", "1score", "score;drop", ".score", "score.", "x" * 1001):
+            with self.assertRaises(InvalidFieldSpec, msg=spec[:20]):
+                parse_fields(spec)
+
+    def test_project(self):
+        """Test selecting top-level and nested fields"""
+        projected = project(RESULT, parse_fields("score,detailed_analysis.negative_aspects,missing"))
+        self.assertEqual(projected, {"score": 35, "detailed_analysis": {"negative_aspects": ["白砂糖属于添加糖"]}})
+        self.assertIn("extracted_text", RESULT)
+
+    def test_project_lists(self):
+        """Test that a path into a list applies to each dict in it"""
+        data = {"results": [{"name": "白砂糖", "score": -10, "reason": "添加糖"}, {"name": "未知"}]}
+        self.assertEqual(project(data, parse_fields("results.name,results.score")),
+                         {"results": [{"name": "白砂糖", "score": -10}, {"name": "未知"}]})
+
+    def test_profiles(self):
+        """Test the compact profile and adding fields to a profile"""
+        self.assertIsNone(resolve_projection())
+        self.assertIsNone(resolve_projection(profile="full"))
+        compact = project(RESULT, resolve_projection(profile="compact"))
+        self.assertEqual(set(compact), {"food_name", "score", "ingredients", "health_points",
+                                        "recommendations", "ocr_success", "nutri_score"})
+        self.assertEqual(compact["nutri_score"], {"grade": "D", "points": 14})
+        extended = project(RESULT, resolve_projection("extracted_text", "compact"))
+        self.assertEqual(extended["extracted_text"], RESULT["extracted_text"])
+        with self.assertRaises(InvalidFieldSpec):
+            resolve_projection(profile="tiny")
+
+
+if __name__ == '__main__':
+    unittest.main()
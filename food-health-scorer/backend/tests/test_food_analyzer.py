@@ -1,4 +1,5 @@
 import unittest
+import random
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -242,6 +243,53 @@ class TestFoodAnalyzer(unittest.TestCase):
         self.assertLessEqual(result['score'], 100)
         self.assertGreater(len(result['recommendations']), 0)
 
+    def test_analyze_batch_matches_scalar(self):
+        """Test that batch analysis returns exactly what analyze() returns per list"""
+        vocabulary = list(self.analyzer.ingredient_data) + list(self.analyzer.concerning_additives)
+        vocabulary += ['未知配料', '食品添加剂（山梨酸钾）', ' 燕麦 ', '', '麦芽精', '苯主酸']
+        
+        rng = random.Random(2024)
+        batch = [[rng.choice(vocabulary) for _ in range(rng.randint(1, 15))] for _ in range(300)]
+        batch += [[], ['', ' '], ['全麦粉', '燕麦', '糙米', '豆类', '坚果', '蔬菜'], ['糖'] * 10]
+        
+        expected = [self.analyzer.analyze(list(ingredients)) for ingredients in batch]
+        self.assertEqual(self.analyzer.analyze_batch(batch), expected)
+        self.assertEqual(
+            self.analyzer.analyze_batch(batch, scores_only=True).tolist(),
+            [result['score'] for result in expected]
+        )
+    
+    def test_analyze_batch_empty(self):
+        """Test batch analysis with no ingredient lists"""
+        self.assertEqual(self.analyzer.analyze_batch([]), [])
+    
+    def test_english_and_e_number_labels(self):
+        """Test that English names and E/INS codes score like their Chinese names"""
+        english = self.analyzer.analyze(['Whole Wheat Flour', 'Sugar', 'Palm Oil', 'Potassium Sorbate (E202)', 'INS 951'])
+        chinese = self.analyzer.analyze(['全麦粉', '白砂糖', '棕榈油', '山梨酸钾', '阿斯巴甜'])
+        self.assertEqual(english['score'], chinese['score'])
+        self.assertNotIn('Many ingredients could not be recognized or scored (-10 points)', english['health_points'])
+    
+    def test_ocr_garbled_ingredients(self):
+        """Test that OCR near-misses are matched approximately instead of counted as unknown"""
+        garbled = self.analyzer.analyze(['小麦粉', '麦芽精', '苯主酸'])
+        clean = self.analyzer.analyze(['小麦粉', '麦芽糊精', '苯甲酸'])
+        self.assertEqual(garbled['score'], clean['score'])
+        self.assertEqual(
+            [point.replace('麦芽精', '麦芽糊精') for point in garbled['health_points']],
+            clean['health_points']
+        )
+
+    def test_real_words_are_not_fuzzy_matched(self):
+        """Test that correctly spelled names one character from a database entry stay unmatched"""
+        snapshot = self.analyzer.database.current()
+        for name in ['柠檬汁', '葡萄干', '碳酸钙', '乳酸钙', '山梨醇']:
+            self.assertEqual(snapshot.match(name), (None, None), name)
+        
+        result = self.analyzer.analyze(['燕麦', '葡萄干', '柠檬汁'])
+        unknown = self.analyzer.analyze(['燕麦', '未知配料甲', '未知配料乙'])
+        self.assertEqual(result['score'], unknown['score'])
+        self.assertEqual(result['health_points'], unknown['health_points'])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils import image_compressor
+from utils.image_compressor import compress_image
+
+
+def make_label(width=1600, height=1200, seed=0):
+    """Phone-photo-like label: shading, text blocks and sensor noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    shading = 128 + 60 * np.sin(x / 300) + 40 * np.cos(y / 200)
+    img = Image.fromarray(np.clip(shading, 0, 255).astype(np.uint8)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for top in range(80, height - 80, 60):
+        for left in range(80, width - 80, 40):
+            draw.rectangle([left, top, left + 25, top + 30], fill=(20, 20, 20))
+    noisy = np.asarray(img).astype(np.int16) + rng.normal(0, 6, (height, width, 3)).astype(np.int16)
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+
+
+def encode(img, img_format='JPEG', **kwargs):
+    output = io.BytesIO()
+    img.save(output, format=img_format, **kwargs)
+    return output.getvalue()
+
+
+class TestImageCompressor(unittest.TestCase):
+    """Test cases for the size-targeted image compressor"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.photo = encode(make_label(), quality=95)
+
+    def setUp(self):
+        """Count encodes by wrapping the encoder"""
+        self.encodes = 0
+        original = image_compressor._Encoder.size
+        test = self
+
+        def counting_size(encoder, quality):
+            if quality not in encoder.results:
+                test.encodes += 1
+            return original(encoder, quality)
+
+        image_compressor._Encoder.size = counting_size
+        self.addCleanup(setattr, image_compressor._Encoder, 'size', original)
+
+    def test_fits_targets(self):
+        """Test that output stays within target across quality-only and resize regimes"""
+        for target in (len(self.photo) // 2, len(self.photo) // 5, len(self.photo) // 20):
+            compressed, success, error = compress_image(self.photo, target)
+            self.assertTrue(success, error)
+            self.assertEqual(error, "")
+            self.assertLessEqual(len(compressed), target)
+            self.assertEqual(Image.open(io.BytesIO(compressed)).format, 'JPEG')
+
+    def test_few_encodes(self):
+        """Test that the search needs far fewer encodes than stepping quality 95..30"""
+        compress_image(self.photo, len(self.photo) // 5)
+        self.assertLessEqual(self.encodes, 6)
+
+    def test_prefers_resize_over_low_quality(self):
+        """Test that a small target downscales instead of dropping below MIN_QUALITY"""
+        compressed, success, _ = compress_image(self.photo, len(self.photo) // 20)
+        self.assertTrue(success)
+        self.assertLess(Image.open(io.BytesIO(compressed)).width, 1600)
+
+    def test_already_fits(self):
+        """Test that an image within the target is returned untouched"""
+        compressed, success, _ = compress_image(self.photo, len(self.photo))
+        self.assertTrue(success)
+        self.assertEqual(compressed, self.photo)
+        self.assertEqual(self.encodes, 0)
+
+    def test_file_path_and_file_object(self):
+        """Test path and file-like inputs"""
+        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as f:
+            f.write(self.photo)
+        try:
+            target = len(self.photo) // 3
+            from_path, success, _ = compress_image(f.name, target)
+            self.assertTrue(success)
+            with open(f.name, 'rb') as fp:
+                from_file, success, _ = compress_image(fp, target)
+            self.assertTrue(success)
+            self.assertEqual(from_path, from_file)
+            self.assertLessEqual(len(from_path), target)
+        finally:
+            os.unlink(f.name)
+
+    def test_mpo_is_lossy(self):
+        """Test that a phone MPO photo gets the quality search, not a resize, and comes back as JPEG"""
+        label = make_label()
+        mpo = encode(label, 'MPO', quality=95, save_all=True, append_images=[label.resize((320, 240))])
+        self.assertEqual(Image.open(io.BytesIO(mpo)).format, 'MPO')
+        compressed, success, error = compress_image(mpo, len(mpo) // 2)
+        self.assertTrue(success, error)
+        self.assertLessEqual(len(compressed), len(mpo) // 2)
+        result = Image.open(io.BytesIO(compressed))
+        self.assertEqual((result.format, result.width), ('JPEG', 1600))
+
+    def test_lossless_format(self):
+        """Test that a PNG is shrunk by resizing and keeps its format"""
+        png = encode(make_label(800, 600).convert('RGBA'), 'PNG')
+        compressed, success, _ = compress_image(png, len(png) // 4)
+        self.assertTrue(success)
+        self.assertLessEqual(len(compressed), len(png) // 4)
+        self.assertEqual(Image.open(io.BytesIO(compressed)).format, 'PNG')
+
+    def test_invalid_input(self):
+        """Test failure reporting"""
+        compressed, success, error = compress_image(b"not an image", 1024)
+        self.assertFalse(success)
+        self.assertEqual(compressed, b"")
+        self.assertIn("图片压缩错误", error)
+
+        compressed, success, error = compress_image(self.photo, 100)
+        self.assertFalse(success)
+        self.assertIn("无法将图片压缩", error)
+
+
+if __name__ == '__main__':
+    unittest.main()
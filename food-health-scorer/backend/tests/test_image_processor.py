@@ -81,6 +81,79 @@ class TestImageProcessor(unittest.TestCase):
         finally:
             os.unlink(test_image_path)
     
+    def test_extract_text_from_bytes_in_memory(self):
+        """Test that every OCR pass gets a decoded array and no temp files are written"""
+        # Noise keeps the image above the blurriness threshold
+        img = np.random.RandomState(0).randint(0, 256, (300, 400, 3)).astype(np.uint8)
+        _, encoded = cv2.imencode('.jpg', img)
+        image_bytes = encoded.tobytes()
+        
+        ocr_result = [[[[0, 0], [10, 0], [10, 10], [0, 10]], "配料表: 小麦粉, 糖, 植物油, 盐", 0.9]]
+        with patch.object(self.processor, 'ocr') as mock_ocr, \
+             patch('cv2.imwrite') as mock_imwrite:
+            mock_ocr.readtext.return_value = ocr_result
+            text, success, error = self.processor.extract_text(image_bytes)
+        
+        self.assertTrue(success)
+        self.assertIn("小麦粉", text)
+        mock_imwrite.assert_not_called()
+        self.assertGreaterEqual(mock_ocr.readtext.call_count, 1)
+        for call in mock_ocr.readtext.call_args_list:
+            self.assertIsInstance(call.args[0], np.ndarray)
+    
+    def test_extract_text_clean_first_pass_exits_early(self):
+        """Test that a confident first pass with an ingredient marker skips the other variants"""
+        _, encoded = cv2.imencode('.jpg', np.random.RandomState(0).randint(0, 256, (300, 400, 3)).astype(np.uint8))
+        ocr_result = [[[[0, 0], [10, 0], [10, 10], [0, 10]], "配料表: 小麦粉, 糖, 植物油, 盐", 0.9]]
+        
+        with patch.object(self.processor, 'ocr') as mock_ocr:
+            mock_ocr.readtext.return_value = ocr_result
+            text, success, _ = self.processor.extract_text(encoded.tobytes())
+        
+        self.assertTrue(success)
+        self.assertEqual(mock_ocr.readtext.call_count, 1)
+        mock_ocr.recognize.assert_not_called()
+    
+    def test_extract_text_retries_low_confidence_regions(self):
+        """Test that only low-confidence regions are re-recognised on a preprocessed variant"""
+        _, encoded = cv2.imencode('.jpg', np.random.RandomState(0).randint(0, 256, (300, 400, 3)).astype(np.uint8))
+        ocr_result = [
+            [[[0, 0], [100, 0], [100, 20], [0, 20]], "配料表: 小麦粉, 糖", 0.9],
+            [[[0, 30], [100, 30], [100, 50], [0, 50]], "白沙搪", 0.4]
+        ]
+        retry_result = [[[[0, 30], [100, 30], [100, 50], [0, 50]], "白砂糖", 0.95]]
+        
+        before = self.processor.pass_statistics()
+        with patch.object(self.processor, 'ocr') as mock_ocr:
+            mock_ocr.readtext.return_value = ocr_result
+            mock_ocr.recognize.return_value = retry_result
+            text, success, _ = self.processor.extract_text(encoded.tobytes())
+        
+        self.assertTrue(success)
+        self.assertEqual(text, "配料表: 小麦粉, 糖\n白砂糖")
+        self.assertEqual(mock_ocr.readtext.call_count, 1)
+        self.assertEqual(mock_ocr.recognize.call_args.kwargs["horizontal_list"], [[0, 100, 30, 50]])
+        
+        stats = self.processor.pass_statistics()
+        self.assertEqual(stats["images"], before["images"] + 1)
+        self.assertEqual(stats["region_passes"], before["region_passes"] + 1)
+    
+    def test_extract_text_batch_shares_first_pass(self):
+        """Test that a batch runs one readtext_batched first pass and keeps per-image failures"""
+        _, encoded = cv2.imencode('.jpg', np.random.RandomState(0).randint(0, 256, (300, 400, 3)).astype(np.uint8))
+        ocr_result = [[[[0, 0], [10, 0], [10, 10], [0, 10]], "配料表: 小麦粉, 糖, 植物油, 盐", 0.9]]
+        
+        with patch.object(self.processor, 'ocr') as mock_ocr:
+            mock_ocr.readtext_batched.return_value = [ocr_result, ocr_result]
+            results = self.processor.extract_text_batch(
+                [encoded.tobytes(), "/nonexistent/file.jpg", encoded.tobytes()]
+            )
+        
+        self.assertEqual([success for _, success, _ in results], [True, False, True])
+        self.assertIn("文件不存在", results[1][2])
+        mock_ocr.readtext_batched.assert_called_once()
+        mock_ocr.readtext.assert_not_called()
+    
     def test_extract_ingredients_success(self):
         """Test successful ingredient extraction from text"""
         test_text = """
@@ -0,0 +1,132 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.incremental_analyzer import IncrementalTextAnalyzer
+from utils.ttl_cache import TTLCache
+
+
+class FakeLLM:
+    """Stands in for DeepSeekAnalyzer and records the calls it receives"""
+    
+    calls = []
+    
+    def analyze_food_ingredients(self, text):
+        FakeLLM.calls.append(("full", text))
+        return {
+            "food_name": "饼干",
+            "ingredients": ["小麦粉", "白砂糖", "棕榈油"],
+            "score": 40,
+            "health_points": ["添加糖含量较高 (-15分)"],
+            "recommendations": ["建议适量食用"],
+            "detailed_analysis": {"positive_aspects": [], "negative_aspects": [], "nutritional_highlights": []}
+        }
+    
+    def analyze_new_ingredients(self, ingredients, context):
+        FakeLLM.calls.append(("delta", list(ingredients)))
+        return {name: {"score": 3, "description": "天然成分"} for name in ingredients}
+
+
+class TestIncrementalTextAnalyzer(unittest.TestCase):
+    """Test cases for IncrementalTextAnalyzer class"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        FakeLLM.calls = []
+        self.food_analyzer = FoodAnalyzer()
+        self.analyzer = IncrementalTextAnalyzer(self.food_analyzer, FakeLLM, TTLCache(60))
+        self.first = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐")
+    
+    def test_first_submission_is_full_analysis(self):
+        """Test that a new session gets a full LLM analysis"""
+        self.assertFalse(self.first["incremental"])
+        self.assertEqual(self.first["score"], 40)
+        self.assertTrue(self.first["session_id"])
+        self.assertEqual([call[0] for call in FakeLLM.calls], ["full"])
+    
+    def test_known_ingredient_edit_stays_local(self):
+        """Test that replacing a known ingredient is re-scored without the LLM"""
+        result = self.analyzer.analyze("配料：小麦粉，燕麦，棕榈油，食用盐", self.first["session_id"])
+        
+        expected = 40 + self.food_analyzer.analyze(["小麦粉", "燕麦", "棕榈油", "食用盐"])["score"] \
+            - self.food_analyzer.analyze(["小麦粉", "白砂糖", "棕榈油", "食用盐"])["score"]
+        self.assertTrue(result["incremental"])
+        self.assertEqual(result["score"], max(0, min(100, expected)))
+        self.assertEqual(result["changes"], {"added": ["燕麦"], "removed": ["白砂糖"]})
+        self.assertEqual(result["llm_calls"], 0)
+        self.assertEqual(result["ingredients"], ["小麦粉", "燕麦", "棕榈油", "食用盐"])
+        self.assertEqual(len(FakeLLM.calls), 1)
+    
+    def test_unknown_ingredient_uses_delta_request_once(self):
+        """Test that only genuinely new ingredients reach the LLM, once per session"""
+        session_id = self.first["session_id"]
+        result = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐，罗汉果", session_id)
+        self.assertEqual(result["llm_calls"], 1)
+        self.assertEqual(result["score"], 43)
+        self.assertEqual(FakeLLM.calls[-1], ("delta", ["罗汉果"]))
+        
+        # Resubmitting the same text does not ask again
+        result = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐，罗汉果", session_id)
+        self.assertEqual(result["llm_calls"], 0)
+        self.assertEqual(result["score"], 43)
+        self.assertEqual(result["changes"], {"added": [], "removed": []})
+    
+    def test_large_rewrite_triggers_full_analysis(self):
+        """Test that replacing most of the list falls back to a full analysis"""
+        result = self.analyzer.analyze("配料：燕麦，藜麦，蜂蜜，杏仁", self.first["session_id"])
+        self.assertFalse(result["incremental"])
+        self.assertEqual(result["session_id"], self.first["session_id"])
+        self.assertEqual([call[0] for call in FakeLLM.calls], ["full", "full"])
+    
+    def test_unknown_session_starts_over(self):
+        """Test that an expired or unknown session id gets a full analysis"""
+        result = self.analyzer.analyze("配料：小麦粉，燕麦", "expired-session")
+        self.assertFalse(result["incremental"])
+        self.assertNotEqual(result["session_id"], "expired-session")
+        self.assertIsNone(self.analyzer.sessions.get("expired-session"))
+    
+    def test_garbled_names_are_not_scored_locally(self):
+        """Test that only exact knowledge-base entries are scored locally"""
+        result = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐，苯主酸", self.first["session_id"])
+        self.assertEqual(FakeLLM.calls[-1], ("delta", ["苯主酸"]))
+        self.assertEqual(result["score"], 43)
+    
+    def test_removing_unknown_ingredient_takes_back_its_impact(self):
+        """Test that removing an ingredient only the LLM knows moves the score"""
+        first = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐，苯主酸")
+        result = self.analyzer.analyze("配料：小麦粉，白砂糖，棕榈油，食用盐", first["session_id"])
+        self.assertTrue(result["incremental"])
+        self.assertEqual(FakeLLM.calls[-1], ("delta", ["苯主酸"]))
+        self.assertEqual(result["score"], 37)
+        self.assertEqual(result["changes"], {"added": [], "removed": ["苯主酸"]})
+        self.assertIn("移除配料 苯主酸：天然成分 (-3分)", result["health_points"])
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test cases for TTLCache class"""
+    
+    def test_expiry(self):
+        """Test that entries disappear after their ttl"""
+        cache = TTLCache(ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=-1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertNotIn("b", cache)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted past max_entries"""
+        cache = TTLCache(ttl=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
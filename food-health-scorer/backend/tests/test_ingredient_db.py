@@ -0,0 +1,167 @@
+import unittest
+import gc
+import json
+import os
+import sys
+import struct
+import tempfile
+import weakref
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.ingredient_db import FORMAT_VERSION, MAGIC, IngredientDatabase, IngredientTable, compile_database
+
+
+class TestIngredientDatabase(unittest.TestCase):
+    """Test cases for the compiled ingredient database"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.source_path = os.path.join(self.temp_dir.name, "ingredients.json")
+        self.database_path = os.path.join(self.temp_dir.name, "ingredients.bin")
+        self.write_source([
+            {"name": "燕麦", "score": 10, "reason": "含有β-葡聚糖"},
+            {"name": "白砂糖", "score": -10, "reason": "精制糖"},
+        ], [
+            {"name": "甜蜜素", "reason": "人工甜味剂"},
+        ])
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write_source(self, ingredients, additives, mtime_offset=0):
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "ingredients": ingredients, "additives": additives}, f, ensure_ascii=False)
+        if mtime_offset:
+            stat = os.stat(self.source_path)
+            os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+    
+    def test_compile_round_trip(self):
+        """Test that compiled records read back unchanged"""
+        compile_database(self.source_path, self.database_path)
+        table = IngredientTable(self.database_path)
+        
+        self.assertEqual(table.ingredient_count, 2)
+        self.assertEqual(table.additive_count, 1)
+        self.assertEqual(table.ingredient(0), ("燕麦", 10, "含有β-葡聚糖", "whole_food"))
+        self.assertEqual(table.ingredient(1), ("白砂糖", -10, "精制糖", "sugar"))
+        self.assertEqual(table.additive(0), ("甜蜜素", "人工甜味剂"))
+        self.assertEqual(list(table.ingredient_names()), ["燕麦", "白砂糖"])
+    
+    def test_duplicate_names_rejected(self):
+        """Test that duplicate ingredient names fail compilation"""
+        self.write_source([
+            {"name": "燕麦", "score": 10, "reason": ""},
+            {"name": "燕麦", "score": 8, "reason": ""},
+        ], [])
+        with self.assertRaises(ValueError):
+            compile_database(self.source_path, self.database_path)
+        self.assertFalse(os.path.exists(self.database_path))
+    
+    def test_aliases(self):
+        """Test that aliases are compiled and resolve to their canonical entry"""
+        self.write_source([
+            {"name": "燕麦", "score": 10, "reason": "", "aliases": ["oats", "Rolled Oats"]},
+            {"name": "山梨酸钾", "score": -3, "reason": "", "aliases": ["E202", "potassium sorbate"]},
+        ], [
+            {"name": "山梨酸", "reason": "", "aliases": ["E200"]},
+        ])
+        compile_database(self.source_path, self.database_path)
+        table = IngredientTable(self.database_path)
+        self.assertEqual(table.alias_count, 5)
+        self.assertIn(("E202", "山梨酸钾"), list(table.aliases()))
+        
+        analyzer = FoodAnalyzer(IngredientDatabase(self.database_path, self.source_path, check_interval=0))
+        self.assertEqual(analyzer.get_ingredient_info("ROLLED OATS")["score"], 10)
+        info = analyzer.get_ingredient_info("Potassium Sorbate")
+        self.assertEqual((info["score"], info["is_concerning"]), (-3, True))
+        self.assertTrue(analyzer.get_ingredient_info("e200")["is_concerning"])
+    
+    def test_conflicting_alias_rejected(self):
+        """Test that one alias cannot name two different entries"""
+        self.write_source([
+            {"name": "燕麦", "score": 10, "reason": "", "aliases": ["oats"]},
+            {"name": "燕麦片", "score": 8, "reason": "", "aliases": ["oats"]},
+        ], [])
+        with self.assertRaises(ValueError):
+            compile_database(self.source_path, self.database_path)
+    
+    def test_old_format_recompiled(self):
+        """Test that a binary in an older format is rebuilt from the source"""
+        with open(self.database_path, "wb") as f:
+            f.write(struct.pack("<8sIIIIII", MAGIC, FORMAT_VERSION - 1, 0, 0, 32, 32, 32))
+        stat = os.stat(self.source_path)
+        os.utime(self.database_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=0)
+        self.assertEqual(len(database.ingredient_mapping()), 2)
+    
+    def test_compiles_missing_database_from_source(self):
+        """Test that the binary is built from the JSON source on first load"""
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=0)
+        
+        self.assertTrue(os.path.exists(self.database_path))
+        self.assertEqual(dict(database.ingredient_mapping(scores_only=True)), {"燕麦": 10, "白砂糖": -10})
+        self.assertEqual(dict(database.additive_mapping()), {"甜蜜素": "人工甜味剂"})
+    
+    def test_hot_reload(self):
+        """Test that a replaced database is picked up without a new instance"""
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=0)
+        analyzer = FoodAnalyzer(database)
+        old_snapshot = database.current()
+        self.assertEqual(analyzer.get_ingredient_info("藜麦")["score"], 0)
+        
+        self.write_source([
+            {"name": "燕麦", "score": 10, "reason": "含有β-葡聚糖"},
+            {"name": "藜麦", "score": 9, "reason": "完整蛋白质来源"},
+        ], [], mtime_offset=10 ** 9)
+        
+        self.assertEqual(analyzer.get_ingredient_info("藜麦")["score"], 9)
+        self.assertIsNot(database.current(), old_snapshot)
+        # Snapshots held by in-flight requests stay readable
+        self.assertEqual(old_snapshot.table.ingredient(1)[0], "白砂糖")
+    
+    def test_replaced_snapshot_is_freed_without_gc(self):
+        """Test that a replaced snapshot and its mapping go away by reference counting alone"""
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=0)
+        snapshot = database.current()
+        snapshot.lookup("燕麦片")
+        snapshot.match("白沙糖")
+        old = weakref.ref(snapshot)
+        old_table = weakref.ref(snapshot.table)
+        del snapshot
+        
+        gc.disable()
+        try:
+            self.write_source([{"name": "藜麦", "score": 9, "reason": "完整蛋白质来源"}], [],
+                              mtime_offset=10 ** 9)
+            database.current()
+            self.assertIsNone(old())
+            self.assertIsNone(old_table())
+        finally:
+            gc.enable()
+    
+    def test_broken_update_keeps_last_snapshot(self):
+        """Test that an invalid source does not replace the live snapshot"""
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=0)
+        snapshot = database.current()
+        
+        with open(self.source_path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        stat = os.stat(self.source_path)
+        os.utime(self.source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        
+        self.assertIs(database.current(), snapshot)
+    
+    def test_reload_check_is_throttled(self):
+        """Test that files are not re-checked before check_interval elapses"""
+        database = IngredientDatabase(self.database_path, self.source_path, check_interval=3600)
+        snapshot = database.current()
+        
+        self.write_source([{"name": "藜麦", "score": 9, "reason": ""}], [], mtime_offset=10 ** 9)
+        self.assertIs(database.current(), snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
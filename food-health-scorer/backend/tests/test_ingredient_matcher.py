@@ -0,0 +1,230 @@
+import unittest
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.ingredient_matcher import (
+    BOUNDARY, FuzzyIndex, IngredientMatcher, SubstringIndex, bounded_edit_distance, normalize
+)
+
+
+def linear_scan(ingredient, ingredient_terms, additive_terms):
+    """Reference implementation: the original per-dictionary substring loop"""
+    ingredient_rank = next((rank for rank, term in enumerate(ingredient_terms) if term in ingredient), None)
+    additive_rank = next((rank for rank, term in enumerate(additive_terms) if term in ingredient), None)
+    return ingredient_rank, additive_rank
+
+
+class TestIngredientMatcher(unittest.TestCase):
+    """Test cases for IngredientMatcher class"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.analyzer = FoodAnalyzer()
+        self.ingredient_terms = list(self.analyzer.ingredient_data)
+        self.additive_terms = list(self.analyzer.concerning_additives)
+    
+    def test_dictionary_order_wins(self):
+        """Test that the earliest dictionary entry wins, not the longest or leftmost hit"""
+        matcher = IngredientMatcher(["糖", "白砂糖"], [])
+        self.assertEqual(matcher.match("白砂糖")[0], 0)
+        
+        matcher = IngredientMatcher(["白砂糖", "糖"], [])
+        self.assertEqual(matcher.match("白砂糖")[0], 0)
+        self.assertEqual(matcher.match("冰糖")[0], 1)
+    
+    def test_terms_found_through_failure_links(self):
+        """Test that terms ending inside a longer partial match are reported"""
+        matcher = IngredientMatcher(["高果糖玉米糖浆", "玉米"], ["果糖"])
+        self.assertEqual(matcher.match("高果糖浆"), (None, 0))
+        self.assertEqual(matcher.match("高果糖玉米淀粉"), (1, 0))
+    
+    def test_no_match(self):
+        """Test that unknown ingredients return no ranks"""
+        matcher = IngredientMatcher(["燕麦"], ["甜蜜素"])
+        self.assertEqual(matcher.match("未知配料"), (None, None))
+        self.assertEqual(matcher.match(""), (None, None))
+    
+    def test_empty_term_rejected(self):
+        """Test that empty dictionary terms are rejected"""
+        with self.assertRaises(ValueError):
+            IngredientMatcher([""], [])
+    
+    def test_aliases_resolve_to_canonical_ranks(self):
+        """Test that an alias reports what its canonical name would"""
+        matcher = IngredientMatcher(
+            ["糖", "小麦粉", "面粉", "全麦粉", "山梨酸钾"], ["山梨酸"],
+            [("wheat flour", "小麦粉"), ("flour", "面粉"), ("whole wheat flour", "全麦粉"),
+             ("E202", "山梨酸钾"), ("potassium sorbate", "山梨酸钾")]
+        )
+        self.assertEqual(matcher.match("Potassium Sorbate"), (4, 0))
+        self.assertEqual(matcher.match("防腐剂（E202）"), (4, 0))
+        self.assertEqual(matcher.match("WHEAT FLOUR"), (1, None))
+        # The longer alias wins over the shorter ones it contains
+        self.assertEqual(matcher.match("Whole Wheat Flour"), (3, None))
+    
+    def test_alias_word_boundaries(self):
+        """Test that ASCII aliases only match whole words, in any spelling"""
+        matcher = IngredientMatcher(["山梨酸钾"], [], [("E202", "山梨酸钾")])
+        for text in ["E202", "e202", "E 202", "E-202", "山梨酸钾E202", "(E202)"]:
+            self.assertEqual(matcher.match(text), (0, None), text)
+        for text in ["E2020", "E20", "XE202", "INS 202"]:
+            self.assertEqual(matcher.match(text), (None, None), text)
+    
+    def test_alias_to_unknown_name_rejected(self):
+        """Test that aliases must refer to a known name"""
+        with self.assertRaises(ValueError):
+            IngredientMatcher(["燕麦"], [], [("oats", "藜麦")])
+    
+    def test_inline_normalisation_matches_normalize(self):
+        """Test that the fused scan agrees with normalize() followed by a substring scan"""
+        terms = ["白砂糖", "聚山梨酯80", "sugar", "80", "E", "糖"]
+        matcher = IngredientMatcher(terms, [])
+        normalized_terms = [normalize(term).strip(BOUNDARY) for term in terms]
+        
+        rng = random.Random(9)
+        pieces = ["白", "砂", "糖", "聚山梨酯", "8", "0", "E", "e", "SUGAR", "sugar", " ", "-", "（", "、", "x"]
+        for _ in range(1000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+            self.assertEqual(
+                matcher.match(text),
+                linear_scan(normalize(text), normalized_terms, []),
+                f"Mismatch for {text!r}"
+            )
+    
+    def test_matches_linear_scan_on_database(self):
+        """Test that the automaton agrees with the linear scan on every known term and mixtures"""
+        matcher = self.analyzer.matcher
+        samples = self.ingredient_terms + self.additive_terms + ["未知配料", "水", "食品添加剂（山梨酸钾）"]
+        
+        rng = random.Random(42)
+        vocabulary = self.ingredient_terms + self.additive_terms
+        for _ in range(500):
+            samples.append("".join(rng.sample(vocabulary, rng.randint(1, 3))))
+        
+        for sample in samples:
+            self.assertEqual(
+                matcher.match(sample),
+                linear_scan(sample, self.ingredient_terms, self.additive_terms),
+                f"Mismatch for {sample}"
+            )
+
+
+class TestSubstringIndex(unittest.TestCase):
+    """Test cases for SubstringIndex class"""
+    
+    def test_first_containing_term(self):
+        """Test that the earliest term containing the query is returned"""
+        index = SubstringIndex(["白砂糖", "果葡糖浆", "糖"])
+        self.assertEqual(index.first_containing("糖"), 0)
+        self.assertEqual(index.first_containing("糖浆"), 1)
+        self.assertEqual(index.first_containing("葡糖"), 1)
+        self.assertIsNone(index.first_containing("蜂蜜"))
+    
+    def test_matches_brute_force(self):
+        """Test that the index agrees with a brute-force scan over every substring"""
+        rng = random.Random(7)
+        alphabet = "糖盐油酸钠钾"
+        terms = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))) for _ in range(60)]
+        index = SubstringIndex(terms)
+        
+        queries = {term[i:j] for term in terms for i in range(len(term)) for j in range(i + 1, len(term) + 1)}
+        queries.update("".join(rng.choice(alphabet) for _ in range(3)) for _ in range(200))
+        for query in queries:
+            expected = next((rank for rank, term in enumerate(terms) if query in term), None)
+            self.assertEqual(index.first_containing(query), expected, f"Mismatch for {query}")
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    """Test cases for FuzzyIndex class"""
+    
+    def test_ocr_near_misses(self):
+        """Test that single-character OCR errors resolve to the intended term"""
+        index = FuzzyIndex(["白砂糖", "山梨酸钾", "麦芽糊精"])
+        self.assertEqual(index.search("白沙糖"), (0, 1))
+        self.assertEqual(index.search("山梨酸钟"), (1, 1))
+        self.assertEqual(index.search("麦芽精"), (2, 1))
+        self.assertEqual(index.search("食品添加剂（山梨酸钟）"), (1, 1))
+        self.assertEqual(index.search("麦芽糊精12.5%"), (2, 0))
+    
+    def test_bounds(self):
+        """Test that distant, short and overlong queries do not match"""
+        index = FuzzyIndex(["白砂糖", "燕麦"])
+        self.assertIsNone(index.search("黑沙糖"))
+        self.assertIsNone(index.search("燕窝"))
+        self.assertIsNone(index.search("白砂糖白砂糖"))
+        self.assertIsNone(index.search(""))
+    
+    def test_short_terms_need_confusable_glyphs(self):
+        """Test that short terms only match through look-alike glyphs and known words never match"""
+        index = FuzzyIndex(["柠檬黄", "苯甲酸", "麦芽糊精", "山梨酸钾"], min_length=4,
+                           confusables=["主甲"], exclude=["山梨酸钠"])
+        self.assertEqual(index.search("苯主酸"), (1, 1))
+        self.assertIsNone(index.search("柠檬汁"))
+        self.assertIsNone(index.search("苯乙酸"))
+        self.assertEqual(index.search("麦芽精"), (2, 1))
+        self.assertIsNone(index.search("山梨酸钠"))
+        self.assertEqual(index.search("山梨酸钟"), (3, 1))
+    
+    def test_closest_then_first_term_wins(self):
+        """Test that the smallest distance wins, then dictionary order"""
+        index = FuzzyIndex(["果葡糖浆", "果糖糖浆", "葡萄糖浆"])
+        self.assertEqual(index.search("果葡糖浆"), (0, 0))
+        self.assertEqual(index.search("果萄糖浆"), (0, 1))
+        self.assertEqual(index.search("葡糖糖浆"), (1, 1))
+        self.assertEqual(index.search("葡萄糖浆"), (2, 0))
+    
+    def test_matches_brute_force(self):
+        """Test that the index agrees with an exhaustive edit-distance scan"""
+        rng = random.Random(3)
+        alphabet = "糖盐油酸钠钾精粉"
+        terms = ["".join(rng.choice(alphabet) for _ in range(rng.randint(2, 6))) for _ in range(200)]
+        index = FuzzyIndex(terms, max_distance=2)
+        
+        for _ in range(300):
+            query = "".join(rng.choice(alphabet) for _ in range(rng.randint(3, 7)))
+            candidates = [
+                (bounded_edit_distance(query, term, 2), rank)
+                for rank, term in enumerate(terms) if len(term) >= 3
+            ]
+            expected = min((c for c in candidates if c[0] <= 2), default=None)
+            self.assertEqual(index.search(query), expected[::-1] if expected else None, query)
+
+
+class TestIngredientLookup(unittest.TestCase):
+    """Test cases for the indexed FoodAnalyzer.get_ingredient_info"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.analyzer = FoodAnalyzer()
+    
+    def reference_info(self, ingredient):
+        """The original linear get_ingredient_info lookup: (score, is_concerning)"""
+        score = next(
+            (known_score for known, known_score in self.analyzer.ingredient_scores.items()
+             if known in ingredient or ingredient in known),
+            0
+        )
+        return score, any(additive in ingredient for additive in self.analyzer.concerning_additives)
+    
+    def test_matches_linear_lookup(self):
+        """Test that the indexed lookup agrees with the linear bidirectional scan"""
+        terms = list(self.analyzer.ingredient_data) + list(self.analyzer.concerning_additives)
+        samples = terms + [term[1:] for term in terms] + [term[:-1] for term in terms]
+        samples += ["未知配料", "食品添加剂（山梨酸钾）", "糖浆", "油"]
+        for sample in samples:
+            info = self.analyzer.get_ingredient_info(sample)
+            self.assertEqual((info["score"], info["is_concerning"]), self.reference_info(sample), sample)
+    
+    def test_bulk_lookup(self):
+        """Test that the bulk lookup returns one result per name, in order"""
+        names = ["燕麦", "甜蜜素", "未知配料", "燕麦"]
+        results = self.analyzer.get_ingredients_info(names)
+        self.assertEqual([result["ingredient"] for result in results], names)
+        self.assertEqual(results, [self.analyzer.get_ingredient_info(name) for name in names])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingredient_parser import extract_ingredients, flatten_ingredients, parse_ingredients
+
+
+class TestIngredientParser(unittest.TestCase):
+    """Test cases for the single-pass ingredient list parser"""
+
+    def test_flat_list(self):
+        """Test plain lists with mixed separators"""
+        self.assertEqual(extract_ingredients("配料：小麦粉，白砂糖、食用盐; 水"),
+                         ["小麦粉", "白砂糖", "食用盐", "水"])
+        self.assertEqual(extract_ingredients("Ingredients: Wheat Flour, Sugar, Palm Oil"),
+                         ["Wheat Flour", "Sugar", "Palm Oil"])
+
+    def test_nested_lists(self):
+        """Test bracketed sub-ingredient lists at several depths"""
+        entries = parse_ingredients(
+            "配料：小麦粉，巧克力（可可液块、白砂糖（甘蔗糖））15%，食品添加剂（碳酸氢钠、柠檬酸）"
+        )
+        self.assertEqual([entry["name"] for entry in entries], ["小麦粉", "巧克力", "食品添加剂"])
+
+        chocolate = entries[1]
+        self.assertEqual(chocolate["percentage"], 15.0)
+        self.assertEqual([sub["name"] for sub in chocolate["sub_ingredients"]], ["可可液块", "白砂糖"])
+        self.assertEqual(chocolate["sub_ingredients"][1]["sub_ingredients"][0]["name"], "甘蔗糖")
+        self.assertEqual([sub["name"] for sub in entries[2]["sub_ingredients"]], ["碳酸氢钠", "柠檬酸"])
+
+        self.assertEqual(flatten_ingredients(entries),
+                         ["小麦粉", "巧克力", "可可液块", "白砂糖", "甘蔗糖", "食品添加剂", "碳酸氢钠", "柠檬酸"])
+
+    def test_percentages(self):
+        """Test percentages inside, after and between ingredients"""
+        entries = parse_ingredients("配料：鸡蛋（含量≥10%），牛奶 12.5%，水")
+        self.assertEqual([(entry["name"], entry["percentage"]) for entry in entries],
+                         [("鸡蛋", 10.0), ("牛奶", 12.5), ("水", None)])
+        self.assertEqual(entries[0]["sub_ingredients"], [])
+
+        self.assertEqual(extract_ingredients("小麦粉50% 白砂糖20%"), ["小麦粉", "白砂糖"])
+
+    def test_trailing_name_without_percentage(self):
+        """Test that a last ingredient without a percentage is kept"""
+        entries = parse_ingredients("配料：小麦粉50% 白砂糖20% 植物油")
+        self.assertEqual([(entry["name"], entry["percentage"]) for entry in entries],
+                         [("小麦粉", 50.0), ("白砂糖", 20.0), ("植物油", None)])
+        self.assertEqual(extract_ingredients("配料：猪肉90% 淀粉"), ["猪肉", "淀粉"])
+        self.assertEqual(extract_ingredients("配料：50%小麦粉"), ["小麦粉"])
+
+    def test_unbalanced_brackets(self):
+        """Test that stray or unclosed brackets do not lose ingredients"""
+        self.assertEqual(extract_ingredients("配料：水，乳化剂（单甘酯、蔗糖酯"), ["水", "乳化剂", "单甘酯", "蔗糖酯"])
+        self.assertEqual(extract_ingredients("配料：水），（碳酸氢钠、柠檬酸）"), ["水", "碳酸氢钠", "柠檬酸"])
+
+    def test_section_boundaries(self):
+        """Test that the list starts at the marker and stops at the next section"""
+        text = "营养成分表 能量 1800kJ\n配料表：小麦粉，白砂糖\n植物油\n净含量：100g\n保质期：12个月"
+        self.assertEqual(extract_ingredients(text), ["小麦粉", "白砂糖 植物油"])
+
+        # Only the marker line and the 5 lines after it belong to the list
+        text = "配料：小麦粉，\n" + "\n" * 4 + "白砂糖，\n食用盐"
+        self.assertEqual(extract_ingredients(text), ["小麦粉", "白砂糖"])
+
+    def test_custom_markers_and_separators(self):
+        """Test caller-supplied markers and separators"""
+        self.assertEqual(extract_ingredients("Zutaten: Mehl | Zucker", ["zutaten"], ["|", ":"]), ["Mehl", "Zucker"])
+
+    def test_no_list(self):
+        """Test texts without an ingredient list"""
+        self.assertEqual(extract_ingredients(""), [])
+        self.assertEqual(extract_ingredients("这是一个没有配料表的文本"), [])
+        self.assertEqual(parse_ingredients("配料：" + "很长的一段没有分隔符的文字" * 5 + "，水"),
+                         [{"name": "水", "percentage": None, "sub_ingredients": []}])
+
+
+if __name__ == '__main__':
+    unittest.main()
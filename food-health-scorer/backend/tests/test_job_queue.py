@@ -0,0 +1,169 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from utils.job_queue import (
+    FAILED, SUCCEEDED, InvalidCallbackURL, JobQueue, JobQueueFull, post_callback, validate_callback_url
+)
+
+
+def staged_job(value, release=None, on_stage=None):
+    """Job function reporting two stages; blocks on release between them"""
+    on_stage("ocr")
+    if release is not None:
+        release.wait(5)
+    on_stage("analysis")
+    if value is None:
+        raise ValueError("no value")
+    return {"value": value}
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test cases for the bounded background job queue"""
+
+    def setUp(self):
+        self.callbacks = []
+        self.queue = JobQueue(workers=2, max_pending=3, result_ttl=60, callback=self.record_callback)
+
+    def record_callback(self, url, job):
+        self.callbacks.append((url, job, threading.current_thread().name))
+
+    def tearDown(self):
+        self.queue.shutdown()
+
+    def wait(self, job_id, timeout=5):
+        return asyncio.run(self.queue.wait(job_id, timeout))
+
+    def test_result(self):
+        """Test that a finished job holds its result and last stage"""
+        job = self.queue.submit("text", staged_job, 42)
+        job = self.wait(job.id)
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.result, {"value": 42})
+        self.assertEqual(job.stage, "analysis")
+        self.assertEqual(self.queue.pending, 0)
+        self.assertEqual(job.to_dict()["job_id"], job.id)
+
+    def test_failure(self):
+        """Test that exceptions mark the job failed"""
+        job = self.wait(self.queue.submit("text", staged_job, None).id)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "no value")
+        self.assertIsNone(job.result)
+
+    def test_running_stage(self):
+        """Test that a running job reports its current stage"""
+        release = threading.Event()
+        job = self.queue.submit("image", staged_job, 1, release)
+        deadline = time.time() + 5
+        while job.stage is None and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.queue.get(job.id).stage, "ocr")
+        self.assertFalse(job.finished)
+        release.set()
+        self.assertEqual(self.wait(job.id).status, SUCCEEDED)
+
+    def test_wait_timeout(self):
+        """Test that long-polling returns the unfinished job after the timeout"""
+        release = threading.Event()
+        job = self.queue.submit("image", staged_job, 1, release)
+        start = time.time()
+        self.assertFalse(self.wait(job.id, 0.2).finished)
+        self.assertLess(time.time() - start, 2)
+        self.assertEqual(job._waiters, [])
+        release.set()
+
+    def test_queue_full(self):
+        """Test that submissions beyond max_pending are rejected"""
+        release = threading.Event()
+        jobs = [self.queue.submit("image", staged_job, i, release) for i in range(3)]
+        with self.assertRaises(JobQueueFull):
+            self.queue.submit("image", staged_job, 3, release)
+        release.set()
+        for job in jobs:
+            self.assertEqual(self.wait(job.id).status, SUCCEEDED)
+        self.assertEqual(self.queue.pending, 0)
+        self.queue.submit("image", staged_job, 3)
+
+    def test_unknown_and_expired(self):
+        """Test that unknown and expired jobs are not returned"""
+        self.assertIsNone(self.queue.get("missing"))
+        self.assertIsNone(self.wait("missing"))
+        queue = JobQueue(workers=1, max_pending=1, result_ttl=0.05)
+        try:
+            job = asyncio.run(queue.wait(queue.submit("text", staged_job, 1).id, 5))
+            self.assertTrue(job.finished)
+            time.sleep(0.1)
+            self.assertIsNone(queue.get(job.id))
+        finally:
+            queue.shutdown()
+
+    def test_callback(self):
+        """Test that the callback receives the finished job"""
+        job = self.queue.submit("text", staged_job, 7, callback_url="https://example.com/hook")
+        self.wait(job.id)
+        deadline = time.time() + 5
+        while not self.callbacks and time.time() < deadline:
+            time.sleep(0.01)
+        url, payload, thread_name = self.callbacks[0]
+        self.assertEqual(url, "https://example.com/hook")
+        self.assertTrue(thread_name.startswith("job-callback"), thread_name)
+        self.assertEqual(payload["status"], SUCCEEDED)
+        self.assertEqual(payload["result"], {"value": 7})
+
+    def test_callback_url_validation(self):
+        """Test that only absolute http(s) callback URLs on allowed hosts are accepted"""
+        allowed = {"hooks.example.com"}
+        self.assertEqual(validate_callback_url("https://hooks.example.com/done", allowed),
+                         "https://hooks.example.com/done")
+        for url in ("ftp://hooks.example.com/hook", "/relative/hook", "https://", "javascript:alert(1)",
+                    "https://example.com/hook"):
+            with self.assertRaises(InvalidCallbackURL, msg=url):
+                validate_callback_url(url, allowed)
+
+    def test_callbacks_disabled_by_default(self):
+        """Test that no callback URL is accepted without an allowlist"""
+        with self.assertRaises(InvalidCallbackURL):
+            validate_callback_url("https://hooks.example.com/done", set())
+
+    def test_any_public_host(self):
+        """Test that the wildcard allowlist still rejects internal addresses"""
+        self.assertEqual(validate_callback_url("http://93.184.216.34/done", {"*"}), "http://93.184.216.34/done")
+        for url in ("http://localhost:9000/done", "http://127.0.0.1/done", "http://10.0.0.8/done",
+                    "http://192.168.1.1/done", "http://169.254.169.254/latest/meta-data", "http://[::1]/done"):
+            with self.assertRaises(InvalidCallbackURL, msg=url):
+                validate_callback_url(url, {"*"})
+
+    def test_any_public_host_delivery_is_pinned(self):
+        """Test that the callback connects to the checked address, not a second resolution"""
+        answers = iter(["93.184.216.34", "127.0.0.1"])
+        sent = []
+
+        def getaddrinfo(host, *args, **kwargs):
+            return [(2, 1, 6, "", (next(answers), 0))]
+
+        def send(adapter, request, **kwargs):
+            pool = adapter.poolmanager.connection_from_url(request.url)
+            sent.append((request.url, request.headers["Host"], getattr(pool, "assert_hostname", None)))
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+        with patch("utils.job_queue.JOB_CALLBACK_HOSTS", {"*"}), \
+                patch("utils.job_queue.socket.getaddrinfo", side_effect=getaddrinfo), \
+                patch("requests.adapters.HTTPAdapter.send", send):
+            post_callback("https://hooks.example.com:8443/done?id=1", {"job_id": "j1"})
+
+        self.assertEqual(sent, [("https://93.184.216.34:8443/done?id=1", "hooks.example.com:8443",
+                                 "hooks.example.com")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+import sys
+import os
+import subprocess
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from utils.model_loader import BackgroundLoader, NOT_STARTED, LOADING, READY, FAILED, DISABLED
+
+
+class StubPool:
+    """Stands in for the loaded OCRProcessPool"""
+
+    def statistics(self):
+        return {"pending": 0, "ocr_passes": {"images": 3, "full_passes": 3, "region_passes": 1,
+                                             "average_passes": 1.33}}
+
+
+class TestBackgroundLoader(unittest.TestCase):
+    """Test cases for BackgroundLoader and the /ready endpoint"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.release = threading.Event()
+        self.original_loader = main.ocr_loader
+
+    def tearDown(self):
+        """Release blocked loaders and restore the app's loader"""
+        self.release.set()
+        main.ocr_loader = self.original_loader
+
+    def blocking_factory(self):
+        self.release.wait(5)
+        return "model"
+
+    def blocking_pool_factory(self):
+        self.release.wait(5)
+        return StubPool()
+
+    def failing_factory(self):
+        raise RuntimeError("model files missing")
+
+    def test_load_lifecycle(self):
+        """Test the loading -> ready transition"""
+        loader = BackgroundLoader("test", self.blocking_factory)
+        self.assertEqual(loader.state, NOT_STARTED)
+
+        self.assertTrue(loader.start())
+        self.assertFalse(loader.start())
+        self.assertEqual(loader.status()["status"], LOADING)
+        self.assertIsNone(loader.get())
+
+        self.release.set()
+        self.assertEqual(loader.wait(5), "model")
+        status = loader.status()
+        self.assertEqual(status["status"], READY)
+        self.assertIn("elapsed", status)
+        self.assertNotIn("error", status)
+
+    def test_load_failure(self):
+        """Test that a raising factory marks the load as failed"""
+        loader = BackgroundLoader("test", self.failing_factory)
+        loader.start()
+        self.assertIsNone(loader.wait(5))
+        status = loader.status()
+        self.assertEqual(status["status"], FAILED)
+        self.assertEqual(status["error"], "model files missing")
+
+    def test_ready_endpoint(self):
+        """Test that /ready reports 503 until the model is loaded, while other routes serve"""
+        main.ocr_loader = BackgroundLoader("local_ocr", self.blocking_pool_factory)
+        main.ocr_loader.start()
+        client = TestClient(main.app)
+
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], LOADING)
+        self.assertEqual(client.get("/health").status_code, 200)
+
+        self.release.set()
+        main.ocr_loader.wait(5)
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["components"]["local_ocr"]["status"], READY)
+        self.assertEqual(response.json()["components"]["local_ocr"]["statistics"], StubPool().statistics())
+
+    def test_ready_endpoint_failed(self):
+        """Test that /ready reports a failed load with its error"""
+        main.ocr_loader = BackgroundLoader("local_ocr", self.failing_factory)
+        main.ocr_loader.start()
+        main.ocr_loader.wait(5)
+
+        response = TestClient(main.app).get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], FAILED)
+        self.assertIn("error", response.json()["components"]["local_ocr"])
+
+    def test_ready_endpoint_disabled(self):
+        """Test that a switched-off local OCR does not hold back readiness"""
+        main.ocr_loader = BackgroundLoader("local_ocr", self.failing_factory)
+        self.assertTrue(main.ocr_loader.disable())
+        self.assertFalse(main.ocr_loader.start())
+
+        response = TestClient(main.app).get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["components"]["local_ocr"]["status"], DISABLED)
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test that importing the app does not pull in optional heavy dependencies"""
+
+    def test_main_import_is_lazy(self):
+        """Test that openai, requests and the local OCR stack load on first use only"""
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = (
+            "import sys, main; "
+            "print('loaded:', [m for m in ('openai', 'requests', 'easyocr', 'torch', 'cv2') if m in sys.modules])"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True, check=True
+        ).stdout
+        self.assertIn("loaded: []", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
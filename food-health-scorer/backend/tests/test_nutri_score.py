@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from models.nutri_score import NutriScore
+from utils.nutrition_parser import NutritionFacts, parse_nutrition_facts
+
+
+class TestNutriScore(unittest.TestCase):
+    """Test cases for the Nutri-Score engine"""
+
+    def setUp(self):
+        self.engine = NutriScore()
+
+    def test_biscuit_is_grade_e(self):
+        """Test a sweet, fatty biscuit"""
+        facts = NutritionFacts(energy_kj=1850, protein_g=6.8, saturated_fat_g=9.0,
+                               sugar_g=28.0, sodium_mg=350)
+        result = self.engine.points(facts)
+        # energy 5 + sugar 6 + saturated fat 8 + sodium 3 = 22; protein not counted
+        self.assertEqual(result["negative_points"], 22)
+        self.assertFalse(result["protein_counted"])
+        self.assertEqual(result["points"], 22)
+        self.assertEqual(result["grade"], "E")
+        self.assertLess(result["score"], 20)
+
+    def test_oats_is_grade_a(self):
+        """Test a high-fibre, low-sugar food"""
+        facts = NutritionFacts(energy_kj=1500, protein_g=13.0, saturated_fat_g=1.2,
+                               sugar_g=1.0, fiber_g=10.0, sodium_mg=5)
+        result = self.engine.points(facts)
+        # energy 4 + saturated fat 1 = 5 negative, fibre 5 + protein 5 positive
+        self.assertEqual(result["points"], -5)
+        self.assertEqual(result["grade"], "A")
+        self.assertGreaterEqual(result["score"], 80)
+
+    def test_beverages(self):
+        """Test beverage thresholds and grades"""
+        cola = NutritionFacts(energy_kj=180, sugar_g=10.6, sodium_mg=10, basis="100ml")
+        result = self.engine.points(cola)
+        self.assertEqual(result["points"], 6 + 8)
+        self.assertEqual(result["grade"], "E")
+
+        water = NutritionFacts(energy_kj=0, sodium_mg=2, basis="100ml")
+        self.assertEqual(self.engine.points(water)["grade"], "B")
+        self.assertEqual(self.engine.points(water, water=True)["grade"], "A")
+        self.assertEqual(self.engine.points(water, water=True)["score"], 100)
+
+    def test_fruit_veg_counts_protein(self):
+        """Test that fruit and vegetable content lets protein offset high negatives"""
+        facts = NutritionFacts(energy_kj=2000, protein_g=9.0, saturated_fat_g=6.0,
+                               sugar_g=20.0, sodium_mg=100)
+        self.assertFalse(self.engine.points(facts)["protein_counted"])
+        result = self.engine.points(facts, fruit_veg_percent=85)
+        self.assertTrue(result["protein_counted"])
+        self.assertEqual(result["components"]["fruit_veg"], 5)
+
+    def test_missing_nutrients(self):
+        """Test that nutrients absent from the label count as zero and are reported"""
+        facts = NutritionFacts(energy_kj=400, sodium_mg=100)
+        result = self.engine.points(facts)
+        self.assertIn("sugar_g", result["missing"])
+        self.assertEqual(result["components"]["sugar_g"], 0)
+
+    def test_can_score(self):
+        """Test which nutrition tables can be scored"""
+        self.assertFalse(NutriScore.can_score(None))
+        self.assertFalse(NutriScore.can_score(NutritionFacts(energy_kj=1000)))
+        self.assertFalse(NutriScore.can_score(NutritionFacts(energy_kj=1000, sodium_mg=100, basis="serving")))
+        self.assertTrue(NutriScore.can_score(NutritionFacts(energy_kj=1000, sodium_mg=100)))
+
+    def test_result_shape(self):
+        """Test that analyze returns FoodAnalyzer's keys"""
+        facts = parse_nutrition_facts("营养成分表\n项目 每100克\n能量 1850千焦\n蛋白质 6.8克\n钠 350毫克")
+        result = self.engine.analyze(["小麦粉", "白砂糖"], facts)
+        expected = set(FoodAnalyzer().analyze(["小麦粉", "白砂糖"]).keys())
+        self.assertTrue(expected.issubset(result.keys()))
+        self.assertIn("nutri_score", result)
+        self.assertTrue(result["health_points"][0].startswith("Nutri-Score"))
+
+    def test_batch_matches_scalar(self):
+        """Test that score_batch agrees with points for every product"""
+        rng = random.Random(7)
+        products, fruit_veg, water = [], [], []
+        for _ in range(300):
+            liquid = rng.random() < 0.3
+            products.append(NutritionFacts(
+                energy_kj=rng.uniform(0, 3500 if not liquid else 400),
+                protein_g=rng.choice([None, rng.uniform(0, 30)]),
+                saturated_fat_g=rng.uniform(0, 15),
+                sugar_g=rng.choice([None, rng.uniform(0, 50)]),
+                fiber_g=rng.choice([None, rng.uniform(0, 10)]),
+                sodium_mg=rng.uniform(0, 1200),
+                basis="100ml" if liquid else "100g"
+            ))
+            fruit_veg.append(rng.choice([0, 50, 70, 90]))
+            water.append(liquid and rng.random() < 0.1)
+
+        batch = self.engine.score_batch(products, fruit_veg, water)
+        for index, facts in enumerate(products):
+            single = self.engine.points(facts, fruit_veg[index], water[index])
+            self.assertEqual(batch["points"][index], single["points"])
+            self.assertEqual(batch["score"][index], single["score"])
+            self.assertEqual(batch["grade"][index], single["grade"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.food_analyzer import FoodAnalyzer
+from utils.nutrition_parser import NutritionFacts, parse_nutrition_facts
+from utils.text_normalizer import normalize_text
+
+LABEL = """产品名称：巧克力夹心饼干
+配料：小麦粉，白砂糖，植物油，碳酸氢钠
+营养成分表
+项目 每100克 NRV%
+能量 1850千焦 22%
+蛋白质 6.8克 11%
+脂肪 20.5克 34%
+—饱和脂肪 9.0克 45%
+反式脂肪 0克 0%
+碳水化合物 65.2克 22%
+—糖 28.0克
+钠 350毫克 18%
+保质期：12个月"""
+
+
+class TestNutritionParser(unittest.TestCase):
+    """Test cases for nutrition facts table parsing"""
+
+    def test_row_layout(self):
+        """Test a table OCR'd row by row"""
+        facts = parse_nutrition_facts(LABEL)
+        self.assertEqual(facts.energy_kj, 1850.0)
+        self.assertEqual(facts.protein_g, 6.8)
+        self.assertEqual(facts.fat_g, 20.5)
+        self.assertEqual(facts.saturated_fat_g, 9.0)
+        self.assertEqual(facts.trans_fat_g, 0.0)
+        self.assertEqual(facts.carbohydrate_g, 65.2)
+        self.assertEqual(facts.sugar_g, 28.0)
+        self.assertIsNone(facts.fiber_g)
+        self.assertEqual(facts.sodium_mg, 350.0)
+        self.assertEqual(facts.basis, "100g")
+        self.assertEqual(facts.nrv["sodium_mg"], 18.0)
+        self.assertNotIn("sugar_g", facts.nrv)
+
+    def test_cell_layout_per_serving(self):
+        """Test a table OCR'd one cell per line, per serving, with unit conversion"""
+        text = normalize_text("营养成分表\n项目\n每份（250ml）\nNRV%\n能量\n110kcal\n5%\n蛋白质\n8.0g\n13%\n"
+                              "脂肪\n9.0g\n15%\n碳水化合物\n12.0g\n4%\n钠\n0.15g\n8%")
+        facts = parse_nutrition_facts(text)
+        self.assertEqual(facts.basis, "100ml")
+        self.assertTrue(facts.is_liquid)
+        self.assertEqual(facts.serving_size, 250.0)
+        self.assertAlmostEqual(facts.energy_kj, 110 * 4.184 * 0.4, places=2)
+        self.assertAlmostEqual(facts.protein_g, 3.2)
+        self.assertAlmostEqual(facts.sodium_mg, 60.0)
+
+    def test_serving_without_size(self):
+        """Test that a per-serving table without a size is kept per serving"""
+        facts = parse_nutrition_facts("营养成分表 每份 能量 500kJ 脂肪 5g")
+        self.assertEqual(facts.basis, "serving")
+        self.assertFalse(facts.per_100)
+        self.assertEqual(facts.energy_kj, 500.0)
+
+    def test_english_table(self):
+        """Test English row names"""
+        facts = parse_nutrition_facts("Nutrition Facts per 100g: Energy 2000 kJ, Protein 5 g, "
+                                      "Total Fat 30 g, Saturated fat 12g, Sugars 40 g, Sodium 200 mg")
+        self.assertEqual((facts.energy_kj, facts.fat_g, facts.saturated_fat_g, facts.sugar_g, facts.sodium_mg),
+                         (2000.0, 30.0, 12.0, 40.0, 200.0))
+
+    def test_taiwanese_carbohydrate(self):
+        """Test that 醣 is read as carbohydrate, not as sugar"""
+        facts = parse_nutrition_facts(normalize_text("營養標示 每100克 熱量 1600千焦 醣類 50克 糖 30克 鈉 200毫克"))
+        self.assertEqual((facts.carbohydrate_g, facts.sugar_g, facts.sodium_mg), (50.0, 30.0, 200.0))
+        facts = parse_nutrition_facts(normalize_text("營養標示 每100克 熱量 1600千焦 醣 50克 鈉 200毫克"))
+        self.assertEqual(facts.carbohydrate_g, 50.0)
+        self.assertIsNone(facts.sugar_g)
+
+    def test_no_table(self):
+        """Test that ingredient names alone are not read as nutrients"""
+        self.assertIsNone(parse_nutrition_facts("配料：水，白砂糖 5g，碳酸氢钠"))
+        self.assertIsNone(parse_nutrition_facts(""))
+
+
+class TestNutrientRules(unittest.TestCase):
+    """Test cases for FoodAnalyzer scoring from nutrition tables"""
+
+    def setUp(self):
+        self.analyzer = FoodAnalyzer()
+        self.ingredients = ['小麦粉', '白砂糖', '植物油', '食用盐']
+
+    def test_measured_values_replace_proportions(self):
+        """Test that a measured sugar value replaces the sugar-proportion rule"""
+        without = self.analyzer.analyze(self.ingredients)
+        self.assertIn("High proportion of sugar ingredients (-15 points)", without['health_points'])
+
+        low_sugar = NutritionFacts(sugar_g=1.0, sodium_mg=50.0)
+        result = self.analyzer.analyze(self.ingredients, low_sugar)
+        self.assertNotIn("High proportion of sugar ingredients (-15 points)", result['health_points'])
+        self.assertEqual(result['score'], without['score'] + 15)
+
+    def test_penalties_from_quantities(self):
+        """Test tiered penalties and bonuses from a parsed label"""
+        result = self.analyzer.analyze(self.ingredients, parse_nutrition_facts(LABEL))
+        self.assertIn("High sugar: 28g per 100g (-15 points)", result['health_points'])
+        self.assertIn("High saturated fat: 9g per 100g (-10 points)", result['health_points'])
+        self.assertIn("Medium sodium: 350mg per 100g (-6 points)", result['health_points'])
+
+        fibre = self.analyzer.analyze(['燕麦'], NutritionFacts(fiber_g=7.0))
+        self.assertIn("High in fibre: 7g per 100g (+8 points)", fibre['health_points'])
+
+    def test_drink_thresholds(self):
+        """Test that per-100ml values use the lower drink thresholds"""
+        drink = NutritionFacts(sugar_g=12.0, basis="100ml")
+        food = NutritionFacts(sugar_g=12.0)
+        self.assertIn("High sugar: 12g per 100ml (-15 points)", self.analyzer.analyze(['水'], drink)['health_points'])
+        self.assertIn("Medium sugar: 12g per 100g (-8 points)", self.analyzer.analyze(['水'], food)['health_points'])
+
+    def test_per_serving_ignored(self):
+        """Test that values without a per-100 basis do not affect the score"""
+        serving = NutritionFacts(sugar_g=50.0, basis="serving")
+        self.assertEqual(self.analyzer.analyze(self.ingredients, serving), self.analyzer.analyze(self.ingredients))
+
+
+if __name__ == '__main__':
+    unittest.main()
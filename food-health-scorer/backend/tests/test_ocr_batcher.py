@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import Future
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from utils.ocr_batcher import MicroBatcher, readtext_many
+
+
+class FakeReader:
+    """Stands in for easyocr.Reader; each image's 'text' is its top-left pixel value"""
+
+    def __init__(self):
+        self.calls = []
+
+    def _read(self, image):
+        return [[[[0, 0], [1, 0], [1, 1], [0, 1]], str(int(image.flat[0])), 0.9]]
+
+    def readtext(self, image, **kwargs):
+        self.calls.append(("readtext", 1))
+        return self._read(image)
+
+    def readtext_batched(self, images, batch_size=1):
+        self.calls.append(("readtext_batched", len(images)))
+        assert len({image.shape for image in images}) == 1, "batched images must share a size"
+        return [self._read(image) for image in images]
+
+
+def make_image(value, height=100, width=200):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+class TestReadtextMany(unittest.TestCase):
+    """Test cases for the batched first OCR pass"""
+
+    def setUp(self):
+        self.fake = FakeReader()
+
+    def test_same_size_images_share_a_call(self):
+        """Test that same-sized images go through one readtext_batched call"""
+        results = readtext_many(self.fake, [make_image(i) for i in range(4)])
+
+        self.assertEqual([result[0][1] for result in results], ["0", "1", "2", "3"])
+        self.assertEqual(self.fake.calls, [("readtext_batched", 4)])
+
+    def test_similar_sizes_are_padded(self):
+        """Test that slightly different sizes are padded into one batch, results unchanged"""
+        results = readtext_many(self.fake, [make_image(7, 110, 190), make_image(8, 100, 200)])
+
+        self.assertEqual([result[0][1] for result in results], ["7", "8"])
+        self.assertEqual(self.fake.calls, [("readtext_batched", 2)])
+
+    def test_very_different_sizes_are_not_padded(self):
+        """Test that a small image is not padded up to a much larger one"""
+        results = readtext_many(self.fake, [make_image(2, 1000, 1000), make_image(1, 100, 100)])
+
+        self.assertEqual([result[0][1] for result in results], ["2", "1"])
+        self.assertEqual(self.fake.calls, [("readtext", 1), ("readtext", 1)])
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Test cases for MicroBatcher class"""
+
+    def setUp(self):
+        """Set up test fixtures"""
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def dispatch(self, items):
+        """Records the batch and completes it once release is set"""
+        self.batches.append(list(items))
+        future = Future()
+        threading.Thread(target=lambda: (self.release.wait(5), future.set_result(None))).start()
+        return future
+
+    def test_items_within_max_wait_share_a_batch(self):
+        """Test that items put close together are dispatched as one batch"""
+        batcher = MicroBatcher(self.dispatch, concurrency=1, max_batch_size=4, max_wait=0.2)
+        for i in range(4):
+            batcher.put(i)
+        batcher.close()
+
+        self.assertEqual(self.batches, [[0, 1, 2, 3]])
+        self.assertEqual(batcher.statistics()["mean_batch_size"], 4)
+
+    def test_max_batch_size(self):
+        """Test that batches never exceed max_batch_size"""
+        batcher = MicroBatcher(self.dispatch, concurrency=2, max_batch_size=4, max_wait=0.05)
+        for i in range(6):
+            batcher.put(i)
+        batcher.close()
+
+        self.assertEqual([len(batch) for batch in self.batches], [4, 2])
+        self.assertEqual(sorted(sum(self.batches, [])), list(range(6)))
+
+    def test_items_queue_while_consumers_are_busy(self):
+        """Test that items arriving while every consumer is busy form the next batch"""
+        self.release.clear()
+        batcher = MicroBatcher(self.dispatch, concurrency=1, max_batch_size=8, max_wait=0)
+        batcher.put("first")
+        time.sleep(0.1)
+        for i in range(3):
+            batcher.put(i)
+        time.sleep(0.1)
+        self.assertEqual(self.batches, [["first"]])
+
+        self.release.set()
+        batcher.close()
+        self.assertEqual(self.batches, [["first"], [0, 1, 2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+import sys
+import os
+import asyncio
+import time
+from concurrent.futures.process import BrokenProcessPool
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr_pool import OCRProcessPool, OCRPoolBusy
+
+
+class FakeProcessor:
+    """Stands in for ImageProcessor in the worker processes"""
+
+    images = 0
+
+    def extract_text(self, image_path):
+        # Counted as one image read in one full pass
+        self.images += 1
+        return f"配料：{os.path.basename(image_path)}", True, None
+
+    def pass_statistics(self):
+        return {"images": self.images, "full_passes": self.images, "region_passes": 0}
+
+    def extract_text_batch(self, image_paths):
+        # The error slot reports the batch size, so tests can see batches form
+        return [(f"配料：{os.path.basename(path)}", True, len(image_paths)) for path in image_paths]
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+        return os.getpid()
+
+    def thread_limit(self):
+        return os.environ.get("OMP_NUM_THREADS")
+
+    def crash(self):
+        os._exit(1)
+
+
+def build_fake_processor():
+    return FakeProcessor()
+
+
+def build_broken_processor():
+    raise RuntimeError("EasyOCR initialization failed")
+
+
+class TestOCRProcessPool(unittest.TestCase):
+    """Test cases for OCRProcessPool class"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Spawning workers is slow, so the tests share one pool"""
+        cls.pool = OCRProcessPool(workers=2, threads_per_worker=1, max_pending=2,
+                                  processor_factory=build_fake_processor)
+        cls.workers_started = cls.pool.warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_warm_up_starts_every_worker(self):
+        """Test that warm_up waits for all workers"""
+        self.assertEqual(self.workers_started, 2)
+
+    def test_submit(self):
+        """Test running a processor method in a worker"""
+        result = self.pool.submit("extract_text", "/tmp/label.jpg").result(10)
+        self.assertEqual(result, ("配料：label.jpg", True, None))
+        self.assertEqual(self.pool.pending, 0)
+
+    def test_run_from_event_loop(self):
+        """Test the awaitable interface used by async routes"""
+        async def analyze():
+            return await asyncio.gather(*(self.pool.run("extract_text", f"{i}.jpg") for i in range(2)))
+
+        results = asyncio.run(analyze())
+        self.assertEqual([text for text, _, _ in results], ["配料：0.jpg", "配料：1.jpg"])
+
+    def test_thread_limit_in_worker(self):
+        """Test that workers are pinned to threads_per_worker"""
+        self.assertEqual(self.pool.submit("thread_limit").result(10), "1")
+
+    def test_bounded_queue(self):
+        """Test that submissions beyond max_pending are rejected"""
+        futures = [self.pool.submit("sleep", 0.3) for _ in range(2)]
+        with self.assertRaises(OCRPoolBusy):
+            self.pool.submit("sleep", 0)
+        for future in futures:
+            future.result(10)
+        self.assertEqual(self.pool.pending, 0)
+        self.pool.submit("sleep", 0).result(10)
+
+    def test_extract_text_jobs_are_batched(self):
+        """Test that concurrent extract_text jobs reach a worker as one batch"""
+        pool = OCRProcessPool(workers=1, processor_factory=build_fake_processor, max_batch_size=4, max_wait=0.5)
+        try:
+            pool.warm_up()
+            futures = [pool.submit("extract_text", f"{i}.jpg") for i in range(4)]
+            results = [future.result(10) for future in futures]
+            self.assertEqual(results, [(f"配料：{i}.jpg", True, 4) for i in range(4)])
+            self.assertEqual(pool.statistics()["batches"], 1)
+            self.assertEqual(pool.submit("thread_limit").result(10), "1")
+            self.assertEqual(pool.pending, 0)
+        finally:
+            pool.shutdown()
+
+    def test_pass_counts_are_summed_in_parent(self):
+        """Test that pass counts recorded in the workers reach statistics()"""
+        pool = OCRProcessPool(workers=2, processor_factory=build_fake_processor)
+        try:
+            for future in [pool.submit("extract_text", f"{i}.jpg") for i in range(4)]:
+                future.result(10)
+            pool.submit("thread_limit").result(10)
+            passes = pool.statistics()["ocr_passes"]
+            self.assertEqual(passes["images"], 4)
+            self.assertEqual(passes["average_passes"], 1.0)
+        finally:
+            pool.shutdown()
+
+    def test_recovers_from_dead_worker(self):
+        """Test that a worker dying fails its job and later jobs run on a fresh executor"""
+        pool = OCRProcessPool(workers=1, processor_factory=build_fake_processor)
+        try:
+            with self.assertRaises(BrokenProcessPool):
+                pool.submit("crash").result(10)
+            self.assertEqual(pool.submit("extract_text", "after.jpg").result(10), ("配料：after.jpg", True, None))
+            self.assertEqual(pool.statistics()["restarts"], 1)
+            self.assertEqual(pool.pending, 0)
+        finally:
+            pool.shutdown()
+
+    def test_worker_init_failure(self):
+        """Test that a worker whose processor cannot be built breaks warm_up"""
+        pool = OCRProcessPool(workers=1, processor_factory=build_broken_processor)
+        try:
+            with self.assertRaises(BrokenProcessPool):
+                pool.warm_up()
+        finally:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+import io
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw, ImageFilter
+from fastapi.testclient import TestClient
+
+import main
+from utils.quality_gate import assess_quality, decode_preview
+
+
+class TestQualityGate(unittest.TestCase):
+    """Test cases for the pre-upload quality gate"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Render a phone-sized ingredient label once for all tests"""
+        label = Image.new('L', (2400, 1800), 235)
+        draw = ImageDraw.Draw(label)
+        for y in range(40, 1760, 50):
+            for x in range(40, 2360, 36):
+                draw.rectangle([x, y, x + 22, y + 28], fill=20)
+        cls.label = label
+
+    def encode(self, img, **kwargs):
+        output = io.BytesIO()
+        img.convert('RGB').save(output, format='JPEG', quality=85, **kwargs)
+        return output.getvalue()
+
+    def test_sharp_image(self):
+        """Test that a sharp, well exposed label passes"""
+        result = assess_quality(self.encode(self.label))
+        self.assertTrue(result["is_suitable"])
+        self.assertEqual(result["reason"], "图片质量良好")
+        self.assertEqual(result["image"]["width"], 2400)
+        # Decoded at reduced scale, not at full resolution
+        self.assertLess(result["metrics"]["analysis_width"], 2400)
+
+    def test_blurry_image(self):
+        """Test that a defocused shot is rejected"""
+        result = assess_quality(self.encode(self.label.filter(ImageFilter.GaussianBlur(8))))
+        self.assertFalse(result["is_suitable"])
+        self.assertEqual(result["verdicts"]["blur"], "blurry")
+        self.assertEqual(result["reason"], "图片不清晰，请重拍")
+
+    def test_dark_image(self):
+        """Test that exposure problems are reported ahead of blur"""
+        result = assess_quality(self.encode(self.label.point(lambda value: value // 10)))
+        self.assertFalse(result["is_suitable"])
+        self.assertEqual(result["verdicts"]["exposure"], "too_dark")
+        self.assertEqual(result["reason"], "图片太暗，请在光线充足的环境下重拍")
+
+    def test_truncated_upload(self):
+        """Test that the first part of a baseline JPEG is assessed on the rows it holds"""
+        data = self.encode(self.label)
+        gray, info = decode_preview(data[:len(data) // 2])
+        self.assertTrue(info["partial"])
+        self.assertLess(info["decoded_fraction"], 1.0)
+        self.assertGreater(gray.min(axis=1).max(), 0)
+        self.assertTrue(assess_quality(data[:len(data) // 2])["is_suitable"])
+
+    def test_truncated_progressive_upload(self):
+        """Test that a progressive JPEG prefix is refused"""
+        data = self.encode(self.label, progressive=True)
+        with self.assertRaises(ValueError):
+            assess_quality(data[:len(data) // 3])
+
+    def test_invalid_data(self):
+        """Test that non-image data is refused"""
+        with self.assertRaises(ValueError):
+            assess_quality(b"not an image")
+
+    def test_quality_endpoint(self):
+        """Test the /api/quality endpoint"""
+        client = TestClient(main.app)
+        thumbnail = self.label.copy()
+        thumbnail.thumbnail((1024, 1024))
+
+        response = client.post("/api/quality", files={"image": ("label.jpg", self.encode(thumbnail), "image/jpeg")})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_suitable"])
+        self.assertIn("processing_time", response.json())
+
+        response = client.post("/api/quality", files={"image": ("label.txt", b"not an image", "image/jpeg")})
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post("/api/quality", files={"image": ("label.pdf", b"%PDF-1.7", "application/pdf")})
+        self.assertEqual(response.status_code, 400)
+
+    def test_quality_endpoint_reads_only_the_start(self):
+        """Test that a large upload is checked from its first 512KB instead of being rejected"""
+        client = TestClient(main.app)
+        thumbnail = self.label.copy()
+        thumbnail.thumbnail((1024, 1024))
+        content = self.encode(thumbnail) + b"\x00" * (2 * 1024 * 1024)
+
+        response = client.post("/api/quality", files={"image": ("label.jpg", content, "image/jpeg")})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_suitable"])
+
+
+if __name__ == '__main__':
+    unittest.main()
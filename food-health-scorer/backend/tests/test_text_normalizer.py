@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ingredient_parser import extract_ingredients
+from utils.text_normalizer import normalize_text
+
+
+class TestTextNormalizer(unittest.TestCase):
+    """Test cases for OCR text normalization"""
+
+    def test_full_width(self):
+        """Test that full-width letters, digits and punctuation become ASCII"""
+        self.assertEqual(normalize_text("配料：小麦粉，白砂糖（含量≥１０．５％）；ＡＢＣ"),
+                         "配料:小麦粉,白砂糖(含量≥10.5%);ABC")
+        self.assertEqual(normalize_text("能量　100kJ"), "能量 100kJ")
+
+    def test_compatibility_characters(self):
+        """Test Kangxi radicals, squared units and half-width ideographic comma"""
+        self.assertEqual(normalize_text("⼤⾖油"), "大豆油")
+        self.assertEqual(normalize_text("钠 35㎎"), "钠 35mg")
+        self.assertEqual(normalize_text("水､糖"), "水、糖")
+
+    def test_traditional(self):
+        """Test traditional to simplified conversion of label vocabulary"""
+        self.assertEqual(normalize_text("營養成份表 鈉 碳水化合物"), "营养成分表 钠 碳水化合物")
+        self.assertEqual(normalize_text("配料：麵粉、檸檬酸、碳酸氫鈉、乳化劑"), "配料:面粉、柠檬酸、碳酸氢钠、乳化剂")
+        # 醣 (carbohydrate) stays distinct from 糖 (sugar)
+        self.assertEqual(normalize_text("醣類 50克 糖 30克"), "醣类 50克 糖 30克")
+
+    def test_spaces(self):
+        """Test that letter-spaced headings are joined and other spacing is collapsed"""
+        self.assertEqual(normalize_text("配 料：水"), "配料:水")
+        self.assertEqual(normalize_text("营 养 成 分 表"), "营养成分表")
+        self.assertEqual(normalize_text("小麦粉 糖 植物油"), "小麦粉 糖 植物油")
+        self.assertEqual(normalize_text("Wheat\t  Flour\nSugar\u200b"), "Wheat Flour\nSugar")
+
+    def test_spaced_single_character_ingredients(self):
+        """Test that spaced characters are only joined where they spell a known term"""
+        self.assertEqual(normalize_text("配料：水 糖 盐"), "配料:水 糖 盐")
+        self.assertEqual(normalize_text("配 料 水 糖 盐"), "配料 水 糖 盐")
+        self.assertEqual(normalize_text("营 养 成 分 表 项 目 能 量"), "营养成分表 项目 能量")
+        self.assertEqual(normalize_text("配 科：水"), "配料:水")
+        self.assertEqual(normalize_text(normalize_text("配 料 水 糖 盐")), "配料 水 糖 盐")
+
+    def test_confusables(self):
+        """Test known word and digit misreadings"""
+        self.assertEqual(normalize_text("配科：蛋自质 脂肋 碳水化台物"), "配料:蛋白质 脂肪 碳水化合物")
+        self.assertEqual(normalize_text("能量 1O.5kJ 3。5g 2l0mg 2O%"), "能量 10.5kJ 3.5g 210mg 20%")
+        # Letters outside numbers are untouched
+        self.assertEqual(normalize_text("Olive Oil, E330"), "Olive Oil, E330")
+
+    def test_idempotent(self):
+        """Test that normalized text is a fixed point"""
+        text = normalize_text("配 料：麵粉（６０％）、檸檬酸\n營養成份 鈉 1O㎎")
+        self.assertEqual(normalize_text(text), text)
+        self.assertEqual(normalize_text(""), "")
+
+    def test_canonical_ingredients(self):
+        """Test that traditional and full-width variants of a label parse identically"""
+        simplified = extract_ingredients(normalize_text("配料：面粉，柠檬酸（E330），食用盐"))
+        traditional = extract_ingredients(normalize_text("配 料：麵粉，檸檬酸（Ｅ３３０），食用鹽"))
+        self.assertEqual(simplified, ["面粉", "柠檬酸", "E330", "食用盐"])
+        self.assertEqual(traditional, simplified)
+
+
+if __name__ == '__main__':
+    unittest.main()
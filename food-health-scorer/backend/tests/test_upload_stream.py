@@ -0,0 +1,155 @@
+import unittest
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.upload_stream import (
+    InvalidUpload, UnsupportedUploadType, UploadTooLarge, read_multipart_file, read_raw_image,
+    sniff_image_type
+)
+
+HEADERS = {"content-type": "multipart/form-data; boundary=XyZ"}
+
+
+def multipart_body(data, content_type="image/jpeg", field="image", extra_field=True):
+    body = b"--XyZ\r\n"
+    if extra_field:
+        body += b'Content-Disposition: form-data; name="note"\r\n\r\nhello\r\n--XyZ\r\n'
+    body += (
+        f'Content-Disposition: form-data; name="{field}"; filename="label.jpg"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + b"\r\n--XyZ--\r\n"
+    return body
+
+
+class ChunkStream:
+    """Async body stream that records how much of the body was consumed"""
+
+    def __init__(self, body, chunk_size=1024):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.consumed = 0
+
+    async def __aiter__(self):
+        while self.consumed < len(self.body):
+            chunk = self.body[self.consumed:self.consumed + self.chunk_size]
+            self.consumed += len(chunk)
+            yield chunk
+
+
+def read(stream, headers=HEADERS, max_size=10000, content_types=("image/jpeg",), truncate=False):
+    return asyncio.run(read_multipart_file(headers, stream, "image", max_size, content_types, truncate))
+
+
+class TestUploadStream(unittest.TestCase):
+    """Test cases for the streaming multipart upload reader"""
+
+    def test_reads_file_field(self):
+        """Test that the file field is read and other fields are skipped"""
+        data = bytes(range(256)) * 20
+        upload = read(ChunkStream(multipart_body(data), chunk_size=100))
+        self.assertEqual(upload.field_name, "image")
+        self.assertEqual(upload.filename, "label.jpg")
+        self.assertEqual(upload.content_type, "image/jpeg")
+        self.assertEqual(bytes(upload.data), data)
+        self.assertEqual(upload.size, len(data))
+
+    def test_rejects_oversized_file_early(self):
+        """Test that reading stops as soon as the file passes the limit"""
+        stream = ChunkStream(multipart_body(b"x" * 1000000))
+        with self.assertRaises(UploadTooLarge):
+            read(stream)
+        self.assertLess(stream.consumed, 20000)
+
+    def test_rejects_declared_length(self):
+        """Test that an oversized Content-Length is rejected before reading"""
+        stream = ChunkStream(multipart_body(b"x" * 100))
+        headers = dict(HEADERS, **{"content-length": str(10 ** 9)})
+        with self.assertRaises(UploadTooLarge):
+            read(stream, headers=headers)
+        self.assertEqual(stream.consumed, 0)
+
+    def test_truncates_large_file(self):
+        """Test that truncate keeps the start of a large file and stops reading there"""
+        data = bytes(range(256)) * 4000
+        stream = ChunkStream(multipart_body(data))
+        headers = dict(HEADERS, **{"content-length": str(len(stream.body))})
+        upload = read(stream, headers=headers, truncate=True)
+        self.assertEqual(bytes(upload.data), data[:10000])
+        self.assertLess(stream.consumed, 20000)
+
+        upload = read(ChunkStream(multipart_body(data[:500])), truncate=True)
+        self.assertEqual(bytes(upload.data), data[:500])
+
+    def test_unsupported_type(self):
+        """Test that the content type is checked before the file data"""
+        stream = ChunkStream(multipart_body(b"x" * 1000000, content_type="text/plain"))
+        with self.assertRaises(UnsupportedUploadType) as context:
+            read(stream, max_size=10 ** 7)
+        self.assertEqual(context.exception.content_type, "text/plain")
+        self.assertLess(stream.consumed, 2048)
+
+    def test_invalid_bodies(self):
+        """Test non-multipart bodies, missing fields and malformed bodies"""
+        with self.assertRaises(InvalidUpload):
+            read(ChunkStream(b"{}"), headers={"content-type": "application/json"})
+        with self.assertRaises(InvalidUpload):
+            read(ChunkStream(multipart_body(b"x", field="file")))
+        with self.assertRaises(InvalidUpload):
+            read(ChunkStream(b"not a multipart body"))
+
+
+class TestRawImageUpload(unittest.TestCase):
+    """Test cases for raw binary image bodies"""
+
+    JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 5000
+
+    def read(self, stream, content_type="application/octet-stream", max_size=10000, **headers):
+        headers["content-type"] = content_type
+        return asyncio.run(read_raw_image(headers, stream, max_size, {"image/jpeg", "image/png"}))
+
+    def test_sniff_image_type(self):
+        """Test magic-byte detection of each format"""
+        self.assertEqual(sniff_image_type(self.JPEG[:12]), "image/jpeg")
+        self.assertEqual(sniff_image_type(b"\x89PNG\r\n\x1a\n\x00\x00\x00\x0d"), "image/png")
+        self.assertEqual(sniff_image_type(b"GIF89a\x01\x00\x01\x00\x00\x00"), "image/gif")
+        self.assertEqual(sniff_image_type(b"RIFF\x10\x00\x00\x00WEBP"), "image/webp")
+        self.assertEqual(sniff_image_type(b"II*\x00\x08\x00\x00\x00\x00\x00\x00\x00"), "image/tiff")
+        self.assertIsNone(sniff_image_type(b"RIFF\x10\x00\x00\x00WAVE"))
+        self.assertIsNone(sniff_image_type(b'{"image": "'))
+
+    def test_reads_body(self):
+        """Test that the body is read whole and typed by its content, not its header"""
+        upload = self.read(ChunkStream(self.JPEG, chunk_size=5), content_type="image/png")
+        self.assertEqual(bytes(upload.data), self.JPEG)
+        self.assertEqual(upload.content_type, "image/jpeg")
+
+    def test_rejects_non_image_early(self):
+        """Test that a body without an image signature is rejected after its first chunk"""
+        stream = ChunkStream(b"%PDF-1.7" + b"\x00" * 100000)
+        with self.assertRaises(UnsupportedUploadType):
+            self.read(stream, max_size=10 ** 6)
+        self.assertEqual(stream.consumed, 1024)
+
+    def test_rejects_declared_type(self):
+        """Test that JSON and form bodies are not read as images"""
+        stream = ChunkStream(self.JPEG)
+        with self.assertRaises(UnsupportedUploadType):
+            self.read(stream, content_type="application/json")
+        self.assertEqual(stream.consumed, 0)
+
+    def test_size_limits(self):
+        """Test the declared and received size limits and the empty body"""
+        with self.assertRaises(UploadTooLarge):
+            self.read(ChunkStream(self.JPEG), **{"content-length": "20000"})
+        stream = ChunkStream(self.JPEG + b"\x00" * 100000)
+        with self.assertRaises(UploadTooLarge):
+            self.read(stream)
+        self.assertLessEqual(stream.consumed, 10000 + 1024)
+        with self.assertRaises(InvalidUpload):
+            self.read(ChunkStream(b""))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import io
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import pipeline
+from api.routes_ws import router
+
+LABEL_TEXT = "配料：小麦粉、白砂糖、植物油、食用盐"
+
+
+class StubOCR:
+    def extract_ingredients_text(self, image=None, use_accurate=True, image_base64=None):
+        return LABEL_TEXT
+
+
+class StubDeepSeek:
+    def analyze_food_ingredients(self, text):
+        return {"food_name": "饼干", "ingredients": [{"name": "小麦粉"}], "score": 60}
+
+
+def label_photo():
+    pixels = np.random.default_rng(0).integers(0, 256, (400, 400, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestWebSocketAnalysis(unittest.TestCase):
+    """Test cases for the per-stage WebSocket analysis endpoint"""
+
+    def setUp(self):
+        self.saved = (pipeline.BaiduOCR, pipeline.DeepSeekAnalyzer, pipeline.incremental_analyzer.llm_factory)
+        pipeline.BaiduOCR = StubOCR
+        pipeline.DeepSeekAnalyzer = StubDeepSeek
+        pipeline.incremental_analyzer.llm_factory = StubDeepSeek
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        pipeline.BaiduOCR, pipeline.DeepSeekAnalyzer, pipeline.incremental_analyzer.llm_factory = self.saved
+
+    @staticmethod
+    def events(ws):
+        """Events of one analysis, up to the final analysis or error event"""
+        events = []
+        while not events or events[-1]["event"] not in ("analysis", "error"):
+            events.append(ws.receive_json())
+        return events
+
+    def test_image_stages(self):
+        """Test that an image analysis pushes every stage in order"""
+        with self.client.websocket_connect("/api/ws/analyze") as ws:
+            ws.send_bytes(label_photo())
+            events = self.events(ws)
+        self.assertEqual([e["event"] for e in events],
+                         ["received", "quality", "ocr", "local_score", "analysis"])
+        self.assertTrue(all(e["analysis_id"] == 1 for e in events))
+        self.assertEqual(events[0]["file_type"], "image/jpeg")
+        self.assertEqual(events[2]["text"], LABEL_TEXT)
+        self.assertIn("小麦粉", events[3]["ingredients"])
+        self.assertIsInstance(events[3]["score"], int)
+        result = events[-1]["result"]
+        self.assertEqual(result["score"], 60)
+        self.assertTrue(result["ocr_success"])
+
+    def test_text_reuses_session(self):
+        """Test that text analyses on one connection share the session"""
+        with self.client.websocket_connect("/api/ws/analyze") as ws:
+            ws.send_text(json.dumps({"text": LABEL_TEXT, "food_name": "饼干"}))
+            first = self.events(ws)
+            ws.send_text(json.dumps({"text": LABEL_TEXT + "、鸡蛋"}))
+            second = self.events(ws)
+        self.assertEqual([e["event"] for e in first], ["received", "local_score", "analysis"])
+        self.assertEqual(second[-1]["analysis_id"], 2)
+        self.assertEqual(first[-1]["result"]["food_name"], "饼干")
+        self.assertEqual(second[-1]["result"]["session_id"], first[-1]["result"]["session_id"])
+        self.assertTrue(second[-1]["result"]["incremental"])
+
+    def test_errors_keep_connection(self):
+        """Test that rejected messages report an error and the connection stays usable"""
+        with self.client.websocket_connect("/api/ws/analyze") as ws:
+            for send, detail in ((lambda: ws.send_bytes(b"%PDF-1.7"), "不支持的图片格式"),
+                                 (lambda: ws.send_text("{bad"), "无效的JSON消息"),
+                                 (lambda: ws.send_text(json.dumps({"text": "糖"})), "输入的文本内容过少")):
+                send()
+                events = self.events(ws)
+                self.assertEqual(events, [{"event": "error", "analysis_id": events[0]["analysis_id"], "detail": detail}])
+            ws.send_text(json.dumps({"text": LABEL_TEXT}))
+            self.assertEqual(self.events(ws)[-1]["event"], "analysis")
+
+    def test_strict_quality(self):
+        """Test that strict_quality stops unsuitable images before OCR"""
+        buffer = io.BytesIO()
+        Image.new("RGB", (400, 400), (5, 5, 5)).save(buffer, format="JPEG")
+        with self.client.websocket_connect("/api/ws/analyze?strict_quality=true") as ws:
+            ws.send_bytes(buffer.getvalue())
+            events = self.events(ws)
+        self.assertEqual([e["event"] for e in events], ["received", "quality", "error"])
+        self.assertFalse(events[1]["is_suitable"])
+
+
+if __name__ == '__main__':
+    unittest.main()
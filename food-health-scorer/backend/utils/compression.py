@@ -0,0 +1,141 @@
+"""
+Response compression with Accept-Encoding negotiation (brotli or gzip)
+
+An ASGI middleware like Starlette's GZipMiddleware, but negotiating brotli
+when the optional brotli package is installed and the client accepts it.
+Only complete, single-message responses of compressible types at least
+minimum_size bytes long are compressed; streamed and already-encoded
+responses, and anything that is not HTTP (WebSocket), pass through.
+"""
+
+import gzip
+import os
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip only without it
+    brotli = None
+
+# Responses smaller than this are sent uncompressed (framing overhead outweighs the gain)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE") or 500)
+GZIP_LEVEL = 6
+# Brotli quality 5 compresses JSON better than gzip -6 at a similar speed
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Quality values of an Accept-Encoding header
+
+    Args:
+        header (str): e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        Dict[str, float]: Lower-case coding -> q (1.0 when not given)
+    """
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def choose_encoding(header: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    The content coding to use for a request's Accept-Encoding, or None for identity
+
+    Prefers br over gzip at equal quality; "*" covers codings not listed.
+    """
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = codings.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP responses with the best coding the client accepts
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether to compress
+                start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                return await send(message)
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            existing = headers_dict(start)
+            if message.get("more_body", False) or len(body) < self.minimum_size or not is_compressible(existing):
+                await send(start)
+                return await send(message)
+
+            compressed = compress(body, encoding)
+            headers = [(name, value) for name, value in start["headers"] if name.lower() not in (b"content-length", b"vary")]
+            vary = existing.get(b"vary")
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def headers_dict(start) -> Dict[bytes, bytes]:
+    """Lower-case header names of a response start message -> value (last one wins)"""
+    return {name.lower(): value for name, value in start.get("headers", [])}
+
+
+def is_compressible(headers: Dict[bytes, bytes]) -> bool:
+    """Whether a response is of a compressible type and not already encoded"""
+    content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+    return b"content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
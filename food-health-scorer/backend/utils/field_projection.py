@@ -0,0 +1,112 @@
+"""
+Sparse fieldsets for analysis responses
+
+A projection is a comma-separated list of dotted field paths, e.g.
+"score,food_name,detailed_analysis.negative_aspects". Paths select keys of
+the result dict; a path into a list applies to each dict in it
+("ingredients.name"). Selected fields missing from a result are left out
+rather than reported, so one projection works across the image, text and
+Nutri-Score result shapes. Named profiles are predefined projections; the
+compact profile keeps what the miniprogram results page renders.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# Nested dict of selected keys; an empty dict selects the whole value
+FieldTree = Dict[str, "FieldTree"]
+
+MAX_FIELDS_LENGTH = 1000
+FIELD_PATH_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+PROFILES = {
+    # Everything (no projection)
+    "full": "",
+    # Score card for the miniprogram: no OCR text, detailed analysis or timing metadata
+    "compact": ",".join([
+        "food_name", "score", "ingredients", "health_points", "recommendations",
+        "ocr_success", "session_id", "nutri_score.grade", "nutri_score.points"
+    ]),
+}
+
+
+class InvalidFieldSpec(ValueError):
+    """The fields or profile parameter cannot be parsed"""
+
+
+@lru_cache(maxsize=256)
+def parse_fields(spec: str) -> FieldTree:
+    """
+    Parse a comma-separated list of dotted field paths into a FieldTree
+
+    Args:
+        spec (str): Field paths such as "score,detailed_analysis.negative_aspects"
+
+    Returns:
+        FieldTree: Selected keys; the caller must not modify it (results are cached)
+
+    Raises:
+        InvalidFieldSpec: If a path is malformed or the spec is too long
+    """
+    if len(spec) > MAX_FIELDS_LENGTH:
+        raise InvalidFieldSpec(f"fields is longer than {MAX_FIELDS_LENGTH} characters")
+
+    tree: FieldTree = {}
+    for path in spec.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        if not FIELD_PATH_PATTERN.match(path):
+            raise InvalidFieldSpec(f"Invalid field path: {path}")
+
+        node = tree
+        *parents, leaf = path.split(".")
+        for name in parents:
+            if name in node and not node[name]:
+                # The parent is already selected as a whole
+                break
+            node = node.setdefault(name, {})
+        else:
+            # Selecting a whole value replaces narrower selections inside it
+            node[leaf] = {}
+    return tree
+
+
+def resolve_projection(fields: Optional[str] = None, profile: Optional[str] = None) -> Optional[FieldTree]:
+    """
+    The FieldTree for a request's fields and profile parameters
+
+    Fields listed in fields are added to the profile's, e.g. profile=compact
+    with fields=extracted_text.
+
+    Returns:
+        FieldTree: Selected keys, or None to return the whole result
+
+    Raises:
+        InvalidFieldSpec: For an unknown profile or malformed fields
+    """
+    if profile and profile not in PROFILES:
+        raise InvalidFieldSpec(f"Unknown profile: {profile} (available: {', '.join(PROFILES)})")
+    spec = ",".join(part for part in (PROFILES.get(profile or "full"), fields) if part)
+    return parse_fields(spec) if spec else None
+
+
+def project(data: Any, tree: Optional[FieldTree]) -> Any:
+    """
+    Keep only the selected fields of a result
+
+    Args:
+        data: Result dict (or list of dicts)
+        tree (FieldTree): Selected keys, None to keep everything
+
+    Returns:
+        Any: A new dict/list holding the selected fields; selected values are shared, not copied
+    """
+    if not tree:
+        return data
+    if isinstance(data, list):
+        return [project(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {key: project(data[key], subtree) for key, subtree in tree.items() if key in data}
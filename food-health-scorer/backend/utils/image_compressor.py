@@ -0,0 +1,177 @@
+"""
+Size-targeted image compression with few encodes
+
+The naive approach re-encodes the full image at quality 95, 85, ... 30
+until it fits and then resizes once more. This module instead:
+
+- returns the input untouched when it already fits
+- makes one probe encode at PROBE_QUALITY and uses its size to choose
+  between a quality search at full resolution and a downscale. Below
+  MIN_QUALITY, JPEG artifacts hurt OCR more than a moderate downscale does.
+  When a downscale is needed, the probe also predicts the scale at which
+  PROBE_QUALITY fits
+- binary-searches quality only between bounds already known to fit or not
+- decodes JPEG sources at reduced DCT scale (Image.draft) when the target
+  is half the size or less, instead of decoding all 12 MP and resizing
+- searches with plain encodes and makes one optimize=True encode at the
+  end (optimized Huffman tables do not make the file larger)
+
+Pillow only, so it can run without OpenCV.
+"""
+
+import io
+import logging
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MAX_QUALITY = 95
+PROBE_QUALITY = 75
+# Lowest quality used; below it the image is downscaled instead
+MIN_QUALITY = 60
+# Binary search stops once the quality bounds are this close
+QUALITY_TOLERANCE = 2
+
+# Size models, measured on phone-photo-like label images: encoded size
+# grows with pixel_count ** SIZE_PIXEL_EXPONENT, and an encode at
+# MIN_QUALITY is about MIN_QUALITY_SIZE_RATIO of the PROBE_QUALITY size
+SIZE_PIXEL_EXPONENT = 0.8
+MIN_QUALITY_SIZE_RATIO = 0.7
+# Headroom on predicted scales
+SCALE_SAFETY = 0.95
+MIN_DIMENSION = 64
+
+# Formats whose size responds to the quality setting. Pillow reports many
+# phone photos (JPEG with extra frames, e.g. depth maps) as MPO
+LOSSY_FORMATS = {"JPEG", "MPO", "WEBP"}
+
+
+class _Encoder:
+    """Encodes one image in one format, keeping every result"""
+
+    def __init__(self, img: Image.Image, img_format: str):
+        self.img = img
+        self.format = img_format
+        self.results: Dict[int, bytes] = {}
+
+    def size(self, quality: int) -> int:
+        if quality not in self.results:
+            output = io.BytesIO()
+            self.img.save(output, format=self.format, quality=quality)
+            self.results[quality] = output.getvalue()
+        return len(self.results[quality])
+
+    def search(self, max_size: int, low: int, high: int) -> Optional[int]:
+        """
+        Largest quality in [low, high] (to within QUALITY_TOLERANCE) that fits,
+        where low is already known to fit; None if low does not fit either
+        """
+        if self.size(low) > max_size:
+            return None
+        best = low
+        low += 1
+        while high - low >= QUALITY_TOLERANCE:
+            quality = (low + high + 1) // 2
+            if self.size(quality) <= max_size:
+                best, low = quality, quality + 1
+            else:
+                high = quality - 1
+        return best
+
+    def final(self, quality: int, max_size: int) -> bytes:
+        output = io.BytesIO()
+        self.img.save(output, format=self.format, quality=quality, optimize=True)
+        data = output.getvalue()
+        if len(data) > max_size and quality in self.results:
+            return self.results[quality]
+        return data
+
+
+def _read(image_data: Union[bytes, BinaryIO, str]) -> bytes:
+    if isinstance(image_data, str):
+        with open(image_data, "rb") as f:
+            return f.read()
+    if isinstance(image_data, (bytes, bytearray)):
+        return bytes(image_data)
+    return image_data.read()
+
+
+def _decode(data: bytes, scale: float = 1.0) -> Image.Image:
+    """Decode at the given scale, using reduced-scale JPEG decoding when possible"""
+    img = Image.open(io.BytesIO(data))
+    img_format = img.format
+    size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+    if scale <= 0.5:
+        # JPEG picks the smallest 1/2, 1/4, 1/8 scale still >= size; no-op elsewhere
+        img.draft(img.mode, size)
+
+    # Convert to RGB if needed (removes alpha channel)
+    if img.mode == "RGBA" or (img_format in ("JPEG", "MPO") and img.mode not in ("RGB", "L", "CMYK")):
+        img = img.convert("RGB")
+    if scale < 1.0:
+        img = img.resize(size, Image.LANCZOS)
+    return img
+
+
+def compress_image(image_data: Union[bytes, BinaryIO, str], max_size: int) -> Tuple[bytes, bool, str]:
+    """
+    Compress an image to at most max_size bytes while keeping it readable for OCR
+
+    Args:
+        image_data: Image data as bytes, file-like object, or file path
+        max_size: Maximum size in bytes
+
+    Returns:
+        Tuple[bytes, bool, str]: Compressed image data, success flag, and error message if any
+    """
+    try:
+        data = _read(image_data)
+        # Parses the header only; also rejects non-image data
+        header = Image.open(io.BytesIO(data))
+        if len(data) <= max_size:
+            logger.info(f"Image already fits: {len(data) / 1024:.1f}KB <= {max_size / 1024:.1f}KB")
+            return data, True, ""
+
+        img_format = header.format or "JPEG"
+        if img_format == "MPO":
+            # Only the primary image matters for OCR; it is re-encoded as plain JPEG
+            img_format = "JPEG"
+        min_side = min(header.size)
+        lossy = img_format in LOSSY_FORMATS
+        probe_quality = PROBE_QUALITY if lossy else MAX_QUALITY
+
+        scale = 1.0
+        encodes = 0
+        while True:
+            encoder = _Encoder(_decode(data, scale), img_format)
+            probe_size = encoder.size(probe_quality)
+
+            if probe_size <= max_size:
+                # Fits: raise the quality as far as the budget allows
+                quality = encoder.search(max_size, probe_quality, MAX_QUALITY) if lossy else probe_quality
+                break
+            if lossy and probe_size * MIN_QUALITY_SIZE_RATIO <= max_size:
+                # Lowering the quality is predicted to be enough
+                quality = encoder.search(max_size, MIN_QUALITY, probe_quality - 1)
+                if quality is not None:
+                    break
+
+            # Downscale to where the probe quality is predicted to fit
+            encodes += len(encoder.results)
+            scale *= (max_size / probe_size) ** (1 / (2 * SIZE_PIXEL_EXPONENT)) * SCALE_SAFETY
+            if min_side * scale < MIN_DIMENSION:
+                return b"", False, f"无法将图片压缩到{max_size / 1024:.1f}KB以内"
+
+        compressed_data = encoder.final(quality, max_size)
+        encodes += len(encoder.results) + 1
+        logger.info(
+            f"Compressed image to {len(compressed_data) / 1024:.1f}KB "
+            f"(quality={quality}, scale={scale:.2f}, {encodes} encodes)"
+        )
+        return compressed_data, True, ""
+
+    except Exception as e:
+        logger.error(f"Error compressing image: {str(e)}")
+        return b"", False, f"图片压缩错误: {str(e)}"
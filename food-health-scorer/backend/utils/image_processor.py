@@ -3,8 +3,7 @@ import numpy as np
 import re
 import logging
 import os
-import io
-import math
+import threading
 import time
 from PIL import Image
 from typing import List, Dict, Tuple, Optional, Union, BinaryIO
@@ -12,6 +11,11 @@ from typing import List, Dict, Tuple, Optional, Union, BinaryIO
 # 导入EasyOCR替代PaddleOCR
 import easyocr
 
+from utils.image_compressor import compress_image
+from utils.ingredient_parser import INGREDIENT_MARKERS, SEPARATORS, extract_ingredients
+from utils.ocr_batcher import readtext_many
+from utils.text_normalizer import normalize_text
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,20 +35,23 @@ class ImageProcessor:
         # Set up logger
         self.logger = logging.getLogger('ImageProcessor')
         
-        # Common ingredient list markers in Chinese
-        self.ingredient_markers = [
-            "配料表", "配料", "成分", "原料", "原材料", "ingredients", "配料组成",
-            "配 料", "配  料", "配   料", "成 分", "ingredient list"
-        ]
-        
-        # Common ingredient separators
-        self.separators = [
-            "，", ",", "、", ";", "；", "/", "：", ":"
-        ]
+        # Common ingredient list markers and separators (see utils.ingredient_parser)
+        self.ingredient_markers = list(INGREDIENT_MARKERS)
+        self.separators = list(SEPARATORS)
         
         # Minimum confidence threshold for OCR
         self.min_confidence = 0.4  # EasyOCR uses 0-1 range for confidence
         
+        # A pass whose average confidence reaches this (and which contains an
+        # ingredient marker) is accepted without trying other preprocessing;
+        # regions below it are the ones re-recognised on later passes
+        self.accept_confidence = 0.75
+        
+        # OCR passes run per image, see pass_statistics(); in an OCRProcessPool
+        # worker these only cover that process, the pool sums all workers
+        self.pass_stats = {"images": 0, "full_passes": 0, "region_passes": 0}
+        self._stats_lock = threading.Lock()
+        
         # Maximum image size for processing (1MB in bytes)
         self.max_image_size = 1 * 1024 * 1024
         
@@ -56,32 +63,49 @@ class ImageProcessor:
             # 创建EasyOCR实例 - 支持中文和英文
             self.ocr = easyocr.Reader(['ch_sim', 'en'], gpu=False)
             
-            # 预热模型，确保它在服务启动时就加载
-            test_img_path = os.path.join(os.path.dirname(__file__), "../static/test_img.jpg")
-            if not os.path.exists(test_img_path):
-                # 如果测试图片不存在，创建一个简单的图片
-                from PIL import Image, ImageDraw, ImageFont
-                img = Image.new('RGB', (100, 40), color = (255, 255, 255))
-                d = ImageDraw.Draw(img)
-                d.text((10,10), "测试文字", fill=(0,0,0))
-                os.makedirs(os.path.dirname(test_img_path), exist_ok=True)
-                img.save(test_img_path)
+            # 预热模型：在内存中生成测试图片，无需写入磁盘
+            from PIL import ImageDraw
+            img = Image.new('RGB', (100, 40), color = (255, 255, 255))
+            d = ImageDraw.Draw(img)
+            d.text((10,10), "测试文字", fill=(0,0,0))
             
             # 运行一次OCR来预热模型
-            self.logger.info(f"Warming up EasyOCR with test image: {test_img_path}")
-            _ = self.ocr.readtext(test_img_path)
+            self.logger.info("Warming up EasyOCR with an in-memory test image")
+            _ = self.ocr.readtext(np.asarray(img))
             self.logger.info("EasyOCR initialized and warmed up successfully")
         except Exception as e:
             self.logger.error(f"EasyOCR initialization failed: {str(e)}")
             self.logger.error("Please check EasyOCR installation")
             self.ocr = None
     
-    def extract_text(self, image_path: str) -> Tuple[str, bool, Optional[str]]:
+    def _decode_image(self, image: Union[str, bytes]) -> Optional[np.ndarray]:
+        """
+        Decode an image once into a BGR array
+        
+        Args:
+            image: Encoded image bytes (e.g. the upload body) or a file path
+            
+        Returns:
+            numpy.ndarray: Decoded image, or None if it cannot be decoded
+        """
+        if isinstance(image, str):
+            # np.fromfile + imdecode also handles non-ASCII paths, unlike imread
+            data = np.fromfile(image, dtype=np.uint8)
+        else:
+            data = np.frombuffer(image, dtype=np.uint8)
+        if data.size == 0:
+            return None
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    
+    def extract_text(self, image: Union[str, bytes]) -> Tuple[str, bool, Optional[str]]:
         """
         Extract text from an image using EasyOCR with enhanced error handling
         
+        The image is decoded once and every OCR pass gets a NumPy array, so
+        nothing is re-read from or written to disk.
+        
         Args:
-            image_path (str): Path to the image file
+            image: Path to the image file, or the encoded image bytes
             
         Returns:
             Tuple[str, bool, Optional[str]]: 
@@ -89,103 +113,139 @@ class ImageProcessor:
                 - Success flag
                 - Error message if any
         """
-        self.logger.info(f"Starting OCR text extraction on image: {os.path.basename(image_path)}")
+        return self.extract_text_batch([image])[0]
+    
+    def extract_text_batch(self, images: List[Union[str, bytes]]) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Extract text from several images, sharing their first OCR pass
+        
+        The first pass of all images that pass the size and blur checks runs
+        through readtext_many, one readtext_batched call per group of
+        similar-sized images. The further passes that only unclear images
+        need run image by image, as in extract_text.
+        
+        Args:
+            images (list): Paths to image files, or encoded image bytes
+            
+        Returns:
+            list: The extract_text result of each image, in input order
+        """
+        results = [None] * len(images)
+        decoded = {}
+        for index, image in enumerate(images):
+            array, error = self._load_for_ocr(image)
+            if error is not None:
+                results[index] = error
+            else:
+                decoded[index] = array
+        if not decoded:
+            return results
+        
+        self.logger.info(f"Processing {len(decoded)} images with EasyOCR")
+        start_time = time.time()
+        try:
+            # Method 1: Original image
+            first_passes = readtext_many(self.ocr, list(decoded.values()))
+        except Exception as e:
+            self.logger.error(f"Error extracting text: {str(e)}")
+            for index in decoded:
+                results[index] = ("", False, f"图片处理错误: {str(e)}")
+            return results
+        self.logger.info(f"EasyOCR processing time: {time.time() - start_time:.2f}s")
+        
+        for (index, array), first_pass in zip(decoded.items(), first_passes):
+            results[index] = self._finish_extraction(array, first_pass)
+        return results
+    
+    def _load_for_ocr(self, image: Union[str, bytes]) -> Tuple[Optional[np.ndarray], Optional[Tuple[str, bool, str]]]:
+        """
+        Decode an image and check that it is worth an OCR pass
+        
+        Returns:
+            Tuple: (decoded image, None), or (None, extract_text result explaining why not)
+        """
+        source = os.path.basename(image) if isinstance(image, str) else f"<{len(image)} bytes>"
+        self.logger.info(f"Starting OCR text extraction on image: {source}")
         
         try:
             # Check if EasyOCR was initialized successfully
             if self.ocr is None:
                 self.logger.error("EasyOCR not initialized properly")
-                return "", False, "OCR引擎未正确初始化"
+                return None, ("", False, "OCR引擎未正确初始化")
             
             # Check if file exists
-            if not os.path.exists(image_path):
-                self.logger.error(f"Image file not found: {image_path}")
-                return "", False, "图片文件不存在"
+            if isinstance(image, str) and not os.path.exists(image):
+                self.logger.error(f"Image file not found: {image}")
+                return None, ("", False, "图片文件不存在")
             
-            # Read image
-            image = cv2.imread(image_path)
-            if image is None:
-                self.logger.error(f"Could not read image file: {image_path}")
-                return "", False, "无法读取图片文件，格式可能不支持"
+            # Decode image
+            decoded = self._decode_image(image)
+            if decoded is None:
+                self.logger.error(f"Could not decode image: {source}")
+                return None, ("", False, "无法读取图片文件，格式可能不支持")
             
             # Check image dimensions
-            height, width = image.shape[:2]
+            height, width = decoded.shape[:2]
             if width < 100 or height < 100:
                 self.logger.warning(f"Image is too small: {width}x{height}")
-                return "", False, "图片尺寸太小，无法识别"
+                return None, ("", False, "图片尺寸太小，无法识别")
             
             # Check if image is too blurry
-            laplacian_var = cv2.Laplacian(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+            laplacian_var = cv2.Laplacian(cv2.cvtColor(decoded, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
             if laplacian_var < 100:  # Threshold for blurriness
                 self.logger.warning(f"Image is too blurry: {laplacian_var}")
-                return "", False, "图片不清晰，请重拍"
+                return None, ("", False, "图片不清晰，请重拍")
             
-            self.logger.info("Processing image with EasyOCR")
+            return decoded, None
             
-            # Try multiple preprocessing methods for better results
-            results = []
-            confidence_scores = []
+        except Exception as e:
+            self.logger.error(f"Error extracting text: {str(e)}")
+            return None, ("", False, f"图片处理错误: {str(e)}")
+    
+    def _finish_extraction(self, decoded: np.ndarray, first_pass) -> Tuple[str, bool, Optional[str]]:
+        """
+        Run the further passes an image needs after its first pass and build the extract_text result
+        
+        Args:
+            decoded (numpy.ndarray): Decoded image
+            first_pass: EasyOCR readtext output for the original image
+        """
+        try:
+            detections = self._parse_detections(first_pass)
+            full_passes, region_passes = 1, 0
             
-            # Method 1: Original image
-            start_time = time.time()
-            result = self.ocr.readtext(image_path)
-            self.logger.info(f"EasyOCR processing time: {time.time() - start_time:.2f}s")
-            
-            # Method 2: Preprocessed image with better contrast
-            preprocessed_path = image_path + "_preprocessed.jpg"
-            preprocessed = self._alternative_preprocess(image)
-            cv2.imwrite(preprocessed_path, np.array(preprocessed))
-            result_preprocessed = self.ocr.readtext(preprocessed_path)
-            
-            # Clean up temporary file
-            if os.path.exists(preprocessed_path):
-                os.unlink(preprocessed_path)
-            
-            # Extract text and confidence from results - EasyOCR结果解析
-            for res in [result, result_preprocessed]:
-                try:
-                    # 调试输出，了解EasyOCR返回的结果结构
-                    self.logger.info(f"EasyOCR result type: {type(res)}, length: {len(res) if res else 0}")
-                    
-                    text_lines = []
-                    conf_scores = []
-                    
-                    # EasyOCR格式: [[bbox, text, confidence], ...]
-                    if isinstance(res, list) and len(res) > 0:
-                        for detection in res:
-                            if len(detection) >= 3:
-                                # 格式: [bbox, text, confidence]
-                                bbox = detection[0]  # 边界框坐标
-                                text = detection[1]  # 文本
-                                confidence = detection[2]  # 置信度
-                                
-                                # 过滤掉置信度太低或无意义的文本
-                                if confidence > 0.3 and text.strip() and text.strip() != '口口口':
-                                    text_lines.append(text.strip())
-                                    conf_scores.append(confidence)
-                                    self.logger.info(f"Extracted text: '{text}' with confidence: {confidence:.3f}")
-                    
-                    if text_lines:
-                        self.logger.info(f"Successfully extracted {len(text_lines)} text lines")
-                        results.append("\n".join(text_lines))
-                        avg_confidence = sum(conf_scores) / len(conf_scores) if conf_scores else 0
-                        confidence_scores.append(avg_confidence)
-                    else:
-                        self.logger.warning("No valid text extracted from OCR result")
-                        
-                except Exception as e:
-                    self.logger.error(f"Error parsing OCR result: {str(e)}")
-                    # 继续处理下一个结果
+            # Further preprocessing variants only while the result is not good
+            # enough: a clean first pass costs a single readtext
+            for preprocess in (self._alternative_preprocess, self._preprocess_image):
+                if self._is_acceptable(detections):
+                    break
+                low = [i for i, (_, _, conf) in enumerate(detections) if conf < self.accept_confidence]
+                if detections and not low:
+                    # Every line is confident, another pass cannot add the missing marker
+                    break
+                variant = np.asarray(preprocess(decoded))
+                if detections:
+                    # Re-recognise only the low-confidence regions on the variant
+                    retried = self._recognize_regions(variant, [detections[i][0] for i in low])
+                    region_passes += 1
+                    for i, retry in zip(low, retried):
+                        if retry is not None and retry[2] > detections[i][2]:
+                            detections[i] = retry
+                else:
+                    # Nothing detected yet: run detection on the variant too
+                    detections = self._parse_detections(self.ocr.readtext(variant))
+                    full_passes += 1
+            
+            self._record_passes(full_passes, region_passes)
             
             # If no results were found
-            if not results:
+            if not detections:
                 self.logger.warning("No text detected in the image")
                 return "", False, "未能在图片中检测到文字"
             
-            # Choose the result with highest confidence
-            best_index = confidence_scores.index(max(confidence_scores)) if confidence_scores else 0
-            text = results[best_index]
-            confidence = confidence_scores[best_index] if confidence_scores else 0
+            text = normalize_text("\n".join(line for _, line, _ in detections))
+            confidence = self._average_confidence(detections)
+            self.logger.info(f"OCR passes: {full_passes} full, {region_passes} region")
             
             self.logger.info(f"OCR completed with confidence: {confidence:.4f}")
             
@@ -205,6 +265,87 @@ class ImageProcessor:
             self.logger.error(f"Error extracting text: {str(e)}")
             return "", False, f"图片处理错误: {str(e)}"
     
+    def _parse_detections(self, result) -> List[Tuple[list, str, float]]:
+        """
+        Keep the usable lines of an EasyOCR result
+        
+        Args:
+            result: EasyOCR output, [[bbox, text, confidence], ...]
+            
+        Returns:
+            list: (bbox, text, confidence) of each line kept
+        """
+        detections = []
+        for detection in result or []:
+            if len(detection) < 3:
+                continue
+            bbox, text, confidence = detection[0], detection[1].strip(), detection[2]
+            # 过滤掉置信度太低或无意义的文本
+            if confidence > 0.3 and text and text != '口口口':
+                detections.append((bbox, text, confidence))
+        return detections
+    
+    def _average_confidence(self, detections: List[Tuple[list, str, float]]) -> float:
+        return sum(conf for _, _, conf in detections) / len(detections) if detections else 0
+    
+    def _is_acceptable(self, detections: List[Tuple[list, str, float]]) -> bool:
+        """Whether a pass can be used as-is: confident and containing an ingredient list"""
+        if self._average_confidence(detections) < self.accept_confidence:
+            return False
+        text = normalize_text("".join(line for _, line, _ in detections))
+        return len(text) >= 10 and any(marker in text for marker in self.ingredient_markers)
+    
+    def _recognize_regions(self, image: np.ndarray, boxes: List[list]) -> List[Optional[Tuple[list, str, float]]]:
+        """
+        Run only the EasyOCR recognizer on the given regions of an image
+        
+        Args:
+            image (numpy.ndarray): Preprocessed (grayscale) image
+            boxes (list): Detection bboxes (four corner points) from an earlier pass
+            
+        Returns:
+            list: Parsed detection per box, None where nothing usable was read
+        """
+        if not boxes:
+            return []
+        height, width = image.shape[:2]
+        horizontal = []
+        for box in boxes:
+            xs = [int(point[0]) for point in box]
+            ys = [int(point[1]) for point in box]
+            horizontal.append([max(0, min(xs)), min(width, max(xs)), max(0, min(ys)), min(height, max(ys))])
+        
+        # recognize() orders its output by position, so map results back by corner
+        by_corner = {}
+        for bbox, text, confidence in self._parse_detections(
+                self.ocr.recognize(image, horizontal_list=horizontal, free_list=[])):
+            by_corner[(int(bbox[0][0]), int(bbox[0][1]))] = (bbox, text, confidence)
+        
+        retried = []
+        for box, (x_min, _, y_min, _) in zip(boxes, horizontal):
+            found = by_corner.get((x_min, y_min))
+            retried.append((box, found[1], found[2]) if found else None)
+        return retried
+    
+    def _record_passes(self, full_passes: int, region_passes: int):
+        with self._stats_lock:
+            self.pass_stats["images"] += 1
+            self.pass_stats["full_passes"] += full_passes
+            self.pass_stats["region_passes"] += region_passes
+    
+    def pass_statistics(self) -> Dict[str, float]:
+        """
+        OCR passes run so far
+        
+        Returns:
+            Dict: images, full_passes, region_passes and average_passes per image
+        """
+        with self._stats_lock:
+            stats = dict(self.pass_stats)
+        total = stats["full_passes"] + stats["region_passes"]
+        stats["average_passes"] = total / stats["images"] if stats["images"] else 0.0
+        return stats
+    
     def _preprocess_image(self, image: np.ndarray) -> Image.Image:
         """
         Preprocess image to improve OCR accuracy
@@ -279,117 +420,24 @@ class ImageProcessor:
         Returns:
             list: List of ingredients
         """
-        self.logger.info("Starting ingredient extraction from OCR text")
-        
-        if not text:
-            self.logger.warning("Empty text provided for ingredient extraction")
-            return []
-        
-        # Convert text to lowercase for case-insensitive matching
-        text_lower = text.lower()
-        
-        # Find the ingredients section
-        ingredients_section = ""
-        lines = text.split('\n')
-        
-        # Try to find the ingredients section
-        found_ingredients = False
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            
-            # Check if this line contains an ingredient marker
-            if any(marker.lower() in line_lower for marker in self.ingredient_markers):
-                found_ingredients = True
-                # Start with this line and include several following lines
-                ingredients_section = line
-                
-                # Include up to 5 more lines or until a new section starts
-                for j in range(1, 6):
-                    if i + j < len(lines) and not any(marker.lower() in lines[i + j].lower() for marker in ["营养成分", "保质期", "储存条件", "生产日期", "保存方法"]):
-                        ingredients_section += " " + lines[i + j]
-                    else:
-                        break
-                
-                break
-        
-        # If no specific ingredients section found, use the entire text
-        if not found_ingredients:
-            ingredients_section = text
-        
-        # Extract ingredients from the section
-        ingredients = []
-        
-        # Try to find ingredients after a marker
-        for marker in self.ingredient_markers:
-            if marker.lower() in ingredients_section.lower():
-                # Get text after the marker
-                marker_index = ingredients_section.lower().find(marker.lower())
-                ingredients_text = ingredients_section[marker_index + len(marker):]
-                
-                # Split by common separators
-                for separator in self.separators:
-                    if separator in ingredients_text:
-                        ingredients = [item.strip() for item in ingredients_text.split(separator) if item.strip()]
-                        break
-                
-                if ingredients:
-                    break
+        return extract_ingredients(text, self.ingredient_markers, self.separators)
         
-        # If no ingredients found using markers and separators, try to extract using regex patterns
-        if not ingredients:
-            # Look for patterns like Chinese characters followed by percentages
-            percentage_pattern = r'([^\d%]+)(\d+(?:\.\d+)?%)'
-            matches = re.findall(percentage_pattern, ingredients_section)
-            if matches:
-                ingredients = [match[0].strip() for match in matches]
-        
-        # If still no ingredients found, split by common separators
-        if not ingredients:
-            for separator in self.separators:
-                if separator in ingredients_section:
-                    ingredients = [item.strip() for item in ingredients_section.split(separator) if item.strip()]
-                    break
-        
-        # Clean up ingredients
-        cleaned_ingredients = []
-        for item in ingredients:
-            # Remove percentages and other non-ingredient text
-            cleaned = re.sub(r'\d+(?:\.\d+)?%', '', item).strip()
-            cleaned = re.sub(r'^\W+|\W+$', '', cleaned).strip()  # Remove leading/trailing non-word chars
-            
-            # Remove common non-ingredient text patterns
-            cleaned = re.sub(r'保质期.*', '', cleaned)
-            cleaned = re.sub(r'生产日期.*', '', cleaned)
-            cleaned = re.sub(r'储存条件.*', '', cleaned)
-            cleaned = re.sub(r'营养成分.*', '', cleaned)
-            cleaned = re.sub(r'[\(\)（）\[\]【】]', '', cleaned)  # Remove brackets
-            
-            if cleaned and len(cleaned) < 30:  # Avoid very long strings that are likely not ingredients
-                cleaned_ingredients.append(cleaned)
-        
-        self.logger.info(f"Extracted {len(cleaned_ingredients)} ingredients")
-        if cleaned_ingredients:
-            self.logger.debug(f"First few ingredients: {', '.join(cleaned_ingredients[:3])}")
-        else:
-            self.logger.warning("No ingredients were extracted")
-            
-        return cleaned_ingredients
-        
-    def assess_image_quality(self, image_path: str) -> Dict[str, Union[bool, str, float]]:
+    def assess_image_quality(self, image: Union[str, bytes]) -> Dict[str, Union[bool, str, float]]:
         """
         Assess the quality of an image for OCR processing
         
         Args:
-            image_path (str): Path to the image file
+            image: Path to the image file, or the encoded image bytes
             
         Returns:
             Dict: Assessment results including quality metrics
         """
-        self.logger.info(f"Assessing image quality: {os.path.basename(image_path)}")
+        source = os.path.basename(image) if isinstance(image, str) else f"<{len(image)} bytes>"
+        self.logger.info(f"Assessing image quality: {source}")
         
         try:
-            # Read image
-            image = cv2.imread(image_path)
+            # Decode image
+            image = self._decode_image(image)
             if image is None:
                 return {
                     "is_suitable": False,
@@ -470,64 +518,4 @@ class ImageProcessor:
             max_size = self.max_image_size
             
         self.logger.info(f"Compressing image to target size: {max_size/1024:.1f}KB")
-        
-        try:
-            # Handle different input types
-            if isinstance(image_data, str):
-                # It's a file path
-                img = Image.open(image_data)
-            elif isinstance(image_data, bytes):
-                # It's bytes data
-                img = Image.open(io.BytesIO(image_data))
-            else:
-                # It's a file-like object
-                img = Image.open(image_data)
-                
-            # Convert to RGB if needed (removes alpha channel)
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-                
-            # Get original format or default to JPEG
-            img_format = img.format if img.format else 'JPEG'
-            
-            # Initial quality
-            quality = 95
-            output = io.BytesIO()
-            
-            # Save with initial quality
-            img.save(output, format=img_format, quality=quality, optimize=True)
-            img_size = output.tell()
-            
-            # Compress iteratively if needed
-            while img_size > max_size and quality > 30:
-                output = io.BytesIO()
-                quality -= 10
-                img.save(output, format=img_format, quality=quality, optimize=True)
-                img_size = output.tell()
-                self.logger.debug(f"Compressed to quality={quality}, size={img_size/1024:.1f}KB")
-                
-            # If still too large, resize the image
-            if img_size > max_size:
-                # Calculate new dimensions to maintain aspect ratio
-                ratio = math.sqrt(max_size / img_size) * 0.9  # 0.9 as safety factor
-                new_width = int(img.width * ratio)
-                new_height = int(img.height * ratio)
-                
-                # Resize and compress again
-                img = img.resize((new_width, new_height), Image.LANCZOS)
-                output = io.BytesIO()
-                img.save(output, format=img_format, quality=quality, optimize=True)
-                img_size = output.tell()
-                
-                self.logger.info(f"Resized image to {new_width}x{new_height}, final size={img_size/1024:.1f}KB")
-            else:
-                self.logger.info(f"Compressed image with quality={quality}, final size={img_size/1024:.1f}KB")
-                
-            # Get the compressed image data
-            compressed_data = output.getvalue()
-            
-            return compressed_data, True, ""
-            
-        except Exception as e:
-            self.logger.error(f"Error compressing image: {str(e)}")
-            return b"", False, f"图片压缩错误: {str(e)}"
+        return compress_image(image_data, max_size)
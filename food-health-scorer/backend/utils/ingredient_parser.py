@@ -0,0 +1,233 @@
+"""
+Ingredient list parsing shared by the OCR and manual text input flows
+
+Kept free of OCR dependencies so the API can parse user-supplied text
+without loading the image pipeline.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Common ingredient list markers in Chinese (and English). Text is expected in
+# utils.text_normalizer form, where letter-spaced 配 料 already reads 配料
+INGREDIENT_MARKERS = [
+    "配料表", "配料", "成分表", "成分", "原料", "原材料", "ingredients", "配料组成",
+    "ingredient list"
+]
+
+# Common ingredient separators
+SEPARATORS = [
+    "，", ",", "、", ";", "；", "/", "：", ":"
+]
+
+# Headings that end the ingredients section
+SECTION_END_MARKERS = [
+    "营养成分", "保质期", "储存条件", "贮存条件", "生产日期", "保存方法", "净含量",
+    "产品标准", "生产许可", "生产商", "制造商"
+]
+
+# Brackets that open and close a nested ingredient list
+OPEN_BRACKETS = "(（[【"
+CLOSE_BRACKETS = ")）]】"
+
+# A marker's section is its line plus at most this many following lines
+MAX_SECTION_LINES = 5
+
+# Longer names are almost always run-together OCR text, not an ingredient
+MAX_NAME_LENGTH = 30
+
+# Percentages, including declared minimums such as 含量≥10%
+_PERCENTAGE = re.compile(r'(?:含量|添加量)?\s*[≥≧>＞]?\s*(\d+(?:\.\d+)?)\s*[%％]')
+# A name followed by its percentage, for lists held together only by percentages
+_NAME_PERCENTAGE = re.compile(r'([^\d%％]*?)((?:含量|添加量)?\s*[≥≧>＞]?\s*\d+(?:\.\d+)?\s*[%％])')
+_EDGES = re.compile(r'^[\W_]+|[\W_]+$')
+
+
+@lru_cache(maxsize=16)
+def _compile(markers: Tuple[str, ...], separators: Tuple[str, ...]):
+    """Section and delimiter patterns for a marker/separator set"""
+    def alternation(words):
+        # Longest first, so 配料表 wins over 配料 at the same position
+        return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+    # End markers are alternated first so 营养成分 is not read as the 成分 marker
+    section = re.compile(
+        f"(?P<end>{alternation(SECTION_END_MARKERS)})|(?P<start>{alternation(markers)})", re.IGNORECASE
+    )
+    section_end = re.compile(alternation(SECTION_END_MARKERS))
+    delimiters = re.compile("([" + re.escape("".join(separators) + OPEN_BRACKETS + CLOSE_BRACKETS) + "])")
+    return section, section_end, delimiters
+
+
+def _line_end(text: str, position: int, lines: int) -> int:
+    """Index just past the line holding position and the `lines` lines after it"""
+    for _ in range(lines + 1):
+        newline = text.find("\n", position)
+        if newline == -1:
+            return len(text)
+        position = newline + 1
+    return position
+
+
+def _find_section(text: str, section: re.Pattern, section_end: re.Pattern) -> str:
+    """Text after the first ingredient marker, up to the next section; the whole text without a marker"""
+    start, limit = 0, len(text)
+    for match in section.finditer(text):
+        if match.lastgroup == "start":
+            start = match.end()
+            limit = _line_end(text, match.start(), MAX_SECTION_LINES)
+            break
+
+    end = section_end.search(text, start, limit)
+    return text[start:end.start() if end else limit]
+
+
+def _entry(text: str) -> Dict[str, Any]:
+    percentage = None
+    if "%" in text or "％" in text:
+        match = _PERCENTAGE.search(text)
+        if match:
+            percentage = float(match.group(1))
+            text = _PERCENTAGE.sub("", text)
+    # Collapses the line breaks of wrapped OCR lines too
+    name = " ".join(text.split())
+    # Most items are already clean; skip the substitution for them
+    if name and not (name[0].isalnum() and name[-1].isalnum()):
+        name = _EDGES.sub("", name)
+    return {"name": name, "percentage": percentage, "sub_ingredients": []}
+
+
+def _valid_name(name: str) -> bool:
+    return 0 < len(name) < MAX_NAME_LENGTH
+
+
+def _add_items(entries: List[Dict[str, Any]], text: str, owner: Optional[Dict[str, Any]]):
+    """
+    Add the text between two delimiters to entries. A bare percentage
+    belongs to owner: the entry whose brackets it is in or just follows
+    """
+    matches = list(_NAME_PERCENTAGE.finditer(text)) if "%" in text or "％" in text else []
+    rest = text[matches[-1].end():] if matches else ""
+    if len(matches) > 1 or (matches and matches[0].group(1).strip() and rest.strip()):
+        # 小麦粉50% 白砂糖20% 植物油: one item per percentage, plus a last
+        # item that has none
+        chunks = [match.group(0) for match in matches] + [rest]
+    else:
+        chunks = [text]
+    for chunk in chunks:
+        entry = _entry(chunk)
+        if _valid_name(entry["name"]):
+            entries.append(entry)
+        elif not entry["name"] and entry["percentage"] is not None and owner is not None:
+            owner["percentage"] = entry["percentage"]
+
+
+def _close(lists: List[List[Dict[str, Any]]], parents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Close the innermost bracket; a nameless group is merged into the enclosing list"""
+    lists.pop()
+    parent = parents.pop()
+    if not _valid_name(parent["name"]):
+        lists[-1].pop()
+        lists[-1].extend(parent["sub_ingredients"])
+    return parent
+
+
+def parse_ingredients(text: str, markers: Optional[Sequence[str]] = None,
+                      separators: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Parse the ingredient list of a label into structured entries
+
+    One pass over the text with precompiled patterns finds the section after
+    the first ingredient marker and splits it at separators. Bracketed lists
+    such as 食品添加剂（碳酸氢钠、柠檬酸） become sub-ingredients, at any depth.
+
+    Args:
+        text (str): Label text
+        markers (list): Ingredient list markers, defaults to INGREDIENT_MARKERS
+        separators (list): Ingredient separators, defaults to SEPARATORS
+
+    Returns:
+        list: Entries with name, percentage (float or None) and sub_ingredients
+        (a list of entries). Empty when the text has no list structure
+    """
+    if not text:
+        return []
+    section, section_end, delimiters = _compile(
+        tuple(INGREDIENT_MARKERS if markers is None else markers),
+        tuple(SEPARATORS if separators is None else separators)
+    )
+    section_text = _find_section(text, section, section_end)
+
+    root: List[Dict[str, Any]] = []
+    lists = [root]      # lists[-1] receives the next entry
+    parents = []        # entries whose brackets are open
+    closed = None       # entry whose bracket just closed
+    # Alternates text and delimiter, ending with the text after the last delimiter
+    parts = delimiters.split(section_text)
+    for index in range(1, len(parts), 2):
+        chunk, char = parts[index - 1], parts[index]
+        owner = closed or (parents[-1] if parents else None)
+        closed = None
+
+        if char in OPEN_BRACKETS:
+            parent = _entry(chunk)
+            lists[-1].append(parent)
+            parents.append(parent)
+            lists.append(parent["sub_ingredients"])
+        elif char in CLOSE_BRACKETS:
+            _add_items(lists[-1], chunk, owner)
+            if parents:
+                closed = _close(lists, parents)
+        else:
+            _add_items(lists[-1], chunk, owner)
+
+    tail = parts[-1]
+    if len(parts) > 1 or len(_PERCENTAGE.findall(tail)) > 1:
+        _add_items(lists[-1], tail, closed or (parents[-1] if parents else None))
+    # Unclosed brackets end with the section
+    while parents:
+        _close(lists, parents)
+    return root
+
+
+def flatten_ingredients(entries: List[Dict[str, Any]]) -> List[str]:
+    """Names of parsed entries, each followed by the names of its sub-ingredients"""
+    names = []
+    stack = list(reversed(entries))
+    while stack:
+        entry = stack.pop()
+        names.append(entry["name"])
+        stack.extend(reversed(entry["sub_ingredients"]))
+    return names
+
+
+def extract_ingredients(text: str, markers: Optional[Sequence[str]] = None,
+                        separators: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    Extract ingredients list from OCR or manually entered text
+    
+    Args:
+        text (str): Label text
+        markers (list): Ingredient list markers, defaults to INGREDIENT_MARKERS
+        separators (list): Ingredient separators, defaults to SEPARATORS
+        
+    Returns:
+        list: Ingredient names; a bracketed list follows the ingredient it belongs to
+    """
+    if not text:
+        logger.warning("Empty text provided for ingredient extraction")
+        return []
+
+    ingredients = flatten_ingredients(parse_ingredients(text, markers, separators))
+
+    logger.info(f"Extracted {len(ingredients)} ingredients")
+    if ingredients:
+        logger.debug(f"First few ingredients: {', '.join(ingredients[:3])}")
+    else:
+        logger.warning("No ingredients were extracted")
+
+    return ingredients
@@ -0,0 +1,343 @@
+"""
+Bounded background job queue with a TTL result store and long-polling
+
+Jobs run on a fixed pool of worker threads; submit() returns a job ID at
+once and rejects work when max_pending jobs are already queued or running,
+so a burst of uploads cannot grow an unbounded backlog. Job records live in
+a TTLCache and expire result_ttl seconds after their last update. Async
+callers long-poll with wait(), which parks an asyncio future per waiter
+(resolved from the worker thread with call_soon_threadsafe) instead of a
+thread per waiter. An optional callback URL receives the finished job as
+a JSON POST, sent from a separate small executor so a slow receiver never
+holds up a job worker. Callbacks are off unless JOB_CALLBACK_HOSTS lists
+the hosts they may reach; with the "*" wildcard the POST goes to the very
+address that was checked, so a host cannot re-resolve to an internal one
+between the check and the connection.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, urlunparse
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 4)
+# Jobs queued or running before submit() starts rejecting work (0: four times the workers)
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING") or 0)
+# Seconds a finished job (or an unfinished one without updates) stays retrievable
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL") or 600)
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT") or 10)
+JOB_CALLBACK_WORKERS = int(os.getenv("JOB_CALLBACK_WORKERS") or 2)
+# Comma-separated hosts callback URLs may point to. Empty disables callbacks;
+# "*" allows any host that resolves to public addresses only
+JOB_CALLBACK_HOSTS = {host.strip().lower() for host in (os.getenv("JOB_CALLBACK_HOSTS") or "").split(",") if host.strip()}
+ANY_PUBLIC_HOST = "*"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the queue already holds max_pending jobs"""
+
+
+class InvalidCallbackURL(ValueError):
+    """The callback URL is not an allowed http(s) URL"""
+
+
+@dataclass
+class Job:
+    """A submitted job and, once finished, its result or error"""
+
+    id: str
+    kind: str
+    status: str = QUEUED
+    # Name of the stage being run, reported by the job function
+    stage: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    callback_url: Optional[str] = None
+    # (event loop, future) of each long-polling waiter
+    _waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(default_factory=list, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+def check_public_host(hostname: str) -> str:
+    """
+    Resolve hostname and require every address to be a public one
+
+    Returns:
+        str: The first address, to connect to without resolving again
+
+    Raises:
+        InvalidCallbackURL: If it does not resolve, or resolves to a loopback,
+            private, link-local or otherwise non-global address
+    """
+    try:
+        infos = socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError):
+        raise InvalidCallbackURL(f"Callback host does not resolve: {hostname}")
+    addresses = [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+    for address in addresses:
+        if not address.is_global:
+            raise InvalidCallbackURL(f"Callback host resolves to a non-public address: {hostname}")
+    return str(addresses[0])
+
+
+def validate_callback_url(url: str, allowed_hosts: Optional[set] = None) -> str:
+    """
+    Check that a callback URL is http(s) and on an allowed host
+
+    Args:
+        url (str): Callback URL supplied by the client
+        allowed_hosts (set): Allowed lower-case host names, JOB_CALLBACK_HOSTS
+            by default; empty rejects every URL and ANY_PUBLIC_HOST accepts
+            hosts that resolve to public addresses only
+
+    Raises:
+        InvalidCallbackURL: Otherwise
+    """
+    _check_callback_url(url, allowed_hosts)
+    return url
+
+
+def _check_callback_url(url: str, allowed_hosts: Optional[set] = None) -> Optional[str]:
+    """validate_callback_url(); returns the checked address for ANY_PUBLIC_HOST, else None"""
+    allowed_hosts = JOB_CALLBACK_HOSTS if allowed_hosts is None else allowed_hosts
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise InvalidCallbackURL(f"Callback URL must be an absolute http(s) URL: {url}")
+    if not allowed_hosts:
+        raise InvalidCallbackURL("Callbacks are disabled (JOB_CALLBACK_HOSTS is not set)")
+    if ANY_PUBLIC_HOST in allowed_hosts:
+        return check_public_host(parsed.hostname)
+    if parsed.hostname.lower() not in allowed_hosts:
+        raise InvalidCallbackURL(f"Callback host not allowed: {parsed.hostname}")
+    return None
+
+
+def _pinned_request(url: str, address: str):
+    """
+    Point url at an already checked address
+
+    Returns:
+        Tuple[requests.Session, str, dict]: A session whose https connections
+        send SNI for and verify the certificate of the original host, the URL
+        with the address in place of the host, and the Host header
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    parsed = urlparse(url)
+    hostname = parsed.hostname
+
+    class PinnedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["server_hostname"] = hostname
+            kwargs["assert_hostname"] = hostname
+            super().init_poolmanager(*args, **kwargs)
+
+    session = requests.Session()
+    session.mount("https://", PinnedAdapter())
+    userinfo, at, host_port = parsed.netloc.rpartition("@")
+    host = f"[{address}]" if ":" in address else address
+    port = f":{parsed.port}" if parsed.port else ""
+    pinned_url = urlunparse(parsed._replace(netloc=userinfo + at + host + port))
+    return session, pinned_url, {"Host": host_port}
+
+
+def post_callback(url: str, payload: Dict[str, Any], timeout: float = JOB_CALLBACK_TIMEOUT):
+    """POST the finished job as JSON; failures are logged, never raised"""
+    import requests  # Imported on first use, for faster startup
+    try:
+        # Re-validated at delivery: the host may resolve differently by now.
+        # A checked address is connected to directly, not resolved again
+        address = _check_callback_url(url)
+        if address is None:
+            response = requests.post(url, json=payload, timeout=timeout, allow_redirects=False)
+        else:
+            session, pinned_url, headers = _pinned_request(url, address)
+            with session:
+                response = session.post(pinned_url, json=payload, headers=headers, timeout=timeout,
+                                        allow_redirects=False)
+        response.raise_for_status()
+        logger.info(f"Job {payload['job_id']} callback delivered to {url}")
+    except Exception as e:
+        logger.warning(f"Job {payload['job_id']} callback to {url} failed: {e}")
+
+
+class JobQueue:
+    """
+    Thread-pool job runner with a bounded backlog and expiring results
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 result_ttl: Optional[float] = None, max_jobs: int = 10000,
+                 callback: Callable[[str, Dict[str, Any]], None] = post_callback):
+        """
+        Args:
+            workers (int): Worker threads, JOB_WORKERS by default
+            max_pending (int): Queued plus running jobs before submit() raises JobQueueFull
+            result_ttl (float): Seconds a job record is kept after its last update
+            max_jobs (int): Job records kept before the least recently used are evicted
+            callback (callable): Delivers (callback_url, job dict) for finished jobs,
+                on its own JOB_CALLBACK_WORKERS threads
+        """
+        self.workers = workers or JOB_WORKERS
+        self.max_pending = max_pending or JOB_MAX_PENDING or 4 * self.workers
+        self.result_ttl = result_ttl or JOB_RESULT_TTL
+        self._jobs = TTLCache(self.result_ttl, max_jobs)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._callback = callback
+        self._callback_executor = ThreadPoolExecutor(max_workers=JOB_CALLBACK_WORKERS,
+                                                     thread_name_prefix="job-callback")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, kind: str, function: Callable[..., Any], *args,
+               callback_url: Optional[str] = None, **kwargs) -> Job:
+        """
+        Queue function(*args, on_stage=..., **kwargs); on_stage(name) records the running stage
+
+        Args:
+            kind (str): Job type reported to clients, e.g. "image" or "text"
+            function (callable): Blocking job function taking an on_stage keyword
+            callback_url (str): Receives the finished job as a JSON POST
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self._pending} pending jobs)")
+            self._pending += 1
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, callback_url=callback_url)
+        self._jobs.set(job.id, job)
+        try:
+            self._executor.submit(self._run, job, function, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            self._jobs.pop(job.id)
+            raise
+        logger.info(f"Job {job.id} ({kind}) queued, {self._pending} pending")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, or None if unknown or expired"""
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        Long-poll: return the job once finished, or as it is after timeout seconds
+
+        Returns:
+            Job: The job, or None if unknown or expired
+        """
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+        with self._lock:
+            # Re-checked under the lock _finish takes before waking waiters
+            if job.finished:
+                return job
+            job._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                if waiter in job._waiters:
+                    job._waiters.remove(waiter)
+        return job
+
+    def _set_stage(self, job: Job, name: str):
+        job.stage = name
+        # Refreshes the TTL of long-running jobs
+        self._jobs.set(job.id, job)
+
+    def _run(self, job: Job, function: Callable[..., Any], args: tuple, kwargs: dict):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            result = function(*args, on_stage=lambda name: self._set_stage(job, name), **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            self._finish(job, FAILED, error=str(e))
+        else:
+            self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            job.status = status
+            self._pending -= 1
+            waiters, job._waiters = job._waiters, []
+        self._jobs.set(job.id, job)
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        logger.info(f"Job {job.id} {status} in {job.finished_at - job.started_at:.2f}s")
+
+        if job.callback_url:
+            try:
+                self._callback_executor.submit(self._callback, job.callback_url, job.to_dict())
+            except RuntimeError:
+                # Shut down while the job was running
+                logger.warning(f"Job {job.id} callback skipped, queue is shut down")
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._callback_executor.shutdown(wait=wait)
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
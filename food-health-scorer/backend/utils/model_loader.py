@@ -0,0 +1,115 @@
+"""
+Background loading of slow-to-initialise components (e.g. the local OCR model)
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Loader states reported by the readiness probe
+NOT_STARTED = "not_started"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+DISABLED = "disabled"
+
+
+class BackgroundLoader:
+    """
+    Builds a component in a daemon thread so the server can accept traffic
+    while it loads. Callers check status() or get(); nothing blocks unless
+    wait() is called explicitly.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        """
+        Args:
+            name (str): Component name used in logs and status reports
+            factory (callable): Builds and warms up the component; raising
+                marks the load as failed
+        """
+        self.name = name
+        self.factory = factory
+        self.logger = logging.getLogger('BackgroundLoader')
+
+        self._state = NOT_STARTED
+        self._instance = None
+        self._error = None
+        self._started_at = None
+        self._finished_at = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self) -> bool:
+        """
+        Start loading in the background
+
+        Returns:
+            bool: False if loading was already started
+        """
+        with self._lock:
+            if self._state != NOT_STARTED:
+                return False
+            self._state = LOADING
+            self._started_at = time.time()
+
+        thread = threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True)
+        thread.start()
+        return True
+
+    def disable(self) -> bool:
+        """
+        Mark the component as switched off by configuration
+
+        Returns:
+            bool: False if loading was already started
+        """
+        with self._lock:
+            if self._state != NOT_STARTED:
+                return False
+            self._state = DISABLED
+            return True
+
+    def _load(self):
+        self.logger.info(f"Loading {self.name} in the background...")
+        try:
+            instance = self.factory()
+        except Exception as e:
+            self.logger.error(f"Failed to load {self.name}: {str(e)}")
+            with self._lock:
+                self._state = FAILED
+                self._error = str(e)
+                self._finished_at = time.time()
+        else:
+            with self._lock:
+                self._instance = instance
+                self._state = READY
+                self._finished_at = time.time()
+            self.logger.info(f"{self.name} loaded in {self._finished_at - self._started_at:.1f}s")
+        finally:
+            self._done.set()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def get(self) -> Optional[Any]:
+        """Return the loaded component, or None while it is loading or if it failed"""
+        return self._instance if self._state == READY else None
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Block until loading finishes (or timeout) and return get()"""
+        self._done.wait(timeout)
+        return self.get()
+
+    def status(self) -> Dict[str, Any]:
+        """Status report for the readiness probe"""
+        with self._lock:
+            report = {"status": self._state}
+            if self._started_at is not None:
+                end = self._finished_at if self._finished_at is not None else time.time()
+                report["elapsed"] = round(end - self._started_at, 2)
+            if self._error:
+                report["error"] = self._error
+            return report
@@ -0,0 +1,173 @@
+"""
+Nutrition facts table (营养成分表) parsing
+
+Chinese labels carry a table of energy, protein, fat, carbohydrate and
+sodium (plus optional sub-rows) per 100g, 100ml or serving, with an NRV%
+column. OCR returns it either row by row (能量 1850kJ 22%) or cell by cell,
+one cell per line; both read the same to the single precompiled pattern
+used here. Values are converted to fixed units (kJ, g, mg sodium) so the
+scoring code can compare them with per-100g thresholds directly.
+
+Expects text in utils.text_normalizer form but tolerates full-width
+punctuation.
+"""
+
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Row name -> NutritionFacts field
+NUTRIENT_NAMES = {
+    "能量": "energy_kj", "热量": "energy_kj", "energy": "energy_kj",
+    "蛋白质": "protein_g", "protein": "protein_g",
+    "脂肪": "fat_g", "fat": "fat_g", "total fat": "fat_g",
+    "饱和脂肪": "saturated_fat_g", "饱和脂肪酸": "saturated_fat_g", "saturated fat": "saturated_fat_g",
+    "反式脂肪": "trans_fat_g", "反式脂肪酸": "trans_fat_g", "trans fat": "trans_fat_g",
+    # 醣 (醣类) is carbohydrate on Taiwanese labels, listed next to 糖 (sugar)
+    "碳水化合物": "carbohydrate_g", "醣": "carbohydrate_g", "醣类": "carbohydrate_g",
+    "carbohydrate": "carbohydrate_g",
+    "糖": "sugar_g", "sugar": "sugar_g", "sugars": "sugar_g",
+    "膳食纤维": "fiber_g", "dietary fiber": "fiber_g", "dietary fibre": "fiber_g", "fibre": "fiber_g",
+    "钠": "sodium_mg", "sodium": "sodium_mg",
+}
+
+# Unit -> (dimension, factor to kJ, g or mg)
+UNITS = {
+    "kj": ("energy", 1.0), "千焦": ("energy", 1.0),
+    "kcal": ("energy", 4.184), "千卡": ("energy", 4.184), "大卡": ("energy", 4.184),
+    "g": ("mass", 1.0), "克": ("mass", 1.0),
+    "mg": ("mass", 0.001), "毫克": ("mass", 0.001),
+}
+
+# Fewest rows for a match to count as a nutrition table
+MIN_NUTRIENTS = 2
+
+_TABLE_START = re.compile(r"营养成分|营养信息|nutrition (?:facts|information)", re.IGNORECASE)
+# Sections that can follow the table
+_TABLE_END = re.compile(r"配料|保质期|生产日期|储存条件|贮存条件|净含量|ingredients", re.IGNORECASE)
+
+
+def _alternation(words):
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+# A row: name, value with unit, optional NRV%. Names must not continue a
+# longer word (碳酸氢钠, 白砂糖) unless introduced by 其中
+_ROW = re.compile(
+    rf"(?:(?<![\u4e00-\u9fffA-Za-z])|(?<=其中))(?P<name>{_alternation(NUTRIENT_NAMES)})(?![A-Za-z])"
+    r"[^\d\n]{0,6}?\s*(?P<value>\d+(?:\.\d+)?)\s*"
+    rf"(?P<unit>{_alternation(UNITS)})(?![A-Za-z])"
+    r"(?:\s*(?P<nrv>\d+(?:\.\d+)?)\s*[%％])?",
+    re.IGNORECASE
+)
+_PER_100 = re.compile(r"100\s*(?P<unit>g|克|ml|毫升)", re.IGNORECASE)
+_PER_SERVING = re.compile(
+    r"每份(?:\s*[(（]?\s*(?P<size>\d+(?:\.\d+)?)\s*(?P<unit>g|克|ml|毫升))?", re.IGNORECASE
+)
+
+
+@dataclass
+class NutritionFacts:
+    """Nutrition table values; None where the label has no such row"""
+
+    energy_kj: Optional[float] = None
+    protein_g: Optional[float] = None
+    fat_g: Optional[float] = None
+    saturated_fat_g: Optional[float] = None
+    trans_fat_g: Optional[float] = None
+    carbohydrate_g: Optional[float] = None
+    sugar_g: Optional[float] = None
+    fiber_g: Optional[float] = None
+    sodium_mg: Optional[float] = None
+    # "100g", "100ml" or "serving"
+    basis: str = "100g"
+    # Grams or millilitres per serving, for tables printed per serving
+    serving_size: Optional[float] = None
+    # NRV% by field name, as printed
+    nrv: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def is_liquid(self) -> bool:
+        return self.basis == "100ml"
+
+    @property
+    def per_100(self) -> bool:
+        """Whether the values are per 100g/100ml and comparable with thresholds"""
+        return self.basis != "serving"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _per_100_basis(unit: Optional[str]) -> str:
+    return "100ml" if unit and unit.lower() in ("ml", "毫升") else "100g"
+
+
+def _basis(table: str):
+    """(basis, serving size, per-100 basis of the serving) from the table header"""
+    serving = _PER_SERVING.search(table)
+    per_100 = _PER_100.search(table)
+    if per_100 and (not serving or per_100.start() < serving.start()):
+        return _per_100_basis(per_100.group("unit")), None, None
+    if serving:
+        size = serving.group("size")
+        return "serving", float(size) if size else None, _per_100_basis(serving.group("unit"))
+    return "100g", None, None
+
+
+def parse_nutrition_facts(text: str) -> Optional[NutritionFacts]:
+    """
+    Parse the nutrition facts table of a label
+
+    Per-serving tables with a printed serving size are converted to per 100g
+    (or 100ml), so values are always comparable unless the size is missing.
+
+    Args:
+        text (str): Label text (OCR output or manual input)
+
+    Returns:
+        NutritionFacts: Parsed values, or None if the text has no table
+    """
+    if not text:
+        return None
+
+    start = _TABLE_START.search(text)
+    table = text
+    if start:
+        end = _TABLE_END.search(text, start.end())
+        table = text[start.start():end.start() if end else len(text)]
+
+    facts = NutritionFacts()
+    found = 0
+    for row in _ROW.finditer(table):
+        name = NUTRIENT_NAMES[row.group("name").lower()]
+        if getattr(facts, name) is not None:
+            continue
+        dimension, factor = UNITS[row.group("unit").lower()]
+        if (dimension == "energy") != (name == "energy_kj"):
+            continue
+        value = float(row.group("value")) * factor
+        if name == "sodium_mg":
+            value *= 1000
+        setattr(facts, name, round(value, 3))
+        if row.group("nrv") is not None:
+            facts.nrv[name] = float(row.group("nrv"))
+        found += 1
+
+    if found < MIN_NUTRIENTS:
+        return None
+
+    facts.basis, facts.serving_size, serving_basis = _basis(table)
+    if facts.serving_size:
+        scale = 100 / facts.serving_size
+        for name in set(NUTRIENT_NAMES.values()):
+            value = getattr(facts, name)
+            if value is not None:
+                setattr(facts, name, round(value * scale, 3))
+        facts.basis = serving_basis
+
+    logger.info(f"Parsed nutrition facts: {found} rows per {facts.basis}")
+    return facts
@@ -0,0 +1,206 @@
+"""
+Micro-batching of local OCR jobs
+
+EasyOCR's detector and recognizer do much more work per call when given a
+batch, but every extract_text job asks for one image, and each
+OCRProcessPool worker runs one job at a time. Batches therefore have to be
+formed before work reaches a worker: MicroBatcher runs in the parent
+process, collects the jobs submitted to the pool and hands them to a free
+worker in groups (up to max_batch_size, the first job waiting at most
+max_wait for company). The worker runs the first OCR pass of the whole
+group through readtext_many(), one readtext_batched call per set of
+similar-sized images.
+
+readtext_batched needs images of the same size, so images of a batch are
+padded at the bottom and right to a common size. Padding there leaves the
+box coordinates of every image unchanged. Images whose sizes differ too
+much to pad cheaply go into separate batches.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 1 disables batching; see OCRProcessPool
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE") or 1)
+OCR_BATCH_WAIT = float(os.getenv("OCR_BATCH_WAIT_MS") or 10) / 1000
+
+# A batch may hold up to this much more padded area than image area
+MAX_PADDING_RATIO = 1.5
+
+# Padding colour: white paper, on which the detector finds nothing
+PAD_VALUE = 255
+
+
+def bucket_by_size(images: List[np.ndarray]) -> List[List[int]]:
+    """
+    Group images that can share a padded size
+
+    Returns:
+        List[List[int]]: Indexes into images, one list per group
+    """
+    buckets = []
+    for index in sorted(range(len(images)), key=lambda i: images[i].shape[:2]):
+        image = images[index]
+        height, width = image.shape[:2]
+        for bucket in buckets:
+            first = images[bucket["indexes"][0]]
+            if first.shape[2:] != image.shape[2:] or first.dtype != image.dtype:
+                continue
+            padded_height = max(bucket["height"], height)
+            padded_width = max(bucket["width"], width)
+            padded_area = padded_height * padded_width * (len(bucket["indexes"]) + 1)
+            if padded_area <= MAX_PADDING_RATIO * (bucket["area"] + height * width):
+                bucket["indexes"].append(index)
+                bucket["height"], bucket["width"] = padded_height, padded_width
+                bucket["area"] += height * width
+                break
+        else:
+            buckets.append({"indexes": [index], "height": height, "width": width, "area": height * width})
+    return [bucket["indexes"] for bucket in buckets]
+
+
+def pad_image(image: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Pad image at the bottom and right to height x width"""
+    if image.shape[:2] == (height, width):
+        return image
+    padded = np.full((height, width) + image.shape[2:], PAD_VALUE, dtype=image.dtype)
+    padded[:image.shape[0], :image.shape[1]] = image
+    return padded
+
+
+def readtext_many(reader, images: List[np.ndarray]) -> List[list]:
+    """
+    readtext() every image, batching those that can share a padded size
+
+    Args:
+        reader: easyocr.Reader (or anything with readtext/readtext_batched)
+        images (list): Decoded images
+
+    Returns:
+        list: The readtext result of each image, in input order
+    """
+    results = [None] * len(images)
+    for bucket in bucket_by_size(images):
+        if len(bucket) == 1:
+            results[bucket[0]] = reader.readtext(images[bucket[0]])
+            continue
+        height = max(images[i].shape[0] for i in bucket)
+        width = max(images[i].shape[1] for i in bucket)
+        padded = [pad_image(images[i], height, width) for i in bucket]
+        for index, result in zip(bucket, reader.readtext_batched(padded, batch_size=len(bucket))):
+            results[index] = result
+    return results
+
+
+class MicroBatcher:
+    """
+    Groups submitted items into batches for a limited number of consumers
+    """
+
+    def __init__(self, dispatch: Callable[[List[Any]], Future], concurrency: int,
+                 max_batch_size: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Args:
+            dispatch (callable): Starts work on a batch of items and returns a
+                Future that completes when the batch is done; must not raise
+            concurrency (int): Batches in flight at once, e.g. the worker count
+            max_batch_size (int): Items per batch, OCR_BATCH_SIZE by default
+            max_wait (float): Seconds the first item of a batch waits for
+                company, OCR_BATCH_WAIT (OCR_BATCH_WAIT_MS) by default
+        """
+        self.dispatch = dispatch
+        self.max_batch_size = max(1, max_batch_size or OCR_BATCH_SIZE)
+        self.max_wait = OCR_BATCH_WAIT if max_wait is None else max_wait
+
+        # A batch is only formed once a consumer is free, so items arriving
+        # while every consumer is busy join the next batch
+        self._slots = threading.Semaphore(concurrency)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="ocr-batcher", daemon=True)
+        self._thread.start()
+        self._stats = {"jobs": 0, "batches": 0, "batched_jobs": 0}
+
+    def put(self, item: Any):
+        """Queue an item for the next batch"""
+        self._queue.put(item)
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            item = self._queue.get()
+            if item is None:
+                return
+            items = [item]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(items) < self.max_batch_size:
+                # Items that queued up while the consumers were busy are
+                # always taken; new ones are waited for until the deadline
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                items.append(item)
+
+            with self._lock:
+                self._stats["jobs"] += len(items)
+                self._stats["batches"] += 1
+                if len(items) > 1:
+                    self._stats["batched_jobs"] += len(items)
+            try:
+                self.dispatch(items).add_done_callback(lambda _: self._slots.release())
+            except Exception as e:
+                logger.error(f"Dispatching a batch of {len(items)} OCR jobs failed: {e}")
+                self._slots.release()
+            if stop:
+                return
+
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict: jobs, batches, batched_jobs and mean_batch_size so far
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_batch_size"] = stats["jobs"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+    def close(self, wait: bool = True) -> List[Any]:
+        """
+        Stop forming batches
+
+        Args:
+            wait (bool): Wait for the scheduler thread, which may be waiting for a free consumer
+
+        Returns:
+            list: Items that were queued but never dispatched
+        """
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+        return leftover
@@ -0,0 +1,297 @@
+"""
+Process pool for the CPU-bound local OCR stages
+
+EasyOCR inference, the OpenCV preprocessing in ImageProcessor.extract_text,
+assess_image_quality and compress_image all hold the GIL for most of their
+run time. Called from an async route they would stall the event loop, and
+threads would not scale them. Each worker process builds its own
+ImageProcessor (and so loads the EasyOCR reader) once, in the pool
+initializer, and pins torch/OpenCV/BLAS to a fixed number of threads so
+that N workers do not each spawn one thread per core.
+
+With OCR_BATCH_SIZE > 1, extract_text jobs are grouped in the parent by a
+MicroBatcher and a free worker runs each group with one
+extract_text_batch call (see utils.ocr_batcher).
+
+A worker that dies (killed by the OOM killer, a crash in native OCR code)
+breaks a ProcessPoolExecutor for good; the pool then fails the jobs that
+were in flight and starts a fresh executor for the next ones.
+
+Every worker call also returns the OCR pass counts its processor recorded
+since the previous call, and the pool sums them, so statistics() covers
+all workers rather than one process.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.ocr_batcher import OCR_BATCH_SIZE, MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Read by OpenMP/MKL/OpenBLAS when they initialise, so they must be set in
+# the worker before torch or cv2 is imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS") or 0) or (os.cpu_count() or 1)
+OCR_THREADS_PER_WORKER = int(os.getenv("OCR_THREADS_PER_WORKER") or 1)
+# Jobs queued or running before submit() starts rejecting work
+# (0: two full batches per worker)
+OCR_MAX_PENDING = int(os.getenv("OCR_MAX_PENDING") or 0)
+
+# Processor methods whose jobs may be batched -> the method taking a list of their first arguments
+BATCHED_METHODS = {"extract_text": "extract_text_batch"}
+
+# The worker's ImageProcessor, built once by _init_worker
+_processor = None
+
+# Pass counters reported by pass_statistics(), summed over the workers
+PASS_COUNTERS = ("images", "full_passes", "region_passes")
+
+# The worker's pass counts already sent to the parent
+_reported_passes = dict.fromkeys(PASS_COUNTERS, 0)
+
+
+class OCRPoolBusy(RuntimeError):
+    """Raised when the pool already holds max_pending jobs"""
+
+
+def build_image_processor():
+    """Default worker factory: an ImageProcessor with a working EasyOCR reader"""
+    from utils.image_processor import ImageProcessor
+    processor = ImageProcessor()
+    if processor.ocr is None:
+        raise RuntimeError("EasyOCR initialization failed")
+    return processor
+
+
+def _init_worker(processor_factory: Callable[[], Any], threads: int):
+    global _processor
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    _processor = processor_factory()
+
+    # Only tune the libraries the processor actually loaded
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if "cv2" in sys.modules:
+        sys.modules["cv2"].setNumThreads(threads)
+
+
+def _new_passes() -> Optional[Dict[str, int]]:
+    # Pass counts recorded since the previous report, for processors that keep them
+    if not hasattr(_processor, "pass_statistics"):
+        return None
+    stats = _processor.pass_statistics()
+    new = {name: stats[name] - _reported_passes[name] for name in PASS_COUNTERS}
+    _reported_passes.update((name, stats[name]) for name in PASS_COUNTERS)
+    return new
+
+
+def _call(method: str, args: tuple) -> Tuple[Any, Optional[Dict[str, int]]]:
+    return getattr(_processor, method)(*args), _new_passes()
+
+
+def _call_batch(method: str, items: list) -> Tuple[list, Optional[Dict[str, int]]]:
+    return getattr(_processor, method)(items), _new_passes()
+
+
+def _ping(hold: float) -> int:
+    # Holding the worker briefly lets the other pings reach other workers
+    time.sleep(hold)
+    return os.getpid()
+
+
+class OCRProcessPool:
+    """
+    Bounded process pool running ImageProcessor methods in worker processes
+    """
+
+    def __init__(self, workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 max_pending: Optional[int] = None, processor_factory: Optional[Callable[[], Any]] = None,
+                 max_batch_size: Optional[int] = None, max_wait: Optional[float] = None):
+        """
+        Args:
+            workers (int): Worker processes, OCR_WORKERS by default
+            threads_per_worker (int): torch/OpenCV/BLAS threads per worker
+            max_pending (int): Queued plus running jobs before submit() raises OCRPoolBusy
+            processor_factory (callable): Picklable top-level callable building the
+                per-worker processor, build_image_processor by default
+            max_batch_size (int): extract_text jobs per worker call, OCR_BATCH_SIZE
+                by default; 1 sends every job on its own
+            max_wait (float): Seconds the first job of a batch waits for company,
+                OCR_BATCH_WAIT by default
+        """
+        self.workers = workers or OCR_WORKERS
+        self.threads_per_worker = threads_per_worker or OCR_THREADS_PER_WORKER
+        self.max_batch_size = max(1, max_batch_size or OCR_BATCH_SIZE)
+        self.max_pending = max_pending or OCR_MAX_PENDING or 2 * self.workers * self.max_batch_size
+        self.processor_factory = processor_factory or build_image_processor
+
+        self._executor = self._new_executor()
+        self._restarts = 0
+        self._closed = False
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._passes = dict.fromkeys(PASS_COUNTERS, 0)
+        self._batcher = None
+        if self.max_batch_size > 1:
+            self._batcher = MicroBatcher(self._dispatch, self.workers, self.max_batch_size, max_wait)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # Forking a parent that has started OpenMP/torch thread pools can
+        # deadlock the child, so workers are always spawned fresh
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.processor_factory, self.threads_per_worker)
+        )
+
+    def _replace_broken(self, broken: ProcessPoolExecutor):
+        """Start a new executor in place of a broken one, once per breakage"""
+        with self._lock:
+            if self._closed or self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self._restarts += 1
+        logger.warning(f"OCR worker process died, restarted the pool ({self._restarts} restarts)")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, method: str, *args) -> Future:
+        """
+        Run processor.<method>(*args) in a worker
+
+        Batched methods (BATCHED_METHODS) wait for a batch when batching is
+        enabled; errors, including a failed dispatch, are set on the future.
+
+        Raises:
+            OCRPoolBusy: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise OCRPoolBusy(f"OCR pool is busy ({self._pending} pending jobs)")
+            self._pending += 1
+        future = Future()
+        future.add_done_callback(self._release)
+        job = (method, args, future)
+        if self._batcher is not None and method in BATCHED_METHODS:
+            self._batcher.put(job)
+        else:
+            self._dispatch([job])
+        return future
+
+    def _dispatch(self, jobs: List[Tuple[str, tuple, Future]]) -> Future:
+        """Send jobs to a worker, one call per job or one batch call for several"""
+        # Jobs cancelled while they were queued are dropped
+        jobs = [job for job in jobs if job[2].set_running_or_notify_cancel()]
+        if not jobs:
+            call = Future()
+            call.set_result([])
+            return call
+        if len(jobs) == 1:
+            method, args, _ = jobs[0]
+            function, arguments = _call, (method, args)
+        else:
+            function, arguments = _call_batch, (BATCHED_METHODS[jobs[0][0]], [args[0] for _, args, _ in jobs])
+
+        executor = self._executor
+        try:
+            try:
+                call = executor.submit(function, *arguments)
+            except BrokenProcessPool:
+                # Broken by a worker that died since the last call; retried once on a fresh executor
+                self._replace_broken(executor)
+                executor = self._executor
+                call = executor.submit(function, *arguments)
+        except Exception as e:
+            call = Future()
+            call.set_exception(e)
+        call.add_done_callback(lambda call: self._deliver(call, jobs, executor))
+        return call
+
+    def _deliver(self, call: Future, jobs: List[Tuple[str, tuple, Future]], executor: ProcessPoolExecutor):
+        """Hand each job its own result from a worker call"""
+        if not call.cancelled() and isinstance(call.exception(), BrokenProcessPool):
+            # The jobs in flight are lost with the worker, later ones get a new executor
+            self._replace_broken(executor)
+        try:
+            results, passes = call.result()
+            if passes:
+                with self._lock:
+                    for name, count in passes.items():
+                        self._passes[name] += count
+            if len(jobs) == 1:
+                results = [results]
+            outcomes = [(result, None) for result in results]
+        except BaseException as e:
+            outcomes = [(None, e)] * len(jobs)
+        for (_, _, future), (result, error) in zip(jobs, outcomes):
+            try:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            except InvalidStateError:
+                pass
+
+    async def run(self, method: str, *args) -> Any:
+        """Awaitable submit() for async routes; the event loop is never blocked"""
+        return await asyncio.wrap_future(self.submit(method, *args))
+
+    def warm_up(self, rounds: int = 10) -> int:
+        """
+        Start every worker and wait until each has built its processor
+
+        Returns:
+            int: Number of distinct worker processes that answered
+        """
+        pids = set()
+        for _ in range(rounds):
+            futures = [self._executor.submit(_ping, 0.05) for _ in range(self.workers)]
+            pids.update(future.result() for future in futures)
+            if len(pids) >= self.workers:
+                break
+        logger.info(f"OCR pool ready: {len(pids)} workers, {self.threads_per_worker} threads each")
+        return len(pids)
+
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict: pending jobs, executor restarts, the OCR passes of all workers (images,
+            full_passes, region_passes, average_passes) and, with batching
+            enabled, the batcher's jobs, batches, batched_jobs and mean_batch_size
+        """
+        with self._lock:
+            passes = dict(self._passes)
+        total = passes["full_passes"] + passes["region_passes"]
+        passes["average_passes"] = round(total / passes["images"], 2) if passes["images"] else 0.0
+        stats = {"pending": self._pending, "restarts": self._restarts, "ocr_passes": passes}
+        if self._batcher is not None:
+            stats.update(self._batcher.statistics())
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._closed = True
+        if self._batcher is not None:
+            for _, _, future in self._batcher.close(wait=wait):
+                future.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,149 @@
+"""
+Cheap image quality gate for clients to run before the full upload
+
+ImageProcessor.assess_image_quality needs the whole photo and OpenCV. This
+module works on a thumbnail or on the first few hundred KB of the photo,
+decodes it at reduced scale (JPEG DCT scaling via Image.draft, so a 12 MP
+photo is decoded at 1/4 size) and measures blur, exposure and contrast
+with NumPy on a grayscale image of about ANALYSIS_SIZE pixels per side.
+That keeps a check in the low milliseconds, so clients can reject a bad
+shot before uploading it and paying for OCR and LLM calls.
+"""
+
+import io
+import logging
+import os
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Longest side of the grayscale image the metrics are measured on; the
+# blur threshold below only holds at this scale
+ANALYSIS_SIZE = 1024
+
+# Laplacian variance below this (at ANALYSIS_SIZE) means a blurry shot. It is
+# higher than ImageProcessor's full-resolution threshold of 100 because
+# downscaling shrinks blur along with the image
+BLUR_THRESHOLD = float(os.getenv("QUALITY_BLUR_THRESHOLD") or 300)
+DARK_THRESHOLD = 30.0
+BRIGHT_THRESHOLD = 220.0
+CONTRAST_THRESHOLD = 20.0
+
+# Fewest rows (after truncation and subsampling) worth measuring
+MIN_DECODED_ROWS = 64
+
+
+def decode_preview(data: bytes, size: int = ANALYSIS_SIZE) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Decode an image (or a prefix of a baseline JPEG) to a small grayscale array
+
+    Args:
+        data (bytes): Thumbnail, full image, or the first bytes of an image
+        size (int): Target longest side; the result is between size / 2 and
+            2 * size unless the image is smaller
+
+    Returns:
+        tuple: float32 grayscale array, and info with the original width,
+        height, format, whether the data was truncated and the decoded fraction
+
+    Raises:
+        ValueError: If the data cannot be decoded into a usable preview
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise ValueError(f"无法识别的图片格式: {str(e)}")
+
+    width, height = img.size
+    info = {"width": width, "height": height, "format": img.format, "partial": False, "decoded_fraction": 1.0}
+
+    # JPEG: decode straight to grayscale at a reduced DCT scale (1/2 to 1/8)
+    # that keeps both sides at least size / 2
+    img.draft("L", (size // 2, size // 2))
+    try:
+        img.load()
+    except OSError as e:
+        if "truncated" not in str(e):
+            raise ValueError(f"图片解码失败: {str(e)}")
+        if img.info.get("progressive") or img.info.get("progression"):
+            # A progressive prefix decodes to a blurry full frame: useless for a blur check
+            raise ValueError("渐进式JPEG的部分数据无法评估，请上传缩略图")
+        # Keep the rows decoded so far
+        img.tile = []
+        info["partial"] = True
+
+    gray = np.asarray(img.convert("L"), dtype=np.float32)
+    if info["partial"]:
+        # Rows the decoder never reached are left at zero
+        decoded_rows = np.flatnonzero(gray.max(axis=1) > 0)
+        rows = decoded_rows[-1] + 1 if decoded_rows.size else 0
+        info["decoded_fraction"] = round(rows / gray.shape[0], 3)
+        gray = gray[:rows]
+
+    # Integer-step subsampling for formats without reduced-scale decoding
+    step = max(1, max(gray.shape) // size)
+    if step > 1:
+        gray = gray[::step, ::step]
+    if gray.shape[0] < MIN_DECODED_ROWS:
+        raise ValueError("图片数据过少，请上传更多数据或缩略图")
+    return gray, info
+
+
+def measure_quality(gray: np.ndarray) -> Dict[str, float]:
+    """Blur (Laplacian variance), brightness and contrast of a grayscale image"""
+    laplacian = (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+                 - 4 * gray[1:-1, 1:-1])
+    return {
+        "blurriness": float(laplacian.var()),
+        "brightness": float(gray.mean()),
+        "contrast": float(gray.std())
+    }
+
+
+def assess_quality(data: bytes) -> Dict[str, Any]:
+    """
+    Quick quality verdicts for an image, thumbnail or image prefix
+
+    Args:
+        data (bytes): Encoded image data
+
+    Returns:
+        Dict: is_suitable, reason (same wording as ImageProcessor.assess_image_quality),
+        per-aspect verdicts, metrics and decode info
+
+    Raises:
+        ValueError: If the data cannot be decoded
+    """
+    gray, info = decode_preview(data)
+    metrics = measure_quality(gray)
+    metrics["analysis_width"], metrics["analysis_height"] = gray.shape[1], gray.shape[0]
+
+    verdicts = {
+        "blur": "blurry" if metrics["blurriness"] < BLUR_THRESHOLD else "ok",
+        "exposure": ("too_dark" if metrics["brightness"] < DARK_THRESHOLD
+                     else "too_bright" if metrics["brightness"] > BRIGHT_THRESHOLD else "ok"),
+        "contrast": "low" if metrics["contrast"] < CONTRAST_THRESHOLD else "ok"
+    }
+
+    # Under- or over-exposure and low contrast also flatten the Laplacian,
+    # so they take precedence over blur as the reason
+    reason = "图片质量良好"
+    if verdicts["exposure"] == "too_dark":
+        reason = "图片太暗，请在光线充足的环境下重拍"
+    elif verdicts["exposure"] == "too_bright":
+        reason = "图片太亮，请避免强光反射"
+    elif verdicts["contrast"] != "ok":
+        reason = "图片对比度太低，文字难以识别"
+    elif verdicts["blur"] != "ok":
+        reason = "图片不清晰，请重拍"
+
+    return {
+        "is_suitable": all(verdict == "ok" for verdict in verdicts.values()),
+        "reason": reason,
+        "verdicts": verdicts,
+        "metrics": metrics,
+        "image": info
+    }
@@ -0,0 +1,142 @@
+"""
+Canonical form for OCR output and user-entered label text
+
+Baidu OCR and EasyOCR mix full-width and half-width forms, traditional and
+simplified characters, letter-spaced headings (配 料) and a few recurring
+misreadings. normalize_text is applied once, right after OCR and to manual
+input, so section trimming, ingredient matching and cache keys all see one
+spelling of each label and need no variant entries.
+
+Everything is precompiled at import: one str.translate table for the
+character-level mappings and a handful of regular expressions for the
+context-dependent ones.
+"""
+
+import re
+import unicodedata
+from typing import Dict
+
+# Compatibility blocks whose NFKC form is the canonical one: CJK radicals,
+# Kangxi radicals, ideographic space, squared units (㎎ ㎉), CJK compatibility
+# ideographs, vertical and small form variants, full-width ASCII and the
+# half-width ideographic comma
+_COMPATIBILITY_RANGES = [
+    (0x2E80, 0x2FDF), (0x3000, 0x3000), (0x3380, 0x33FF), (0xF900, 0xFAFF),
+    (0xFE10, 0xFE19), (0xFE30, 0xFE6B), (0xFF01, 0xFF5E), (0xFF64, 0xFF64)
+]
+
+# Traditional characters seen on imported and Hong Kong/Taiwan labels, and
+# their simplified forms. 醣 is not mapped to 糖: on Taiwanese labels 醣 is
+# carbohydrate and 糖 is sugar (see NUTRIENT_NAMES in utils.nutrition_parser)
+TRADITIONAL = (
+    "營養劑鹽麥質熱鈉維穀醬澱漿檸氫脫製產廠號總於貯條蘋薑雞豬魚蝦麵鹼燒發麩濃縮調鮮醃蔥蘿蔔爾黃綠紅藍"
+    "糧飲乾類礦鈣鐵鋅鎂鉀葉膽單雙鹹溫儲標準執許證淨積蘇蕎糰餅麪鬆蘆薈樹膠凍狀態體細顆漬釀醫藥瑪氣應"
+    "過請參閱見說為與個們來對會學實際電話網業務東區國華經銷進萬價錢適開關後時間點處陰涼陽長專門問題無"
+    "鹵灣臺壓纖飽異構澤選擇優極級純檢驗測報備註碼規裝內計約"
+)
+SIMPLIFIED = (
+    "营养剂盐麦质热钠维谷酱淀浆柠氢脱制产厂号总于贮条苹姜鸡猪鱼虾面碱烧发麸浓缩调鲜腌葱萝卜尔黄绿红蓝"
+    "粮饮干类矿钙铁锌镁钾叶胆单双咸温储标准执许证净积苏荞团饼面松芦荟树胶冻状态体细颗渍酿医药玛气应"
+    "过请参阅见说为与个们来对会学实际电话网业务东区国华经销进万价钱适开关后时间点处阴凉阳长专门问题无"
+    "卤湾台压纤饱异构泽选择优极级纯检验测报备注码规装内计约"
+)
+
+# Whole-word OCR misreadings and variant spellings, after the table above
+CONFUSABLE_WORDS = {
+    "配科": "配料",
+    "酉己料": "配料",
+    "成份": "成分",
+    "碳水化台物": "碳水化合物",
+    "蛋自质": "蛋白质",
+    "脂肋": "脂肪",
+    "净含星": "净含量",
+    "保质朗": "保质期",
+}
+
+# Headings and label terms that are printed letter-spaced (配 料, 营 养 成 分).
+# Spaces inside a run of single characters are only removed where the run
+# spells one of these (or a misreading above); elsewhere, as in 配料：水 糖 盐,
+# they separate one-character ingredients
+SPACED_TERMS = frozenset([
+    "配料", "配料表", "成分", "成分表", "原料", "原材料", "配料组成",
+    "营养成分", "营养成分表", "营养标签", "项目", "营养素参考值",
+    "能量", "蛋白质", "脂肪", "饱和脂肪", "反式脂肪", "碳水化合物", "膳食纤维",
+    "保质期", "储存条件", "贮存条件", "生产日期", "保存方法", "净含量", "产品标准",
+    "生产许可", "生产许可证", "生产商", "制造商", "致敏物质", "食用方法", "产地",
+]) | frozenset(CONFUSABLE_WORDS)
+_MAX_TERM_LENGTH = max(map(len, SPACED_TERMS))
+
+
+def _build_table() -> Dict[int, str]:
+    table = {}
+    for first, last in _COMPATIBILITY_RANGES:
+        for code in range(first, last + 1):
+            char = chr(code)
+            normalized = unicodedata.normalize("NFKC", char)
+            if normalized != char:
+                table[code] = normalized
+    table.update(str.maketrans(TRADITIONAL, SIMPLIFIED))
+    # Tabs and other inline whitespace become spaces; line breaks are kept
+    table.update({ord(char): " " for char in "\t\u00a0\u2002\u2003\u2009\u202f\u205f"})
+    table.update({ord(char): "" for char in "\u200b\u200c\u200d\ufeff"})
+    return table
+
+
+_TABLE = _build_table()
+
+_CJK = "\u3400-\u9fff"
+# Runs of single CJK characters separated by spaces (配 料, 营 养 成 分);
+# multi-character words stay apart, so 小麦粉 糖 植物油 keeps its spaces.
+# _join_spaced then joins only the parts of a run found in SPACED_TERMS
+_SPACED_CJK = re.compile(f"(?<![{_CJK}])[{_CJK}](?: +[{_CJK}](?![{_CJK}]))+")
+_SPACES = re.compile(r" {2,}")
+_CONFUSABLES = re.compile("|".join(sorted(map(re.escape, CONFUSABLE_WORDS), key=len, reverse=True)))
+_DIGIT = re.compile(r"\d")
+# Letters and full stops read inside numbers: 1O.5g, 2l0, 3。5
+_LETTER_O = re.compile(r"(?<=\d)[Oo](?=[\d.%])|(?<=\d\.)[Oo]")
+_LETTER_L = re.compile(r"(?<=\d)[lI|](?=\d)")
+_DECIMAL_POINT = re.compile(r"(?<=\d)[。·](?=\d)")
+
+
+def _join_spaced(match: re.Match) -> str:
+    chars = match.group().split()
+    words = []
+    start = 0
+    while start < len(chars):
+        # Longest known term starting here, else the character on its own
+        for end in range(min(len(chars), start + _MAX_TERM_LENGTH), start, -1):
+            if end - start == 1 or "".join(chars[start:end]) in SPACED_TERMS:
+                break
+        words.append("".join(chars[start:end]))
+        start = end
+    return " ".join(words)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of OCR or user-entered label text
+
+    Full-width letters, digits and punctuation become ASCII (，→, （→( ％→%),
+    compatibility characters take their NFKC form, traditional characters
+    common on labels become simplified, letter-spaced CJK headings in
+    SPACED_TERMS are joined, inline whitespace is collapsed, and known
+    misreadings of words and numbers are corrected. Line breaks are kept.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Normalized text
+    """
+    if not text:
+        return text
+    text = text.translate(_TABLE)
+    if " " in text:
+        text = _SPACED_CJK.sub(_join_spaced, text)
+        text = _SPACES.sub(" ", text)
+    text = _CONFUSABLES.sub(lambda match: CONFUSABLE_WORDS[match.group()], text)
+    if _DIGIT.search(text):
+        text = _LETTER_O.sub("0", text)
+        text = _LETTER_L.sub("1", text)
+        text = _DECIMAL_POINT.sub(".", text)
+    return text
@@ -0,0 +1,291 @@
+"""
+Streaming multipart/form-data upload reader
+
+Starlette's form parsing (and so FastAPI's UploadFile parameters) reads the
+whole request body into a spooled temporary file before the endpoint runs,
+so an oversized upload is received in full before it can be rejected.
+read_multipart_file parses the body as it arrives from the ASGI receive
+stream instead: the Content-Length header is checked before any body is
+read, received bytes are counted per chunk and the upload is aborted as
+soon as it passes the limit. The wanted file field is copied straight into
+an in-memory buffer that never grows past the limit, and nothing is
+written to disk.
+
+read_raw_image does the same for a bare image request body (no form and
+no base64), identifying the format from its leading magic bytes.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Collection, Mapping, Optional
+
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# Room for the boundaries, part headers and small form fields that
+# accompany the file in the body
+MAX_FORM_OVERHEAD = 64 * 1024
+
+# Leading bytes of each image format: (offset, signature, content type)
+IMAGE_SIGNATURES = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"BM", "image/bmp"),
+    (8, b"WEBP", "image/webp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+)
+# Bytes needed to tell the formats apart
+SNIFF_SIZE = 12
+
+# Declared types accepted for a raw body; the sniffed type is what counts
+RAW_BODY_TYPES = ("application/octet-stream", "image/")
+
+
+class UploadTooLarge(Exception):
+    """The upload is larger than the allowed size"""
+
+    def __init__(self, max_size: int, received: int):
+        super().__init__(f"Upload exceeds {max_size} bytes (received {received})")
+        self.max_size = max_size
+        self.received = received
+
+
+class InvalidUpload(ValueError):
+    """The body is not a multipart form holding the expected file"""
+
+
+class _FileComplete(Exception):
+    """Raised by the collector once a truncated file has all the data it keeps"""
+
+
+class UnsupportedUploadType(InvalidUpload):
+    """The file part has a content type that is not accepted"""
+
+    def __init__(self, content_type: Optional[str]):
+        super().__init__(f"Unsupported content type: {content_type}")
+        self.content_type = content_type
+
+
+@dataclass
+class StreamedUpload:
+    """A file read from a multipart body"""
+
+    field_name: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    # Bounded by the max_size given to read_multipart_file
+    data: bytearray = field(default_factory=bytearray)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class _FileCollector:
+    """python-multipart callbacks that keep the parts of one field"""
+
+    def __init__(self, field_name: str, max_size: int, content_types: Optional[Collection[str]],
+                 truncate: bool = False):
+        self.field_name = field_name
+        self.max_size = max_size
+        self.content_types = content_types
+        self.truncate = truncate
+        self.upload: Optional[StreamedUpload] = None
+        self._headers = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._collecting = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        # Only the first part of the field is kept; later ones are skipped
+        self._collecting = name == self.field_name and self.upload is None
+        if not self._collecting:
+            return
+
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").strip() or None
+        if self.content_types is not None and content_type not in self.content_types:
+            raise UnsupportedUploadType(content_type)
+        filename = options.get(b"filename")
+        self.upload = StreamedUpload(
+            field_name=name,
+            filename=filename.decode("utf-8", "replace") if filename is not None else None,
+            content_type=content_type
+        )
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._collecting:
+            return
+        received = self.upload.size + end - start
+        if received >= self.max_size and self.truncate:
+            self.upload.data += data[start:start + self.max_size - self.upload.size]
+            raise _FileComplete()
+        if received > self.max_size:
+            raise UploadTooLarge(self.max_size, received)
+        self.upload.data += data[start:end]
+
+    def on_part_end(self):
+        self._collecting = False
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Image content type from the first bytes of a file
+
+    Args:
+        head (bytes): At least SNIFF_SIZE leading bytes
+
+    Returns:
+        str: Content type such as image/jpeg, or None if no format matches
+    """
+    for offset, signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature, offset):
+            # WEBP is a RIFF container
+            if content_type == "image/webp" and not head.startswith(b"RIFF"):
+                continue
+            return content_type
+    return None
+
+
+async def read_raw_image(headers: Mapping[str, str], stream: AsyncIterator[bytes], max_size: int,
+                         content_types: Optional[Collection[str]] = None) -> StreamedUpload:
+    """
+    Read an image sent as the raw request body
+
+    The declared Content-Type must be application/octet-stream or image/*;
+    the format is then taken from the magic bytes, so a mislabelled or
+    non-image body is rejected after its first chunk.
+
+    Args:
+        headers (Mapping): Request headers (content-type, content-length)
+        stream (AsyncIterator): Body chunks, e.g. Request.stream()
+        max_size (int): Largest accepted image, in bytes
+        content_types (Collection): Accepted sniffed content types; any image if None
+
+    Returns:
+        StreamedUpload: The image, with field_name "body" and the sniffed content type
+
+    Raises:
+        UploadTooLarge: As soon as the declared or received size passes the limit
+        UnsupportedUploadType: When the declared or sniffed type is not accepted
+        InvalidUpload: When the body is empty
+    """
+    declared_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if not declared_type.startswith(RAW_BODY_TYPES):
+        raise UnsupportedUploadType(declared_type or None)
+
+    declared = headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_size:
+        raise UploadTooLarge(max_size, int(declared))
+
+    upload = StreamedUpload(field_name="body")
+    async for chunk in stream:
+        if upload.size + len(chunk) > max_size:
+            raise UploadTooLarge(max_size, upload.size + len(chunk))
+        upload.data += chunk
+        if upload.content_type is None and upload.size >= SNIFF_SIZE:
+            upload.content_type = sniff_image_type(bytes(upload.data[:SNIFF_SIZE]))
+            if upload.content_type is None or (
+                content_types is not None and upload.content_type not in content_types
+            ):
+                raise UnsupportedUploadType(upload.content_type or declared_type)
+
+    if upload.size == 0:
+        raise InvalidUpload("Empty request body")
+    if upload.content_type is None:
+        # Shorter than SNIFF_SIZE: too small to be a real image
+        raise UnsupportedUploadType(declared_type)
+    logger.debug(f"Raw image body: {upload.size} bytes, {upload.content_type}")
+    return upload
+
+
+async def read_multipart_file(headers: Mapping[str, str], stream: AsyncIterator[bytes],
+                              field_name: str, max_size: int,
+                              content_types: Optional[Collection[str]] = None,
+                              truncate: bool = False) -> StreamedUpload:
+    """
+    Read one file field from a streamed multipart/form-data body
+
+    Args:
+        headers (Mapping): Request headers (content-type, content-length)
+        stream (AsyncIterator): Body chunks, e.g. Request.stream()
+        field_name (str): Form field holding the file
+        max_size (int): Largest accepted file, in bytes
+        content_types (Collection): Accepted part content types; any if None
+        truncate (bool): Keep only the first max_size bytes of a larger file
+            and stop reading the body there, instead of rejecting it
+
+    Returns:
+        StreamedUpload: The file, with its data in memory
+
+    Raises:
+        UploadTooLarge: As soon as the declared or received size passes the
+            limit (with truncate, only when the body holds that much besides
+            the file); the rest of the body is not read
+        UnsupportedUploadType: When the file part's headers arrive with a
+            content type not in content_types, before its data is read
+        InvalidUpload: When the body is not multipart or lacks the field
+    """
+    media_type, params = parse_options_header(headers.get("content-type", ""))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise InvalidUpload("Expected a multipart/form-data body with a boundary")
+
+    max_body = max_size + MAX_FORM_OVERHEAD
+    declared = headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_body and not truncate:
+        raise UploadTooLarge(max_size, int(declared))
+
+    collector = _FileCollector(field_name, max_size, content_types, truncate)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    received = 0
+    try:
+        async for chunk in stream:
+            received += len(chunk)
+            # Form fields other than the file are not counted by the collector
+            if received > max_body and not truncate:
+                raise UploadTooLarge(max_size, received)
+            parser.write(chunk)
+            if received > max_body:
+                # Truncating, but the file has not filled max_size by now
+                raise UploadTooLarge(max_size, received)
+        parser.finalize()
+    except _FileComplete:
+        pass
+    except MultipartParseError as e:
+        raise InvalidUpload(f"Malformed multipart body: {e}") from e
+
+    if collector.upload is None:
+        raise InvalidUpload(f"Missing file field: {field_name}")
+    logger.debug(f"Streamed upload {collector.upload.filename}: {collector.upload.size} bytes")
+    return collector.upload